@@ -3,6 +3,7 @@
 import { NewHeader } from "@/components/new-header"
 import { NewFooter } from "@/components/new-footer"
 import { ArticleCard } from "@/components/article-card"
+import { PostPicture } from "@/components/post-picture"
 import { Facebook, Twitter, Linkedin, Link as LinkIcon, Mail } from "lucide-react"
 import Link from "next/link"
 import { use, useState, useEffect } from "react"
@@ -29,6 +30,9 @@ export default function ArticlePage({ params }: PageProps) {
     const fetchArticle = async () => {
       try {
         setLoading(true)
+        // Plain GETs in parallel rather than a batch, so the browser can
+        // revalidate the post with its ETag (batched sub-requests can't)
+        const relatedRequest = postsApi.getRelatedPosts(slug).catch(() => [])
         const data = await postsApi.getPostBySlug(slug)
         setArticle({
           ...data,
@@ -41,11 +45,8 @@ export default function ArticlePage({ params }: PageProps) {
           categoryName: typeof data.category === 'object' ? (data.category.name) : data.category,
         })
 
-        // Fetch related articles (mock logic: fetch all and filter, or add specific endpoint)
-        // For now, we'll just fetch recent posts as "related"
-        const recentPosts = await postsApi.getAllPosts(1)
-        setRelatedArticles(recentPosts.results
-          .filter(p => p.slug !== slug)
+        const relatedPosts: any[] = await relatedRequest
+        setRelatedArticles(relatedPosts
           .slice(0, 3)
           .map(p => ({
             title: p.title,
@@ -54,6 +55,7 @@ export default function ArticlePage({ params }: PageProps) {
             date: new Date(p.created_at).toLocaleDateString('en-US', { month: 'short', day: 'numeric', year: 'numeric' }),
             category: typeof p.category === 'object' ? p.category.name : p.category,
             image: p.image || "/placeholder.svg",
+            imageSrcset: p.image_srcset ?? null,
             slug: p.slug,
           }))
         )
@@ -131,7 +133,14 @@ export default function ArticlePage({ params }: PageProps) {
       <main>
         {/* Hero Image */}
         <div className="w-full h-[60vh] lg:h-[70vh] relative overflow-hidden bg-muted">
-          <img src={article.image} alt={article.title} className="w-full h-full object-cover" />
+          <PostPicture
+            src={article.image}
+            srcset={article.image_srcset}
+            sizes="100vw"
+            eager
+            alt={article.title}
+            className="w-full h-full object-cover"
+          />
           <div className="absolute inset-0 bg-gradient-to-t from-background/80 to-transparent" />
         </div>
 
@@ -157,45 +166,36 @@ export default function ArticlePage({ params }: PageProps) {
               </Link>
               <span>·</span>
               <span>{article.date}</span>
-              {/* <span>·</span>
-              <span>{article.readTime || "5 min read"}</span> */}
+              {article.reading_time > 0 && (
+                <>
+                  <span>·</span>
+                  <span>{article.reading_time} min read</span>
+                </>
+              )}
             </div>
           </header>
 
-          {/* Article Body */}
-          <div className="prose prose-lg max-w-none mb-16">
-            {article.content.split("\n\n").map((paragraph: string, index: number) => {
-              // Handle headings
-              if (paragraph.startsWith("## ")) {
-                return (
-                  <h2 key={index} className="font-serif text-3xl text-foreground mt-16 mb-6">
-                    {paragraph.replace("## ", "")}
-                  </h2>
-                )
-              }
-              // Handle blockquotes
-              if (paragraph.startsWith("> ")) {
-                const quote = paragraph.replace("> ", "").split(" — ")
-                return (
-                  <blockquote
-                    key={index}
-                    className="border-l-2 border-foreground pl-6 my-12 italic font-serif text-xl text-foreground"
-                  >
-                    {quote[0]}
-                    {quote[1] && (
-                      <footer className="text-base not-italic text-muted-foreground mt-4">— {quote[1]}</footer>
-                    )}
-                  </blockquote>
-                )
-              }
-              // Regular paragraphs
-              return (
-                <p key={index} className="font-serif text-lg leading-relaxed text-foreground mb-6">
-                  {paragraph}
-                </p>
-              )
-            })}
-          </div>
+          {/* Table of Contents */}
+          {article.content_toc?.length > 1 && (
+            <nav className="border-l-2 border-border pl-6 mb-12" aria-label="Table of contents">
+              <h3 className="text-sm uppercase tracking-wider text-foreground font-medium mb-4">In this article</h3>
+              <ul className="space-y-2">
+                {article.content_toc.map((entry: { level: number; text: string; id: string }) => (
+                  <li key={entry.id} className={entry.level > 2 ? "pl-4" : ""}>
+                    <a href={`#${entry.id}`} className="text-muted-foreground hover:text-foreground transition-colors">
+                      {entry.text}
+                    </a>
+                  </li>
+                ))}
+              </ul>
+            </nav>
+          )}
+
+          {/* Article Body: rendered and sanitized by the backend on save */}
+          <div
+            className="prose prose-lg max-w-none mb-16 [&_h2]:font-serif [&_h2]:text-3xl [&_h2]:text-foreground [&_h2]:mt-16 [&_h2]:mb-6 [&_h2]:scroll-mt-24 [&_h3]:font-serif [&_h3]:text-2xl [&_h3]:text-foreground [&_h3]:mt-12 [&_h3]:mb-4 [&_h3]:scroll-mt-24 [&_p]:font-serif [&_p]:text-lg [&_p]:leading-relaxed [&_p]:text-foreground [&_p]:mb-6 [&_blockquote]:border-l-2 [&_blockquote]:border-foreground [&_blockquote]:pl-6 [&_blockquote]:my-12 [&_blockquote_p]:italic [&_blockquote_p]:text-xl [&_ul]:list-disc [&_ul]:pl-6 [&_ul]:mb-6 [&_ol]:list-decimal [&_ol]:pl-6 [&_ol]:mb-6 [&_li]:font-serif [&_li]:text-lg [&_li]:text-foreground [&_li]:mb-2 [&_a]:underline [&_pre]:bg-muted [&_pre]:p-4 [&_pre]:mb-6 [&_pre]:overflow-x-auto"
+            dangerouslySetInnerHTML={{ __html: article.content_html }}
+          />
 
           {/* Social Share */}
           <div className="border-t border-b border-border py-8 mb-16">
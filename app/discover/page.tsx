@@ -77,6 +77,7 @@ export default function DiscoverPage() {
         date: new Date(post.created_at).toLocaleDateString('en-US', { month: 'short', day: 'numeric', year: 'numeric' }),
         category: post.category.name,
         image: post.image || "/placeholder.svg",
+        imageSrcset: post.image_srcset ?? null,
         slug: post.slug,
     }))
 
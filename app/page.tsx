@@ -6,6 +6,7 @@ import { ArticleGrid } from "@/components/article-grid"
 import { PopularArticles } from "@/components/popular-articles"
 import { ContactSection } from "@/components/contact-section"
 import { NewFooter } from "@/components/new-footer"
+import { feedApi } from "@/lib/api/feed"
 import { postsApi } from "@/lib/api/posts"
 
 const categories = [
@@ -35,48 +36,54 @@ function shuffleArray<T>(array: T[]): T[] {
 
 export default async function HomePage() {
   let allPosts: any[] = []
-
-  try {
-    // Fetch posts - trying to get enough for all sections
-    const response = await postsApi.getAllPosts(1)
-    allPosts = response.results || []
-
-    // If needed, fetch page 2
-    if (allPosts.length < 15 && response.next) {
-      try {
-        const response2 = await postsApi.getAllPosts(2)
-        allPosts = [...allPosts, ...(response2.results || [])]
-      } catch (e) {
-        console.error("Failed to fetch page 2", e)
-      }
-    }
-  } catch (error) {
-    console.error("Failed to fetch posts:", error)
+  let heroPost: any = null
+  let popularPosts: any[] = []
+
+  // Hero, latest posts and category highlights in one request, and the
+  // most-read posts alongside it
+  const [feedResult, popularResult] = await Promise.allSettled([
+    feedApi.getHomeFeed(),
+    postsApi.getPopularPosts(),
+  ])
+  if (feedResult.status === "fulfilled") {
+    heroPost = feedResult.value.hero
+    allPosts = feedResult.value.latest || []
+  } else {
+    console.error("Failed to fetch home feed:", feedResult.reason)
+  }
+  if (popularResult.status === "fulfilled") {
+    popularPosts = popularResult.value.results || []
+  } else {
+    console.error("Failed to fetch popular posts:", popularResult.reason)
   }
 
   // Transform posts to common format
-  const transformedArticles = allPosts.map(post => ({
+  const transformArticle = (post: any) => ({
     title: post.title,
     excerpt: post.excerpt,
     author: post.author.display_name || post.author.username,
     date: new Date(post.created_at).toLocaleDateString('en-US', { month: 'long', day: 'numeric', year: 'numeric' }),
     category: post.category.name,
     image: post.image || "/placeholder.svg",
+    imageSrcset: post.image_srcset ?? null,
     slug: post.slug,
-    readTime: "5 min read", // Placeholder
+    readTime: `${post.reading_time || 1} min read`,
     sponsored: false,
-  }))
+  })
+  const transformedArticles = allPosts.map(transformArticle)
 
   // 1. Latest Articles (First 6)
   const latestArticles = transformedArticles.slice(0, 6)
 
-  // 2. Popular Articles (Next 6, or random fallback)
-  const popularArticles = transformedArticles.length > 6
-    ? transformedArticles.slice(6, 12)
+  // 2. Popular Articles (most read; the latest until any post has been read)
+  const popularArticles = popularPosts.length > 0
+    ? popularPosts.slice(0, 6).map(transformArticle)
     : transformedArticles.slice(0, 6)
 
-  // 3. Hero Articles (3 Random)
-  const heroArticles = shuffleArray(transformedArticles).slice(0, 3)
+  // 3. Hero Articles (the feed's hero first, then 2 random)
+  const heroArticles = heroPost
+    ? [transformArticle(heroPost), ...shuffleArray(transformedArticles.filter(a => a.slug !== heroPost.slug)).slice(0, 2)]
+    : shuffleArray(transformedArticles).slice(0, 3)
 
   return (
     <div className="min-h-screen bg-background">
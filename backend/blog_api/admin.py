@@ -19,7 +19,7 @@ class UserAdmin(BaseUserAdmin):
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     """Category admin"""
-    list_display = ['name', 'slug', 'created_at']
+    list_display = ['name', 'slug', 'posts_count', 'created_at']
     search_fields = ['name']
     prepopulated_fields = {'slug': ('name',)}
 
@@ -27,7 +27,7 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     """Post admin"""
-    list_display = ['title', 'author', 'category', 'status', 'created_at']
+    list_display = ['title', 'author', 'category', 'status', 'comments_count', 'views_count', 'created_at']
     list_filter = ['status', 'category', 'created_at']
     search_fields = ['title', 'content']
     prepopulated_fields = {'slug': ('title',)}
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class BlogApiConfig(AppConfig):
     name = 'blog_api'
+
+    def ready(self):
+        # Register signal handlers
+        from . import signals  # noqa: F401
+        from . import response_cache
+        response_cache.check_shared_cache()
@@ -0,0 +1,214 @@
+"""
+JWT authentication with a cached user lookup.
+
+`CachedJWTAuthentication` validates tokens exactly like simplejwt's
+`JWTAuthentication`, but resolves the user from a per-process LRU with a
+short TTL (AUTH_USER_CACHE_SIZE / AUTH_USER_CACHE_TTL), optionally backed
+by a shared Django cache (AUTH_USER_CACHE_ALIAS), before falling back to
+the database. Entries are keyed by user id and remember the token's
+revoke claim, so a token minted before a password change never reuses
+an entry made for a newer one.
+
+Cached users are rebuilt with `password` and the denormalized counters
+deferred: hashes never reach the shared cache, reading those fields goes
+to the database, and saving the instance (ProfileView) only writes the
+fields that were loaded.
+
+Saving or deleting a User drops its entry and, once the write commits,
+gives the user a new generation here and in the shared tier. Entries
+carry the generation that was current before their row was read, so a
+reader that loaded the old row and stores it after the write committed
+leaves an entry that never matches. Other processes' local entries
+expire within AUTH_USER_CACHE_TTL.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+KEY_PREFIX = 'auth-user'
+GENERATION_PREFIX = 'auth-user-generation'
+UNCACHED_FIELDS = ('password', 'posts_count', 'last_login')
+
+
+class LRUCache:
+    """
+    Thread-safe bounded mapping whose entries expire after `ttl` seconds.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = (time.monotonic() + self.ttl, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.data.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+_local = None
+_generations = None
+
+
+def get_local_cache():
+    global _local
+    if _local is None:
+        _local = LRUCache(
+            getattr(settings, 'AUTH_USER_CACHE_SIZE', 2048),
+            getattr(settings, 'AUTH_USER_CACHE_TTL', 30),
+        )
+    return _local
+
+
+def get_local_generations():
+    """This process's recent user generations; they outlive its entries."""
+    global _generations
+    if _generations is None:
+        _generations = LRUCache(
+            4 * getattr(settings, 'AUTH_USER_CACHE_SIZE', 2048),
+            getattr(settings, 'AUTH_USER_CACHE_TTL', 30),
+        )
+    return _generations
+
+
+def get_shared_cache():
+    alias = getattr(settings, 'AUTH_USER_CACHE_ALIAS', '')
+    return caches[alias] if alias else None
+
+
+def _cache_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def _generation_key(user_id):
+    return f'{GENERATION_PREFIX}:{user_id}'
+
+
+def cached_fields():
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.name not in UNCACHED_FIELDS
+    ]
+
+
+def invalidate_user(user_id):
+    """Forget a user now and again after commit, so no reader re-caches stale rows."""
+    user_id = str(user_id)
+    get_local_cache().delete(user_id)
+
+    def forget():
+        generation = uuid.uuid4().hex
+        get_local_generations().set(user_id, generation)
+        get_local_cache().delete(user_id)
+        shared = get_shared_cache()
+        if shared is not None:
+            timeout = getattr(settings, 'AUTH_USER_CACHE_SHARED_TTL', 300)
+            shared.set(_generation_key(user_id), generation, timeout)
+            shared.delete(_cache_key(user_id))
+
+    transaction.on_commit(forget)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that doesn't query the user table on cache hits.
+    """
+    def get_user(self, validated_token):
+        user_id, claim = self.identify(validated_token)
+        entry, generation = self.get_entry(user_id, claim)
+        if entry is None:
+            user = super().get_user(validated_token)
+            self.store_entry(user, claim, generation)
+            return user
+        return self.user_from_entry(entry)
+
+    def identify(self, validated_token):
+        """Return `(user_id, revoke_claim)` as cache key and entry check."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        claim = validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) if api_settings.CHECK_REVOKE_TOKEN else None
+        return str(user_id), claim
+
+    def user_from_entry(self, entry):
+        user = self.user_model.from_db(connection.alias, entry['fields'], entry['values'])
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
+
+    def get_entry(self, user_id, claim):
+        """
+        Return `(entry, generation)`: a usable cached entry or None, and the
+        user's current generation for storing one after a database read.
+        """
+        local = get_local_cache()
+        generation = get_local_generations().get(user_id)
+        entry = local.get(user_id)
+        # Entries copied from the shared tier carry its generation, which only
+        # has to match writes made since in this process
+        if entry is not None and generation is not None and entry['generation'] != generation:
+            entry = None
+        if entry is None:
+            shared = get_shared_cache()
+            if shared is not None:
+                found = shared.get_many([_cache_key(user_id), _generation_key(user_id)])
+                generation = found.get(_generation_key(user_id))
+                entry = found.get(_cache_key(user_id))
+                if entry is not None and entry['generation'] == generation:
+                    local.set(user_id, entry)
+                else:
+                    entry = None
+        if entry is None or entry['claim'] != claim:
+            return None, generation
+        return entry, generation
+
+    def store_entry(self, user, claim, generation):
+        if api_settings.USER_ID_FIELD != 'id':
+            return
+        fields = cached_fields()
+        entry = {
+            'claim': claim, 'generation': generation,
+            'fields': fields, 'values': [getattr(user, name) for name in fields],
+        }
+
+        def store():
+            get_local_cache().set(str(user.pk), entry)
+            shared = get_shared_cache()
+            if shared is not None:
+                shared.set(_cache_key(user.pk), entry, getattr(settings, 'AUTH_USER_CACHE_SHARED_TTL', 300))
+
+        # Rows read inside a transaction may be rolled back; only cache committed ones
+        transaction.on_commit(store)
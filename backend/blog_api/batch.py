@@ -0,0 +1,209 @@
+"""
+Batched API calls: `/api/v1/batch/` runs a list of sub-requests through the
+URLconf and returns every response in one payload.
+
+Each sub-request is dispatched straight to the view its path resolves to,
+without the middleware stack, as the caller: the JWT is decoded once for
+the batch and the resulting user is handed to the sub-requests through
+DRF's forced authentication, so permissions, visibility and the response
+cache behave exactly as for separate calls. Sub-responses are rendered as
+JSON and returned with their status code. An exception a view raises
+fails only its own sub-request, with the status Django would answer it
+with on its own.
+
+Runs of consecutive GETs are independent of each other and are served
+concurrently on a small thread pool (BATCH_MAX_WORKERS), each on a
+database connection of its own that is closed when it is done. Writes
+run one at a time, in order, on the request's connection. Inside a
+transaction everything runs in order on the request's connection,
+because other connections can't see its uncommitted rows.
+
+With `atomic`, the whole batch runs in one transaction. The first
+sub-request that fails (status 400 or above) rolls back every write in
+it, and the sub-requests after it are not run (status 424). Without it,
+each write commits on its own, as separate calls would.
+"""
+import contextvars
+import inspect
+import io
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.db import connection, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from .renderers import orjson
+
+BATCH_URL_NAME = 'batch'
+READ_METHODS = ('GET', 'HEAD')
+# Caller headers a sub-request must not inherit
+DROPPED_META = (
+    'CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING', 'HTTP_ACCEPT',
+    'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'wsgi.input',
+)
+RESPONSE_HEADERS = ('ETag', 'Last-Modified', 'Location')
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def get_max_requests():
+    return getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+
+
+def get_max_workers():
+    return getattr(settings, 'BATCH_MAX_WORKERS', 4)
+
+
+def error(status, detail):
+    return {'status': status, 'headers': {}, 'body': {'detail': detail}}
+
+
+class SubRequest(HttpRequest):
+    """A sub-request, seen over the same connection as its batch."""
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+
+    def _get_scheme(self):
+        return self.parent.scheme
+
+
+def build_request(parent, method, path, body):
+    """A SubRequest for one sub-request, made on behalf of `parent`'s caller."""
+    path, _, query = path.partition('?')
+    request = SubRequest(parent._request)
+    request.method = method
+    request.path = request.path_info = path
+    request.META = {key: value for key, value in parent._request.META.items() if key not in DROPPED_META}
+    request.META.update(QUERY_STRING=query, HTTP_ACCEPT='application/json', REQUEST_METHOD=method)
+    request.GET = QueryDict(query)
+    request.COOKIES = parent._request.COOKIES
+
+    payload = json.dumps(body).encode() if body is not None else b''
+    request.META.update(CONTENT_TYPE='application/json', CONTENT_LENGTH=str(len(payload)))
+    request._stream = io.BytesIO(payload)
+    request._read_started = False
+
+    # Already authenticated for the whole batch
+    request.META.pop('HTTP_AUTHORIZATION', None)
+    if parent.user is not None and parent.user.is_authenticated:
+        request._force_auth_user = parent.user
+        request._force_auth_token = parent.auth
+    return request
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def _wait(value):
+    """Results of async views (the live comment stream) are awaitables."""
+    return async_to_sync(_await)(value) if inspect.isawaitable(value) else value
+
+
+def dispatch(parent, item):
+    """Run one sub-request; returns its `{'status', 'headers', 'body'}` entry."""
+    path = item['path']
+    try:
+        match = resolve(path.partition('?')[0])
+    except Resolver404:
+        return error(404, 'Not found.')
+    if match.url_name == BATCH_URL_NAME:
+        return error(400, 'Batches cannot be nested.')
+
+    request = build_request(parent, item['method'], path, item.get('body'))
+    request.resolver_match = match
+    try:
+        response = _wait(match.func(request, *match.args, **match.kwargs))
+        if response.streaming:
+            response.close()
+            return error(400, 'Streaming responses cannot be batched.')
+        if hasattr(response, 'render') and not response.is_rendered:
+            _wait(response.render())
+    except Exception as exc:
+        # What the handler would answer alone (404, 403, 400, or a logged
+        # 500), for this sub-request only
+        response = response_for_exception(request, exc)
+        return error(response.status_code, f'{response.reason_phrase}.')
+
+    body = None
+    if response.content:
+        if response.get('Content-Type', '').startswith('application/json'):
+            body = _loads(response.content)
+        else:
+            body = response.content.decode(response.charset or 'utf-8', 'replace')
+    headers = {name: response[name] for name in RESPONSE_HEADERS if response.has_header(name)}
+    return {'status': response.status_code, 'headers': headers, 'body': body}
+
+
+def _dispatch_in_thread(parent, item):
+    # Pool threads are not request threads: nothing would close a
+    # connection they kept (CONN_MAX_AGE), so each task opens its own
+    try:
+        return dispatch(parent, item)
+    finally:
+        connection.close()
+
+
+_executor = None
+_state_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _state_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_max_workers(), thread_name_prefix='batch')
+    return _executor
+
+
+def _read_groups(items):
+    """Split `items` into runs of consecutive reads and single writes."""
+    group = []
+    for item in items:
+        if item['method'] in READ_METHODS:
+            group.append(item)
+            continue
+        if group:
+            yield group
+            group = []
+        yield [item]
+    if group:
+        yield group
+
+
+def run_batch(parent, items, atomic=False):
+    """
+    Run `items` for `parent` (the batch's DRF request). Returns the
+    sub-responses in order, and whether the batch's writes were committed.
+    """
+    if atomic:
+        responses = []
+        with transaction.atomic():
+            for index, item in enumerate(items):
+                responses.append(dispatch(parent, item))
+                if responses[-1]['status'] >= 400:
+                    transaction.set_rollback(True)
+                    skipped = 'Not run: an earlier request in this atomic batch failed.'
+                    responses.extend(error(424, skipped) for _ in items[index + 1:])
+                    return responses, False
+        return responses, True
+
+    concurrent = get_max_workers() > 1 and not connection.in_atomic_block
+    responses = []
+    for group in _read_groups(items):
+        if concurrent and len(group) > 1:
+            # Each in a copy of the request's context, for blog_api.instrumentation
+            futures = [
+                get_executor().submit(contextvars.copy_context().run, _dispatch_in_thread, parent, item)
+                for item in group
+            ]
+            responses.extend(future.result() for future in futures)
+        else:
+            responses.extend(dispatch(parent, item) for item in group)
+    return responses, True
@@ -0,0 +1,267 @@
+"""
+Refresh-token blacklist that stays fast as its tables grow.
+
+With ROTATE_REFRESH_TOKENS and BLACKLIST_AFTER_ROTATION every refresh
+blacklists the presented token and records a new outstanding one. Three
+pieces keep that off the database's critical path:
+
+    - BlacklistFilter: a per-process Bloom filter of blacklisted jtis. It is
+      built from the unexpired blacklist the first time a process checks a
+      token, then updated with this process's blacklistings and, every
+      TOKEN_BLACKLIST_SYNC_INTERVAL seconds, with other workers' (rows
+      newer than the last id it has seen). A jti the filter has never seen
+      skips the database; a possible hit is confirmed with a query.
+    - OutstandingTokenBuffer: new tokens' OutstandingToken rows are queued
+      and bulk-inserted every TOKEN_OUTSTANDING_BATCH_SIZE tokens, by a
+      timer TOKEN_OUTSTANDING_FLUSH_INTERVAL seconds after the first one
+      was queued (so an idle worker doesn't sit on them), and at exit.
+      Blacklisting never waits on it: a still-queued token's row and its
+      BlacklistedToken row are written right away.
+    - prune_expired(): deletes expired outstanding tokens (and, by cascade,
+      their blacklist rows) in chunks. Each process runs it in a background
+      thread every TOKEN_PRUNE_INTERVAL seconds; `manage.py prune_tokens`
+      runs it on demand.
+
+The filter may lag other workers by the sync interval, so it is not what
+stops a rotated token from being reused: blacklisting is an insert on
+BlacklistedToken's unique token_id, and losing that race rejects the
+refresh.
+"""
+import atexit
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings, sized for `capacity` items at
+    `error_rate` false positives. Adds are serialized; lookups take no lock.
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def positions(self, key):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        with self.lock:
+            for position in self.positions(key):
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class BlacklistFilter:
+    """
+    Answers "might this jti be blacklisted?" without the database when it can.
+    """
+    def __init__(self, capacity, error_rate, sync_interval):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.last_id = 0
+        self.synced_at = 0.0
+
+    def rebuild(self):
+        """Reload the filter from the unexpired blacklist."""
+        with self.lock:
+            rows = list(
+                BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+                .values_list('pk', 'token__jti')
+            )
+            bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+            for pk, jti in rows:
+                bloom.add(jti)
+            self.last_id = max([self.last_id] + [pk for pk, _ in rows])
+            self.bloom = bloom
+            self.synced_at = time.monotonic()
+
+    def sync(self):
+        """Add blacklistings made by other processes since the last look."""
+        with self.lock:
+            rows = BlacklistedToken.objects.filter(pk__gt=self.last_id).values_list('pk', 'token__jti')
+            for pk, jti in rows:
+                self.bloom.add(jti)
+                self.last_id = max(self.last_id, pk)
+            self.synced_at = time.monotonic()
+
+    def might_contain(self, jti):
+        if self.bloom is None or self.bloom.count > self.bloom.capacity:
+            self.rebuild()
+        elif self.sync_interval and time.monotonic() - self.synced_at >= self.sync_interval:
+            self.sync()
+        return jti in self.bloom
+
+    def add(self, jti):
+        if self.bloom is not None:
+            self.bloom.add(jti)
+
+
+class OutstandingTokenBuffer:
+    """
+    Queue of OutstandingToken rows waiting for a bulk insert, keyed by jti.
+    """
+    def __init__(self, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.rows = {}
+        self.oldest = None
+        self.timer = None
+
+    def add(self, row):
+        with self.lock:
+            self.rows[row['jti']] = row
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            due = len(self.rows) >= self.batch_size or time.monotonic() - self.oldest >= self.flush_interval
+            if not due and self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush_in_background)
+                self.timer.daemon = True
+                self.timer.start()
+        if due:
+            self.flush()
+
+    def pop(self, jti):
+        with self.lock:
+            return self.rows.pop(jti, None)
+
+    def flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Could not write queued outstanding tokens')
+        finally:
+            connection.close()
+
+    def flush(self):
+        with self.lock:
+            rows, self.rows, self.oldest = list(self.rows.values()), {}, None
+            timer, self.timer = self.timer, None
+        if timer is not None:
+            timer.cancel()
+        if not rows:
+            return
+        tokens = [OutstandingToken(**row) for row in rows]
+        try:
+            OutstandingToken.objects.bulk_create(tokens, ignore_conflicts=True)
+        except IntegrityError:
+            # A user was deleted while their token waited; keep the row as SET_NULL would
+            user_ids = {token.user_id for token in tokens}
+            existing = set(get_user_model().objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+            for token in tokens:
+                if token.user_id not in existing:
+                    token.user_id = None
+            OutstandingToken.objects.bulk_create(tokens, ignore_conflicts=True)
+
+
+def prune_expired(chunk_size=1000, pause=0.0, now=None):
+    """
+    Delete outstanding tokens (and their blacklist rows) that expired before
+    `now`, `chunk_size` at a time so no statement locks much. Returns the
+    number of outstanding tokens removed.
+    """
+    now = now or timezone.now()
+    removed = 0
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lt=now)
+            .order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return removed
+        # Blacklist rows go with them (CASCADE); only() keeps the token text out of the collector
+        OutstandingToken.objects.filter(pk__in=ids).only('pk').delete()
+        removed += len(ids)
+        if len(ids) < chunk_size:
+            return removed
+        if pause:
+            time.sleep(pause)
+
+
+_filter = None
+_buffer = None
+_state_lock = threading.Lock()
+_pruned_at = time.monotonic()
+_pruning = False
+
+
+def get_filter():
+    global _filter
+    if _filter is None:
+        _filter = BlacklistFilter(
+            getattr(settings, 'TOKEN_BLACKLIST_FILTER_CAPACITY', 100000),
+            getattr(settings, 'TOKEN_BLACKLIST_FILTER_ERROR_RATE', 0.001),
+            getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 5),
+        )
+    return _filter
+
+
+def get_buffer():
+    global _buffer
+    with _state_lock:
+        if _buffer is None:
+            _buffer = OutstandingTokenBuffer(
+                getattr(settings, 'TOKEN_OUTSTANDING_BATCH_SIZE', 50),
+                getattr(settings, 'TOKEN_OUTSTANDING_FLUSH_INTERVAL', 5),
+            )
+            atexit.register(flush_at_exit)
+    return _buffer
+
+
+def flush_at_exit():
+    try:
+        _buffer.flush()
+    except Exception:
+        logger.exception('Could not write queued outstanding tokens at exit')
+
+
+def _prune_in_background():
+    global _pruning
+    try:
+        removed = prune_expired(getattr(settings, 'TOKEN_PRUNE_CHUNK_SIZE', 1000))
+        if removed:
+            logger.info('Pruned %d expired outstanding tokens', removed)
+    except Exception:
+        logger.exception('Pruning expired tokens failed')
+    finally:
+        connection.close()
+        _pruning = False
+
+
+def schedule_prune():
+    """Start a background prune if TOKEN_PRUNE_INTERVAL has passed since the last one."""
+    global _pruned_at, _pruning
+    interval = getattr(settings, 'TOKEN_PRUNE_INTERVAL', 3600)
+    if not interval:
+        return
+    with _state_lock:
+        if _pruning or time.monotonic() - _pruned_at < interval:
+            return
+        _pruning, _pruned_at = True, time.monotonic()
+    threading.Thread(target=_prune_in_background, name='token-prune', daemon=True).start()
@@ -0,0 +1,93 @@
+"""
+Denormalized counters: Post.comments_count, Comment.replies_count (direct
+replies), Category.posts_count and User.posts_count (published posts only).
+
+Signals call the `*_changed` helpers with F() increments so concurrent
+writers never lose an update. A post's old state is read from its locked
+row inside the save or delete, not from what the instance was loaded
+with, so two saves publishing the same draft count it once. `reconcile`
+recomputes everything from the source tables to repair drift left by
+bulk operations.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Category, Comment, Post, User
+
+POST_COUNTER_FIELDS = ('status', 'category_id', 'author_id')
+
+
+def _bump(model, pk, field, delta):
+    if pk is None or not delta:
+        return
+    model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def published_key(state):
+    """Return (category_id, author_id) for a published post state, else None."""
+    if not state or state.get('status') != 'published':
+        return None
+    return state.get('category_id'), state.get('author_id')
+
+
+def post_state(post):
+    return {field: getattr(post, field) for field in POST_COUNTER_FIELDS}
+
+
+def locked_post_state(post):
+    """
+    The counter-relevant state of `post` as stored in the database, or None
+    for a new post. The row stays locked until the caller's transaction
+    ends, so concurrent saves of one post move its counts one at a time.
+    """
+    if post._state.adding:
+        return None
+    return Post.objects.select_for_update().filter(pk=post.pk).values(*POST_COUNTER_FIELDS).first()
+
+
+def post_changed(old_state, new_state):
+    """Move published-post counts from the old (category, author) to the new one."""
+    old = published_key(old_state) or (None, None)
+    new = published_key(new_state) or (None, None)
+    for model, field_index in ((Category, 0), (User, 1)):
+        if old[field_index] != new[field_index]:
+            _bump(model, old[field_index], 'posts_count', -1)
+            _bump(model, new[field_index], 'posts_count', 1)
+
+
+def comment_changed(post_id, delta):
+    _bump(Post, post_id, 'comments_count', delta)
+
+
+def reply_changed(parent_id, delta):
+    _bump(Comment, parent_id, 'replies_count', delta)
+
+
+def _drift(queryset, field, actual):
+    drifted = queryset.annotate(actual=Coalesce(actual, 0)).exclude(**{field: F('actual')})
+    fixed = 0
+    for pk, value in drifted.values_list('pk', 'actual').iterator():
+        queryset.model.objects.filter(pk=pk).update(**{field: value})
+        fixed += 1
+    return fixed
+
+
+def reconcile():
+    """
+    Recompute every counter from the source tables.
+    Returns a mapping of counter name to number of rows corrected.
+    """
+    def count_of(queryset, key):
+        return Subquery(
+            queryset.filter(**{key: OuterRef('pk')}).order_by()
+            .values(key).annotate(n=Count('pk')).values('n')
+        )
+
+    published = Post.objects.filter(status='published')
+    return {
+        'post.comments_count': _drift(Post.objects.all(), 'comments_count', count_of(Comment.objects.all(), 'post')),
+        'comment.replies_count': _drift(
+            Comment.objects.all(), 'replies_count', count_of(Comment.objects.all(), 'parent')
+        ),
+        'category.posts_count': _drift(Category.objects.all(), 'posts_count', count_of(published, 'category')),
+        'user.posts_count': _drift(User.objects.all(), 'posts_count', count_of(published, 'author')),
+    }
@@ -0,0 +1,65 @@
+"""
+Streaming NDJSON export of posts.
+
+Rows are read in `(updated_at, id)` keyset order, one bounded chunk query
+at a time, and written out as they are serialized, so memory stays flat
+however large the archive is. The last line's `updated_at` is a valid
+`updated_since` for the next incremental export.
+
+Under ASGI, Django reads a sync iterator whole before sending any of it,
+so the lines are handed over through `aiter_lines()` there instead.
+"""
+import itertools
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Q
+from .renderers import FastJSONRenderer
+
+EXPORT_CHUNK_SIZE = 500
+
+
+def _key(row):
+    if isinstance(row, dict):
+        return row['updated_at'], row['id']
+    return row.updated_at, row.pk
+
+
+def iter_keyset(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield every row of `queryset` ordered by `(updated_at, id)`."""
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            chunk = chunk.filter(Q(updated_at__gt=last[0]) | Q(updated_at=last[0], id__gt=last[1]))
+        count = 0
+        for row in chunk.order_by('updated_at', 'id')[:chunk_size].iterator(chunk_size=chunk_size):
+            yield row
+            last = _key(row)
+            count += 1
+        if count < chunk_size:
+            return
+
+
+def iter_ndjson(rows, to_representation):
+    renderer = FastJSONRenderer()
+    for row in rows:
+        yield renderer.render(to_representation(row)) + b'\n'
+
+
+def served_async(request):
+    """Whether `request` (a Django or DRF request) came in through ASGI."""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+async def aiter_lines(lines, batch_size=EXPORT_CHUNK_SIZE):
+    """
+    `lines` as an async iterator of byte chunks. Batches are taken from
+    the sync iterator in Django's sync thread, where its queries belong.
+    """
+    next_batch = sync_to_async(lambda: list(itertools.islice(lines, batch_size)))
+    while True:
+        batch = await next_batch()
+        if not batch:
+            return
+        yield b''.join(batch)
@@ -0,0 +1,219 @@
+"""
+Materialized home feed.
+
+`/api/v1/feed/home/` returns everything the home page shows in one
+response: the hero post, the FEED_LATEST_COUNT latest published posts, the
+FEED_HIGHLIGHT_COUNT newest posts of each category, and the category list.
+The payload is kept already serialized in one `FeedSnapshot` row, so a
+home page view is a single primary-key read, or no query at all when the
+response cache has it.
+
+The snapshot is built on first read. After that it is patched from the
+model signals. When a post is published, edited, moved, unpublished or
+deleted, `post_changed` rebuilds only the sections the post was or now
+belongs in, each from one index range. Author edits are copied into the
+posts that embed them, and category edits rebuild the whole snapshot.
+Code that writes rows without signals (the synthetic data generator,
+`reconcile_counters`) calls `rebuild()`.
+
+Builds and patches all hold the snapshot row's lock. A row that doesn't
+exist yet is created empty (not built) first, so a write that lands
+while a reader builds either waits for the build and patches it, or
+leaves the empty row for the reader to build after it.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .counters import published_key
+from .models import Category, FeedSnapshot, Post
+from .response_cache import invalidate_tags
+from .serializers.categories import CategorySerializer
+from .serializers.compiled import get_compiled_serializer
+from .serializers.posts import PostListSerializer, UserSerializer
+
+HOME = 'home'
+FEED_TAG = 'feed'
+
+
+def get_latest_count():
+    return getattr(settings, 'FEED_LATEST_COUNT', 12)
+
+
+def get_highlight_count():
+    return getattr(settings, 'FEED_HIGHLIGHT_COUNT', 3)
+
+
+def serialize_posts(queryset):
+    """PostListSerializer output for `queryset`, compiled when allowed."""
+    serializer = PostListSerializer(many=True)
+    compiled = get_compiled_serializer(serializer.child)
+    if compiled is None:
+        return PostListSerializer(queryset, many=True).data
+    rows, annotations = compiled.values(queryset)
+    return compiled.serialize(rows, annotations)
+
+
+def published_posts():
+    return Post.objects.filter(status='published').select_related('author', 'category')
+
+
+def build_latest():
+    return serialize_posts(published_posts().order_by('-created_at', '-id')[:get_latest_count()])
+
+
+def build_highlights(category):
+    # Newest first along the (category, status, -created_at) index
+    posts = published_posts().filter(category_id=category['id']).order_by('-created_at')[:get_highlight_count()]
+    return {'category': category['slug'], 'posts': serialize_posts(posts)}
+
+
+def build_categories():
+    return CategorySerializer(Category.objects.all(), many=True).data
+
+
+def pick_hero(latest):
+    """The newest post with an image, else the newest post."""
+    return next((post for post in latest if post.get('image')), latest[0] if latest else None)
+
+
+def build():
+    categories = build_categories()
+    latest = build_latest()
+    highlights = (build_highlights(category) for category in categories)
+    return {
+        'hero': pick_hero(latest),
+        'latest': latest,
+        'highlights': [entry for entry in highlights if entry['posts']],
+        'categories': categories,
+    }
+
+
+def _lock():
+    """The snapshot row, locked for the current transaction; created empty when missing."""
+    snapshot, _ = FeedSnapshot.objects.select_for_update().get_or_create(key=HOME, defaults={'data': {}})
+    return snapshot
+
+
+def rebuild(missing_only=False):
+    """
+    Recompute and store the whole home snapshot; returns its payload.
+    With `missing_only`, a snapshot another caller built meanwhile is
+    returned as it is.
+    """
+    with transaction.atomic():
+        snapshot = _lock()
+        if not (missing_only and snapshot.data):
+            snapshot.data = build()
+            snapshot.save()
+            invalidate_tags({FEED_TAG})
+    return snapshot.data
+
+
+def get_home():
+    data = FeedSnapshot.objects.filter(key=HOME).values_list('data', flat=True).first()
+    return data or rebuild(missing_only=True)
+
+
+def _holds(posts, pk):
+    return any(post['id'] == pk for post in posts)
+
+
+def _admits(posts, limit, created_at):
+    """Whether a post created at `created_at` belongs among `limit` newest `posts`."""
+    return len(posts) < limit or created_at >= parse_datetime(posts[-1]['created_at'])
+
+
+def _patch(data, latest, categories, refresh_category):
+    """
+    Rebuild the latest section (when `latest`), the category list (when
+    `categories`) and the highlights for which `refresh_category(category,
+    posts)` is true, in place. Returns whether anything was rebuilt.
+    """
+    if latest:
+        data['latest'] = build_latest()
+        data['hero'] = pick_hero(data['latest'])
+    if categories:
+        data['categories'] = build_categories()
+    changed = latest or categories
+
+    highlights = {entry['category']: entry for entry in data['highlights']}
+    for category in data['categories']:
+        if refresh_category(category, highlights.get(category['slug'], {}).get('posts', [])):
+            highlights[category['slug']] = build_highlights(category)
+            changed = True
+    data['highlights'] = [
+        highlights[category['slug']] for category in data['categories']
+        if highlights.get(category['slug'], {}).get('posts')
+    ]
+    return changed
+
+
+def _update(patch):
+    """Run `patch(data)` on the locked snapshot and store it if it changed."""
+    with transaction.atomic():
+        snapshot = _lock()
+        if not snapshot.data:
+            # Built by the next read
+            return
+        if patch(snapshot.data):
+            snapshot.save()
+            invalidate_tags({FEED_TAG})
+
+
+def post_changed(post, old_state, new_state):
+    """
+    Patch the home snapshot after `post` was saved or deleted. The states
+    are `counters.post_state()` before and after (None when absent).
+    """
+    was, now = published_key(old_state), published_key(new_state)
+    if was is None and now is None:
+        return
+
+    def refresh_category(category, posts):
+        if was and was[0] == category['id'] and _holds(posts, post.pk):
+            return True
+        return bool(now) and now[0] == category['id'] and _admits(posts, get_highlight_count(), post.created_at)
+
+    def patch(data):
+        latest = _holds(data['latest'], post.pk) or (
+            bool(now) and _admits(data['latest'], get_latest_count(), post.created_at)
+        )
+        # Published-post counts move when publication or category changes
+        return _patch(data, latest, was != now, refresh_category)
+
+    _update(patch)
+
+
+def categories_changed():
+    """Category names and slugs are embedded throughout: start over."""
+    def patch(data):
+        data.update(build())
+        return True
+
+    _update(patch)
+
+
+def _posts(data):
+    yield from filter(None, [data['hero']])
+    yield from data['latest']
+    for entry in data['highlights']:
+        yield from entry['posts']
+
+
+def author_changed(user):
+    """Bring the embedded author data of `user`'s posts up to date."""
+    author = UserSerializer(user).data
+
+    def stale(data):
+        return [post for post in _posts(data) if post['author']['id'] == user.pk and post['author'] != author]
+
+    def patch(data):
+        posts = stale(data)
+        for post in posts:
+            post['author'] = dict(author)
+        return bool(posts)
+
+    data = FeedSnapshot.objects.filter(key=HOME).values_list('data', flat=True).first()
+    if data and stale(data):
+        _update(patch)
@@ -0,0 +1,113 @@
+"""
+Sparse fieldsets (`?fields=` / `?exclude=`) and queryset projections.
+
+`SparseFieldsetMixin` trims a serializer's top-level fields from the
+request's query parameters. `ProjectionMixin` then walks the trimmed
+serializer, including nested serializers, and pushes the columns it
+actually reads into the queryset with `.only()`, keeping only the
+`select_related` joins that are still needed. List requests stop reading
+`content` and unused author/category columns.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import permissions, serializers
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def parse_field_list(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin limiting output to `?fields=a,b` or dropping
+    `?exclude=c,d`. Only top-level fields are affected; a nested object is
+    kept or dropped as a whole. Unknown names are ignored.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        params = request.query_params
+        only = parse_field_list(params.get(FIELDS_PARAM))
+        exclude = set(parse_field_list(params.get(EXCLUDE_PARAM)))
+        if only:
+            for name in set(self.fields) - set(only):
+                self.fields.pop(name)
+        for name in exclude & set(self.fields):
+            self.fields.pop(name)
+
+
+def serializer_projection(serializer, prefix=''):
+    """
+    Return `(paths, relations)`: the model field paths `serializer` reads,
+    and the relations it traverses. Returns None when the serializer reads
+    something that can't be expressed as columns (e.g. `source='*'`).
+
+    SerializerMethodFields must be declared in the serializer's
+    `projection_fields` mapping of field name to the model fields it uses.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = serializer.Meta.model
+    projection_fields = getattr(serializer, 'projection_fields', {})
+    paths, relations = set(), set()
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            if name not in projection_fields:
+                return None
+            sources = projection_fields[name]
+        elif field.source == '*' or '.' in field.source:
+            return None
+        else:
+            sources = [field.source]
+
+        for source in sources:
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete:
+                return None
+            if isinstance(field, serializers.BaseSerializer):
+                nested = serializer_projection(field, f'{prefix}{source}__')
+                if nested is None:
+                    return None
+                paths.add(f'{prefix}{source}')
+                paths |= nested[0]
+                relations.add(f'{prefix}{source}')
+                relations |= nested[1]
+            else:
+                paths.add(f'{prefix}{source}')
+    return paths, relations
+
+
+class ProjectionMixin:
+    """
+    View mixin applying the serializer's projection to read querysets.
+    `projection_required` lists columns the view itself relies on
+    (lookups, ordering, pagination keys).
+    """
+    projection_actions = ('list', 'retrieve')
+    projection_required = ('id', 'created_at')
+
+    def get_queryset(self):
+        return self.project(super().get_queryset())
+
+    def project(self, queryset):
+        if self.action not in self.projection_actions or self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+        projection = serializer_projection(self.get_serializer())
+        if projection is None:
+            return queryset
+        paths, relations = projection
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*paths, *self.projection_required)
@@ -0,0 +1,22 @@
+from rest_framework import filters
+from .search import get_search_backend
+
+
+class PostSearchFilter(filters.SearchFilter):
+    """
+    Search filter backed by the full-text index in `blog_api.search`.
+    Keeps the `?search=` query parameter of DRF's SearchFilter, but matches
+    against the inverted index and orders results by relevance unless the
+    client asked for an explicit `?ordering=`.
+    """
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+
+        queryset = get_search_backend().search(queryset, query)
+
+        ordering_param = getattr(filters.OrderingFilter, 'ordering_param', 'ordering')
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(ordering_param):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
@@ -0,0 +1,227 @@
+"""
+Uploaded post images and their resized derivatives.
+
+An upload is stored once per content: its SHA-256 digest names a
+`PostImage` row and the directory `MEDIA_ROOT/images/<aa>/<digest>/`
+holding the original and the derivatives, so uploading the same file again
+reuses everything. Derivatives are WebP and JPEG copies at each of
+IMAGE_WIDTHS narrower than the original (and the original's own width when
+it is narrower than the widest), with metadata stripped and EXIF rotation
+applied. `srcset()` lists their URLs under MEDIA_URL. Uploads larger than
+IMAGE_MAX_PIXELS are refused before anything is decoded, and JPEG
+originals are decoded at the smallest scale (1/2, 1/4, 1/8) still wider
+than the widest derivative being made.
+
+Derivatives are made off the request path: once an upload commits,
+`schedule()` hands it to a small thread pool. They are files on disk
+and nothing else, so a missing one (not made yet, cleaned up, or a width
+added to IMAGE_WIDTHS) is made on the first request for it by
+`views.images.serve_image`. A front server can serve MEDIA_ROOT/images
+directly and fall back to that view. Names are content-addressed, so the
+files can be cached forever.
+"""
+import hashlib
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from PIL import ExifTags, Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+IMAGES_DIR = 'images'
+ORIGINAL_NAME = 'original'
+# srcset key: (file extension, Pillow format)
+FORMATS = {'webp': ('webp', 'WEBP'), 'jpeg': ('jpg', 'JPEG')}
+EXTENSIONS = {extension: name for name, (extension, _) in FORMATS.items()}
+DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+DERIVATIVE_RE = re.compile(r'^(?P<width>[1-9][0-9]{0,4})\.(?P<extension>[a-z]+)$')
+CHUNK_SIZE = 64 * 1024
+LOCK_STRIPES = 64
+
+
+def get_widths():
+    return tuple(sorted(getattr(settings, 'IMAGE_WIDTHS', (400, 800, 1200, 1920))))
+
+
+def get_max_pixels():
+    return getattr(settings, 'IMAGE_MAX_PIXELS', 40_000_000)
+
+
+def get_quality():
+    return getattr(settings, 'IMAGE_QUALITY', 80)
+
+
+def derivative_widths(width):
+    """Derivative widths of an image `width` pixels wide; never wider than it."""
+    widths = get_widths()
+    widest = min(width, widths[-1])
+    return [w for w in widths if w < widest] + [widest]
+
+
+def image_dir(digest):
+    return Path(settings.MEDIA_ROOT) / IMAGES_DIR / digest[:2] / digest
+
+
+def derivative_path(digest, width, format_name):
+    return image_dir(digest) / f'{width}.{FORMATS[format_name][0]}'
+
+
+def derivative_url(digest, width, format_name):
+    return f'{settings.MEDIA_URL}{IMAGES_DIR}/{digest[:2]}/{digest}/{width}.{FORMATS[format_name][0]}'
+
+
+def default_url(digest, width):
+    """The `Post.image` URL of an uploaded image: its widest JPEG."""
+    return derivative_url(digest, derivative_widths(width)[-1], 'jpeg')
+
+
+def srcset(digest, width):
+    """{format: srcset attribute value} for an image, or None without one."""
+    if not digest or not width:
+        return None
+    widths = derivative_widths(width)
+    return {
+        format_name: ', '.join(f'{derivative_url(digest, w, format_name)} {w}w' for w in widths)
+        for format_name in FORMATS
+    }
+
+
+def _write_atomic(path, write):
+    """Create `path` through a temporary file, so readers never see it half written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            write(file)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def digest_file(file):
+    """SHA-256 hex digest of an uploaded file's content."""
+    sha = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+        sha.update(chunk)
+    file.seek(0)
+    return sha.hexdigest()
+
+
+def save_original(file, digest):
+    """Store an upload as the original of `digest`; returns its (width, height, format)."""
+    with Image.open(file) as image:
+        image_format = image.format
+        width, height = image.size
+        # Width and height as displayed
+        if _rotated(image):
+            width, height = height, width
+    file.seek(0)
+    path = image_dir(digest) / ORIGINAL_NAME
+    if not path.exists():
+        _write_atomic(path, lambda out: out.writelines(iter(lambda: file.read(CHUNK_SIZE), b'')))
+    return width, height, image_format
+
+
+def _rotated(image):
+    """Whether `image` is displayed turned a quarter (its EXIF orientation)."""
+    return image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8)
+
+
+def _open_original(digest, width=None):
+    """
+    The original of `digest` as displayed. Given the widest `width` needed,
+    a JPEG is decoded at the smallest scale at least that wide.
+    """
+    with Image.open(image_dir(digest) / ORIGINAL_NAME) as image:
+        image.seek(0)  # First frame of animations
+        if width:
+            stored_width, stored_height = image.size
+            scale = width / (stored_height if _rotated(image) else stored_width)
+            image.draft(None, (math.ceil(stored_width * scale), math.ceil(stored_height * scale)))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+        return image
+
+
+def _encode(image, format_name):
+    pillow_format = FORMATS[format_name][1]
+    if pillow_format == 'JPEG':
+        if image.mode in ('RGBA', 'LA', 'P'):
+            rgba = image.convert('RGBA')
+            image = Image.new('RGB', rgba.size, 'white')
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+        return lambda out: image.save(out, pillow_format, quality=get_quality(), optimize=True, progressive=True)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or image.mode == 'P' else 'RGB')
+    return lambda out: image.save(out, pillow_format, quality=get_quality(), method=4)
+
+
+def _resize(image, width):
+    if image.width == width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def make_derivatives(digest, width, only=None):
+    """
+    Write the missing derivatives of `digest` (an image `width` pixels
+    wide), or just `only` = (width, format). Returns how many were written.
+    """
+    wanted = [only] if only else [(w, name) for w in derivative_widths(width) for name in FORMATS]
+    missing = [(w, name) for w, name in wanted if not derivative_path(digest, w, name).exists()]
+    if not missing:
+        return 0
+    with _lock_for(digest):
+        missing = [(w, name) for w, name in missing if not derivative_path(digest, w, name).exists()]
+        if not missing:
+            return 0
+        source = _open_original(digest, max(w for w, _ in missing))
+        # Widest first, each resized from the one before: fewer pixels to resample
+        for w in sorted({w for w, _ in missing}, reverse=True):
+            source = _resize(source, min(w, source.width))
+            for name in (name for missing_width, name in missing if missing_width == w):
+                _write_atomic(derivative_path(digest, w, name), _encode(source, name))
+    return len(missing)
+
+
+_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+_executor = None
+_state_lock = threading.Lock()
+
+
+def _lock_for(digest):
+    """One image's derivatives are made by one thread at a time."""
+    return _locks[int(digest[:8], 16) % LOCK_STRIPES]
+
+
+def get_executor():
+    global _executor
+    with _state_lock:
+        if _executor is None:
+            workers = getattr(settings, 'IMAGE_WORKERS', 2)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='images')
+    return _executor
+
+
+def _make_in_background(digest, width):
+    try:
+        make_derivatives(digest, width)
+    except Exception:
+        logger.exception('Could not make the derivatives of image %s', digest)
+
+
+def schedule(digest, width):
+    """Make the derivatives of an image in the background."""
+    get_executor().submit(_make_in_background, digest, width)
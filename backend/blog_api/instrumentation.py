@@ -0,0 +1,306 @@
+"""
+Per-request timing instrumentation.
+
+`RequestTimingMiddleware` samples a fraction of requests
+(REQUEST_TIMING_SAMPLE_RATE) and, for those, records:
+
+    - db:        SQL query count and time, from a database execute wrapper
+    - serialize: time spent in serializers outside SQL: the `.data` of
+                 the views' DRF serializers (`serialized()`, and
+                 `SerializationTimingMixin` for the generic actions) and
+                 the compiled serializers of blog_api.serializers.compiled
+    - view:      the rest of the view outside SQL: authentication,
+                 permissions, throttling, filtering and pagination
+    - render:    time spent rendering the response (plus the response
+                 cache store that runs as a post-render callback)
+    - total:     everything below this middleware
+
+Every sampled request gets one JSON log line on the `blog_api.timing`
+logger. The `Server-Timing` header tells clients how the server spends its
+time, so it is only sent with DEBUG on or to staff users. Unsampled
+requests pay for one random() call.
+
+For streaming responses the headers are sent before the body, so work done
+while the body is consumed (e.g. keyset export queries) is not included.
+
+The middleware runs natively under both WSGI and ASGI. The sampled
+request's metrics sit in a context variable, which sync_to_async carries
+into the threads where async ORM calls run (thread pools working for the
+request, like blog_api.batch's, run their tasks in a copy of the context
+to the same end); every connection gets one execute wrapper (on creation)
+that records into it.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger('blog_api.timing')
+
+
+_current = ContextVar('request_metrics', default=None)
+# Set while serialization is timed, so nested blocks aren't timed twice
+_serializing = ContextVar('serializing', default=False)
+
+
+def get_sample_rate():
+    return getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0.0)
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper feeding the current request's metrics, if sampled."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+def install_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_wrapper, dispatch_uid='blog_api.instrumentation')
+
+
+@contextmanager
+def serializing():
+    """Count the time spent in the block (outside SQL) as serialization."""
+    metrics = _current.get()
+    if metrics is None or _serializing.get():
+        yield
+        return
+    token = _serializing.set(True)
+    start, sql_start = time.perf_counter(), metrics.sql_ms
+    try:
+        yield
+    finally:
+        _serializing.reset(token)
+        elapsed = (time.perf_counter() - start) * 1000
+        metrics.add_serialize(elapsed - (metrics.sql_ms - sql_start))
+
+
+def serialized(serializer):
+    """Return `serializer.data`, counted as serialization."""
+    with serializing():
+        return serializer.data
+
+
+class SerializationTimingMixin:
+    """
+    View mixin counting the serializer `.data` behind the list, retrieve,
+    create and update responses as serialization. Otherwise the same as
+    DRF's model mixins.
+    """
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialized(self.get_serializer(page, many=True)))
+        return Response(serialized(self.get_serializer(queryset, many=True)))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(serialized(self.get_serializer(self.get_object())))
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        data = serialized(serializer)
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        if getattr(instance, '_prefetched_objects_cache', None):
+            # Don't serialize the prefetches from before the update
+            instance._prefetched_objects_cache = {}
+        return Response(serialized(serializer))
+
+
+class RequestMetrics:
+    """
+    Timings collected for one request, in milliseconds.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.serialize_ms = 0.0
+        self.view_started = None
+        self.view_sql_ms = 0.0
+        self.view_serialize_ms = 0.0
+        self.view_ms = None
+        self.render_started = None
+        self.render_ms = None
+        self.total_ms = None
+        # Batched sub-requests record from several threads
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper counting and timing every query."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self.lock:
+                self.sql_count += 1
+                self.sql_ms += elapsed
+
+    def add_serialize(self, ms):
+        with self.lock:
+            self.serialize_ms += max(0.0, ms)
+
+    def start_view(self):
+        self.view_started = time.perf_counter()
+        self.view_sql_ms = self.sql_ms
+        self.view_serialize_ms = self.serialize_ms
+
+    def finish_view(self):
+        if self.view_started is None:
+            return
+        now = time.perf_counter()
+        elapsed = (now - self.view_started) * 1000
+        spent = (self.sql_ms - self.view_sql_ms) + (self.serialize_ms - self.view_serialize_ms)
+        self.view_ms = max(0.0, elapsed - spent)
+        self.render_started = now
+
+    def finish_render(self):
+        if self.render_started is not None:
+            self.render_ms = (time.perf_counter() - self.render_started) * 1000
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        entries = [f'db;dur={self.sql_ms:.2f};desc="{self.sql_count} queries"']
+        if self.view_ms is not None:
+            entries.append(f'view;dur={self.view_ms:.2f}')
+        entries.append(f'serialize;dur={self.serialize_ms:.2f}')
+        if self.render_ms is not None:
+            entries.append(f'render;dur={self.render_ms:.2f}')
+        entries.append(f'total;dur={self.total_ms:.2f}')
+        return ', '.join(entries)
+
+    def as_dict(self):
+        return {
+            'sql_count': self.sql_count,
+            'sql_ms': round(self.sql_ms, 2),
+            'view_ms': None if self.view_ms is None else round(self.view_ms, 2),
+            'serialize_ms': round(self.serialize_ms, 2),
+            'render_ms': None if self.render_ms is None else round(self.render_ms, 2),
+            'total_ms': round(self.total_ms, 2),
+        }
+
+
+def exposes_timing(request):
+    """Whether the caller may see Server-Timing: DEBUG, or a staff user."""
+    if settings.DEBUG:
+        return True
+    # DRF sets the user it authenticated on the Django request too
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+class RequestTimingMiddleware:
+    """
+    Adds Server-Timing headers and a structured log line to sampled
+    requests. Place it first in MIDDLEWARE so `total` covers the whole
+    stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        for connection in connections.all(initialized_only=True):
+            install_wrapper(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Coroutine hooks, or Django would run them in a worker thread
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = self.sample(request)
+        if metrics is None:
+            return self.get_response(request)
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.sample(request)
+        if metrics is None:
+            return await self.get_response(request)
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def sample(self, request):
+        rate = get_sample_rate()
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return None
+        metrics = request._timing = RequestMetrics()
+        return metrics
+
+    def finish(self, request, response, metrics):
+        if metrics.view_ms is None:
+            # Plain and streaming responses skip process_template_response
+            metrics.finish_view()
+        metrics.finish()
+
+        if exposes_timing(request):
+            response['Server-Timing'] = metrics.server_timing()
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'streaming': response.streaming,
+            **metrics.as_dict(),
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, '_timing', None)
+        if metrics is not None:
+            metrics.start_view()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook, so the view is done here
+        metrics = getattr(request, '_timing', None)
+        if metrics is not None:
+            metrics.finish_view()
+            response.add_post_render_callback(lambda rendered: metrics.finish_render())
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return self.__class__.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_template_response(self, request, response):
+        return self.__class__.process_template_response(self, request, response)
@@ -0,0 +1,312 @@
+"""
+Live comment events for the Server-Sent Events stream.
+
+Comment saves and deletes are published (after commit) as
+`comment.created`, `comment.updated` and `comment.deleted` events. Each
+process keeps a `BroadcastHub` with the last LIVE_EVENTS_HISTORY events of
+recently active posts, which is what lets clients resume from
+`Last-Event-ID`.
+
+Events are only serialized and published for posts someone has been
+listening to within LIVE_EVENTS_RESUME_GRACE seconds. A post whose events
+may have been skipped that way drops its history when it gets a subscriber
+again, so a resuming client is told to `reset` rather than missing them.
+
+Idle subscribers hold no queue of their own: all subscribers of a post
+on an event loop await one shared future, which `deliver()` resolves
+(thread-safely, since writes happen in sync code) when something new
+arrives. They then read what they missed from the history ring.
+
+How events reach the hubs is pluggable through LIVE_EVENTS_BACKEND:
+
+    - LocalBroadcastBackend: straight into this process's hub (one worker)
+    - RedisBroadcastBackend: XADD to a Redis stream; one relay thread per
+      process XREADs it into the local hub, so every worker sees every
+      event under the same ids; which posts have subscribers is shared
+      through expiring Redis keys
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .serializers.comments import CommentSerializer
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple('Event', 'id post_id type data')
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class BroadcastHub:
+    """
+    Per-process event history and wake-ups, keyed by post id.
+    """
+    def __init__(self, history=200, max_posts=1000, grace=30):
+        self.history = history
+        self.max_posts = max_posts
+        self.grace = grace
+        self.lock = threading.Lock()
+        self.events = OrderedDict()  # post_id -> deque of Event, least recently active first
+        self.waiters = {}  # post_id -> {loop: future}
+        self.subscribers = {}  # post_id -> number of open streams
+        self.idle = OrderedDict()  # post_id -> when its last stream closed, oldest first
+
+    def _active(self, post_id):
+        if post_id in self.subscribers:
+            return True
+        closed = self.idle.get(post_id)
+        return closed is not None and time.monotonic() - closed < self.grace
+
+    def active(self, post_id):
+        """Whether the post has a stream open, or had one within `grace` seconds."""
+        with self.lock:
+            return self._active(post_id)
+
+    def active_posts(self):
+        with self.lock:
+            return list(self.subscribers)
+
+    def subscribe(self, post_id):
+        with self.lock:
+            if not self._active(post_id):
+                # Events may have been skipped since; resuming must reset
+                self.events.pop(post_id, None)
+            self.subscribers[post_id] = self.subscribers.get(post_id, 0) + 1
+            self.idle.pop(post_id, None)
+
+    def unsubscribe(self, post_id):
+        now = time.monotonic()
+        with self.lock:
+            self.subscribers[post_id] -= 1
+            if not self.subscribers[post_id]:
+                del self.subscribers[post_id]
+                self.idle[post_id] = now
+            while self.idle and next(iter(self.idle.values())) < now - self.grace:
+                self.idle.popitem(last=False)
+
+    def deliver(self, event):
+        """Record `event` and wake the post's subscribers. Thread-safe."""
+        with self.lock:
+            ring = self.events.pop(event.post_id, None) or deque(maxlen=self.history)
+            ring.append(event)
+            self.events[event.post_id] = ring
+            while len(self.events) > self.max_posts:
+                self.events.popitem(last=False)
+            waiters = self.waiters.pop(event.post_id, {})
+        for loop, future in waiters.items():
+            loop.call_soon_threadsafe(_wake, future)
+
+    def latest_id(self, post_id):
+        with self.lock:
+            ring = self.events.get(post_id)
+            return ring[-1].id if ring else None
+
+    def since(self, post_id, last_id):
+        """
+        Return `(events, complete)`: the post's events after `last_id`, and
+        False when `last_id` is no longer in the history (the caller missed
+        an unknown number of events).
+        """
+        with self.lock:
+            ring = list(self.events.get(post_id, ()))
+        if last_id is None:
+            return ring, True
+        for index in range(len(ring) - 1, -1, -1):
+            if ring[index].id == last_id:
+                return ring[index + 1:], True
+        return [], False
+
+    async def wait(self, post_id, last_id):
+        """Return once the post has an event newer than `last_id`."""
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            ring = self.events.get(post_id)
+            if ring and ring[-1].id != last_id:
+                return
+            post_waiters = self.waiters.setdefault(post_id, {})
+            future = post_waiters.get(loop)
+            if future is None or future.done():
+                future = post_waiters[loop] = loop.create_future()
+        # Shared by every subscriber of the post; a timed-out one mustn't cancel it
+        await asyncio.shield(future)
+
+
+class BaseBroadcastBackend:
+    """
+    Publishes events to every process's hub.
+    """
+    def __init__(self, hub):
+        self.hub = hub
+
+    def start(self):
+        """Begin receiving events (called before the first subscription)."""
+
+    def subscribe(self, post_id):
+        self.hub.subscribe(post_id)
+
+    def unsubscribe(self, post_id):
+        self.hub.unsubscribe(post_id)
+
+    def has_subscribers(self, post_id):
+        """Whether events for the post need publishing at all."""
+        return self.hub.active(post_id)
+
+    def publish(self, post_id, event_type, data):
+        raise NotImplementedError
+
+
+class LocalBroadcastBackend(BaseBroadcastBackend):
+    """
+    Single-process delivery; ids are a per-process counter.
+    """
+    def __init__(self, hub):
+        super().__init__(hub)
+        self.counter = itertools.count(1)
+
+    def publish(self, post_id, event_type, data):
+        self.hub.deliver(Event(str(next(self.counter)), post_id, event_type, data))
+
+
+class RedisBroadcastBackend(BaseBroadcastBackend):
+    """
+    Multi-process delivery through a capped Redis stream; ids are the
+    stream entry ids. Needs the `redis` package and LIVE_EVENTS_REDIS_URL.
+    """
+    block_ms = 5000
+
+    def __init__(self, hub):
+        super().__init__(hub)
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('RedisBroadcastBackend requires the redis package')
+        url = getattr(settings, 'LIVE_EVENTS_REDIS_URL', '')
+        if not url:
+            raise ImproperlyConfigured('RedisBroadcastBackend requires LIVE_EVENTS_REDIS_URL')
+        self.client = redis.Redis.from_url(url)
+        self.stream = getattr(settings, 'LIVE_EVENTS_REDIS_STREAM', 'blog:comment-events')
+        self.maxlen = getattr(settings, 'LIVE_EVENTS_REDIS_MAXLEN', 10000)
+        self.grace = hub.grace
+        self.started = False
+        self.start_lock = threading.Lock()
+
+    def start(self):
+        with self.start_lock:
+            if not self.started:
+                threading.Thread(target=self.relay, name='live-events-relay', daemon=True).start()
+                self.started = True
+
+    def subscriber_key(self, post_id):
+        return f'{self.stream}:subscribed:{post_id}'
+
+    def subscribe(self, post_id):
+        super().subscribe(post_id)
+        self.client.set(self.subscriber_key(post_id), 1, ex=self.grace)
+
+    def unsubscribe(self, post_id):
+        super().unsubscribe(post_id)
+        # Keep publishing for a grace period in case the client reconnects
+        self.client.set(self.subscriber_key(post_id), 1, ex=self.grace)
+
+    def has_subscribers(self, post_id):
+        return bool(self.client.exists(self.subscriber_key(post_id)))
+
+    def advertise(self):
+        """Refresh the keys of the posts this process has streams open for."""
+        pipe = self.client.pipeline(transaction=False)
+        for post_id in self.hub.active_posts():
+            pipe.set(self.subscriber_key(post_id), 1, ex=self.grace)
+        pipe.execute()
+
+    def publish(self, post_id, event_type, data):
+        self.client.xadd(
+            self.stream,
+            {'post': post_id, 'type': event_type, 'data': json.dumps(data, cls=DjangoJSONEncoder)},
+            maxlen=self.maxlen, approximate=True,
+        )
+
+    def relay(self):
+        last_id = '$'
+        advertised = 0
+        while True:
+            try:
+                if time.monotonic() - advertised >= self.block_ms / 1000:
+                    self.advertise()
+                    advertised = time.monotonic()
+                response = self.client.xread({self.stream: last_id}, block=self.block_ms, count=500)
+            except Exception:
+                logger.exception('Live events relay lost its Redis connection; retrying')
+                time.sleep(1)
+                continue
+            for _, entries in response or ():
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    self.hub.deliver(Event(
+                        entry_id.decode(), int(fields[b'post']),
+                        fields[b'type'].decode(), json.loads(fields[b'data']),
+                    ))
+
+
+_hub = None
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        _hub = BroadcastHub(
+            history=getattr(settings, 'LIVE_EVENTS_HISTORY', 200),
+            max_posts=getattr(settings, 'LIVE_EVENTS_MAX_POSTS', 1000),
+            grace=getattr(settings, 'LIVE_EVENTS_RESUME_GRACE', 30),
+        )
+    return _hub
+
+
+def get_backend():
+    """Return the configured broadcast backend (one per process)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            path = getattr(settings, 'LIVE_EVENTS_BACKEND', 'blog_api.live.LocalBroadcastBackend')
+            _backend = import_string(path)(get_hub())
+    return _backend
+
+
+def publish_comment_event(comment, event_type):
+    """
+    Publish `comment` once the current transaction commits, if anyone is
+    listening. A failing broadcast backend is logged, not raised: the write
+    itself has already been committed.
+    """
+    post_id = comment.post_id
+    deleted = None
+    if event_type == 'comment.deleted':
+        # The instance's pk is cleared once the delete finishes
+        deleted = {'id': comment.pk, 'post': post_id, 'parent': comment.parent_id}
+
+    def publish():
+        backend = get_backend()
+        if backend.has_subscribers(post_id):
+            backend.publish(post_id, event_type, deleted or CommentSerializer(comment).data)
+
+    transaction.on_commit(publish, robust=True)
+
+
+def format_event(event):
+    payload = json.dumps(event.data, cls=DjangoJSONEncoder)
+    return f'id: {event.id}\nevent: {event.type}\ndata: {payload}\n\n'
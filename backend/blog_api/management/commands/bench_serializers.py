@@ -0,0 +1,100 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from blog_api.fieldsets import serializer_projection
+from blog_api.models import Category, Comment, Post, User
+from blog_api.serializers.comments import CommentSerializer
+from blog_api.serializers.compiled import get_compiled_serializer
+from blog_api.serializers.posts import PostListSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks DRF vs compiled serialization for post and comment lists (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='18,100,1000', help='Comma-separated row counts')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per case')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['rows'].split(',')]
+        try:
+            with transaction.atomic():
+                posts, comments = self.create_rows(max(sizes))
+                self.stdout.write(f'{"case":<10} {"rows":>6} {"drf ms":>9} {"compiled ms":>12} {"speedup":>8}')
+                for size in sizes:
+                    self.bench('posts', PostListSerializer, posts, size, options['repeat'])
+                for size in sizes:
+                    self.bench('comments', CommentSerializer, comments, size, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_rows(self, count):
+        # bulk_create skips signals, so nothing outside these tables is touched
+        authors = User.objects.bulk_create([
+            User(username=f'bench_author_{i}', email=f'bench{i}@example.com',
+                 first_name='Bench' if i % 2 else '', last_name=f'Author{i}' if i % 3 else '',
+                 is_author=True)
+            for i in range(10)
+        ])
+        categories = Category.objects.bulk_create([
+            Category(name=f'Bench Category {i}', slug=f'bench-category-{i}') for i in range(5)
+        ])
+        Post.objects.bulk_create([
+            Post(title=f'Bench post {i}', title_key=f'bench post {i}', slug=f'bench-post-{i}', content='Lorem ipsum ' * 400,
+                 excerpt='Lorem ipsum dolor sit amet...', status='published',
+                 author=authors[i % len(authors)],
+                 category=categories[i % len(categories)] if i % 7 else None,
+                 image='https://example.com/image.jpg' if i % 2 else None)
+            for i in range(count)
+        ], batch_size=500)
+        comment_post = Post.objects.filter(slug='bench-post-0').get()
+        Comment.objects.bulk_create([
+            Comment(post=comment_post, author=authors[i % len(authors)], content=f'Bench comment {i}')
+            for i in range(count)
+        ], batch_size=500)
+        return (
+            Post.objects.filter(slug__startswith='bench-post-'),
+            Comment.objects.filter(post=comment_post),
+        )
+
+    def bench(self, label, serializer_class, queryset, size, repeat):
+        queryset = queryset.order_by('-created_at', '-id')
+
+        serializer = serializer_class(many=True)
+        paths, relations = serializer_projection(serializer)
+        projected = queryset.select_related(*relations).only(*paths, 'id', 'created_at')
+        compiled = get_compiled_serializer(serializer.child, ('id', 'created_at'))
+
+        def drf():
+            return serializer_class(list(projected[:size]), many=True).data
+
+        def fast():
+            rows, annotations = compiled.values(queryset)
+            return compiled.serialize(list(rows[:size]), annotations)
+
+        renderer = JSONRenderer()
+        if renderer.render(drf()) != renderer.render(fast()):
+            self.stderr.write(self.style.ERROR(f'{label}: compiled output differs at {size} rows'))
+            return
+
+        drf_ms = self.time(drf, repeat)
+        fast_ms = self.time(fast, repeat)
+        self.stdout.write(
+            f'{label:<10} {size:>6} {drf_ms:>9.2f} {fast_ms:>12.2f} {drf_ms / fast_ms:>7.1f}x'
+        )
+
+    def time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
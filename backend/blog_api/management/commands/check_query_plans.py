@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from blog_api.query_plans import check_plans, plan_lines
+
+
+class Command(BaseCommand):
+    help = ('EXPLAINs the queries issued by the read endpoints and fails when a plan scans '
+            'or sorts a large table instead of using an index')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Tables with fewer rows may be scanned and sorted')
+        parser.add_argument('--analyze', action='store_true',
+                            help='ANALYZE SQLite tables first, so plans use row statistics; '
+                                 'this writes the statistics into the database')
+
+    def handle(self, *args, **options):
+        results = check_plans(min_rows=options['min_rows'], analyze=options['analyze'])
+        if not results:
+            raise CommandError('No published posts to build requests from; run seed_data first')
+
+        failed = 0
+        for result in results:
+            if not result.problems and options['verbosity'] < 2:
+                continue
+            style = self.style.ERROR if result.problems else self.style.SUCCESS
+            self.stdout.write(style(f'{result.case.name}: {"; ".join(result.problems) or "ok"}'))
+            self.stdout.write(f'  {result.sql}')
+            for line in plan_lines(result.plan):
+                self.stdout.write(f'    {line}')
+            failed += bool(result.problems)
+
+        if failed:
+            raise CommandError(f'{failed} of {len(results)} query plans need an index')
+        self.stdout.write(self.style.SUCCESS(f'{len(results)} query plans checked, none scan or sort a large table'))
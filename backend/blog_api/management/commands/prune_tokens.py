@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from blog_api.blacklist import prune_expired
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired outstanding and blacklisted refresh tokens in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=getattr(settings, 'TOKEN_PRUNE_CHUNK_SIZE', 1000),
+                            help='Outstanding tokens deleted per statement')
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help='Seconds to sleep between chunks, to spare a busy database')
+
+    def handle(self, *args, **options):
+        removed = prune_expired(options['chunk_size'], options['pause'])
+        self.stdout.write(self.style.SUCCESS(f'Pruned {removed} expired tokens'))
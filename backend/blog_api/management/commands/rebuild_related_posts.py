@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from blog_api import related
+from blog_api.response_cache import invalidate_tags
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the related-posts index (TF-IDF vectors and nearest neighbours) for all published posts'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Rebuilding related posts...')
+        count = related.rebuild()
+        invalidate_tags({'posts'})
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} posts'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blog_api.models import Post
+from blog_api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index for all posts'
+
+    def handle(self, *args, **kwargs):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding search index with {backend.__class__.__name__}...')
+
+        posts = Post.objects.only('id', 'title', 'excerpt', 'content').iterator(chunk_size=500)
+        with transaction.atomic():
+            count = backend.rebuild(posts)
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} posts'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from blog_api import counters, feed
+
+
+class Command(BaseCommand):
+    help = 'Recomputes denormalized comment and published-post counters and fixes any drift'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            fixed = counters.reconcile()
+            if any(fixed.values()):
+                # The home feed embeds category counts
+                feed.rebuild()
+
+        for name, rows in fixed.items():
+            style = self.style.WARNING if rows else self.style.SUCCESS
+            self.stdout.write(style(f'{name}: {rows} rows corrected'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from blog_api import feed
+from blog_api.models import Post
+from blog_api.rendering import RENDERER_VERSION, render_posts
+from blog_api.response_cache import invalidate_tags
+from blog_api.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Re-renders post content (HTML, table of contents, reading time) rendered from older content or renderer versions'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(f'Rendering posts with renderer version {RENDERER_VERSION}...')
+        count = render_posts(Post.objects.all(), get_search_backend().index_posts)
+        if count:
+            feed.rebuild()
+            invalidate_tags({'posts'})
+        self.stdout.write(self.style.SUCCESS(f'Rendered {count} posts'))
@@ -1,12 +1,26 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from blog_api.models import Category, Post, User, Comment
+from blog_api.synthetic import SyntheticDataGenerator
 from django.utils.text import slugify
 
 
 class Command(BaseCommand):
-    help = 'Seeds the database with comprehensive demo data for capstone showcase'
+    help = (
+        'Seeds the database with comprehensive demo data for capstone showcase. '
+        'Pass --users/--posts/--comments to generate a synthetic load-testing dataset instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=0, help='Synthetic users to generate')
+        parser.add_argument('--posts', type=int, default=0, help='Synthetic posts to generate')
+        parser.add_argument('--comments', type=int, default=0, help='Synthetic comments to generate')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk insert transaction')
 
     def handle(self, *args, **kwargs):
+        if kwargs.get('users') or kwargs.get('posts') or kwargs.get('comments'):
+            return self.seed_synthetic(kwargs)
+
         self.stdout.write('Creating comprehensive demo database...\n')
 
         # Ensure categories exist
@@ -610,3 +624,29 @@ Beyond medicine, CRISPR could create drought-resistant crops, reduce pesticide u
         self.stdout.write(f'Total Posts: {Post.objects.count()}')
         self.stdout.write(f'Total Comments: {Comment.objects.count()}')
         self.stdout.write(self.style.SUCCESS('\nYour database is now showcase-ready!'))
+
+    def seed_synthetic(self, options):
+        users, posts, comments = options['users'], options['posts'], options['comments']
+        if min(users, posts, comments) < 0 or options['batch_size'] < 1:
+            raise CommandError('Counts cannot be negative and --batch-size must be at least 1')
+        if posts and not users:
+            raise CommandError('--posts needs --users to pick authors from')
+        if comments and not posts:
+            raise CommandError('--comments needs --posts to attach them to')
+
+        generator = SyntheticDataGenerator(
+            seed=options['seed'], batch_size=options['batch_size'], progress=self.report_progress
+        )
+        if User.objects.filter(username__startswith=f'{generator.prefix}_user_').exists():
+            raise CommandError(f'Synthetic data for seed {options["seed"]} already exists; use another --seed')
+
+        self.stdout.write(
+            f'Generating {users} users, {posts} posts and {comments} comments (seed {options["seed"]})...'
+        )
+        totals = generator.generate(users, posts, comments)
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {totals["users"]} users, {totals["posts"]} posts and {totals["comments"]} comments'
+        ))
+
+    def report_progress(self, label, done, total):
+        self.stdout.write(f'  {label}: {done}/{total} ({done * 100 // max(total, 1)}%)')
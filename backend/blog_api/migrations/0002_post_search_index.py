@@ -0,0 +1,29 @@
+from django.db import migrations
+from blog_api.search import VENDOR_BACKENDS
+
+
+def create_search_index(apps, schema_editor):
+    backend_class = VENDOR_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is None:
+        return
+    backend = backend_class()
+    backend.setup(schema_editor)
+    Post = apps.get_model('blog_api', 'Post')
+    backend.rebuild(Post.objects.only('id', 'title', 'excerpt', 'content').iterator())
+
+
+def drop_search_index(apps, schema_editor):
+    backend_class = VENDOR_BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is not None:
+        backend_class().teardown(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
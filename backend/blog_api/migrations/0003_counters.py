@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Category = apps.get_model('blog_api', 'Category')
+    Comment = apps.get_model('blog_api', 'Comment')
+    Post = apps.get_model('blog_api', 'Post')
+    User = apps.get_model('blog_api', 'User')
+
+    def count_of(queryset, key):
+        return Coalesce(Subquery(
+            queryset.filter(**{key: OuterRef('pk')}).order_by()
+            .values(key).annotate(n=Count('pk')).values('n')
+        ), 0)
+
+    published = Post.objects.filter(status='published')
+    Post.objects.update(comments_count=count_of(Comment.objects.all(), 'post'))
+    Category.objects.update(posts_count=count_of(published, 'category'))
+    User.objects.update(posts_count=count_of(published, 'author'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_api', '0002_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of published posts, maintained by signals.'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of comments, maintained by signals.'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of published posts, maintained by signals.'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index simplejwt's OutstandingToken.expires_at (a third-party table, so
+    raw SQL) for chunked pruning of expired tokens.
+    """
+
+    dependencies = [
+        ('blog_api', '0005_comment_threads'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS blog_api_outstandingtoken_expires_at '
+            'ON token_blacklist_outstandingtoken (expires_at)',
+            'DROP INDEX IF EXISTS blog_api_outstandingtoken_expires_at',
+        ),
+    ]
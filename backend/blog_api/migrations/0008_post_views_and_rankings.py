@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_api', '0007_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRanking',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='blog_api.post')),
+                ('score', models.FloatField(null=True)),
+                ('updated_at', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='blog_api_po_slug_22aeaa_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='views_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Number of reads, flushed in batches by blog_api.popularity.'),
+        ),
+        migrations.AddField(
+            model_name='postranking',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='blog_api.category'),
+        ),
+        migrations.AddIndex(
+            model_name='postranking',
+            index=models.Index(fields=['-score'], name='blog_api_po_score_6350ef_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postranking',
+            index=models.Index(fields=['category', '-score'], name='blog_api_po_categor_ce3a8f_idx'),
+        ),
+    ]
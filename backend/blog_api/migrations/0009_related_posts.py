@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from blog_api import related
+
+
+def build_related_posts(apps, schema_editor):
+    related.rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_api', '0008_post_views_and_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField()),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog_api.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'post', 'weight'], name='blog_api_po_term_6b43f1_idx')],
+                'constraints': [models.UniqueConstraint(fields=('post', 'term'), name='unique_post_term')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('post', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='blog_api.post')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbour_of', to='blog_api.post')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('post', 'rank'), name='unique_related_post_rank')],
+            },
+        ),
+        migrations.RunPython(build_related_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:26
+
+from django.db import migrations, models
+from blog_api.slugs import title_key
+
+BATCH_SIZE = 1000
+
+
+def backfill_title_keys(apps, schema_editor):
+    Post = apps.get_model('blog_api', 'Post')
+    batch = []
+    for post in Post.objects.only('pk', 'title').iterator(chunk_size=BATCH_SIZE):
+        post.title_key = title_key(post.title)
+        batch.append(post)
+        if len(batch) == BATCH_SIZE:
+            Post.objects.bulk_update(batch, ['title_key'])
+            batch = []
+    Post.objects.bulk_update(batch, ['title_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_api', '0010_feed_snapshot'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='blog_api_po_title_f2d716_idx',
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='title_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(backfill_title_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['title_key'], name='blog_api_po_title_k_872343_idx'),
+        ),
+    ]
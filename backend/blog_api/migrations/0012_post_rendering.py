@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:32
+
+from django.db import migrations, models
+from blog_api.rendering import render_posts
+from blog_api.search import VENDOR_BACKENDS
+
+
+def render_existing_posts(apps, schema_editor):
+    # Excerpts cut from the raw markdown are replaced, so re-index those
+    backend_class = VENDOR_BACKENDS.get(schema_editor.connection.vendor)
+    reindex = backend_class().index_posts if backend_class is not None else None
+    render_posts(apps.get_model('blog_api', 'Post').objects.all(), reindex)
+    # Snapshots embed list entries, which now carry the reading time
+    apps.get_model('blog_api', 'FeedSnapshot').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_api', '0011_post_title_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='content_toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Minutes.'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog_api', '0013_post_images'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='content',
+            field=models.TextField(max_length=100000),
+        ),
+    ]
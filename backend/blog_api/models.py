@@ -1,7 +1,30 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Cast, LPad
 from django.contrib.auth.models import AbstractUser
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.text import slugify
 
+from . import rendering
+from .slugs import allocate_slug, title_key
+
+# Comment paths are the ids of a comment's ancestors and itself, each padded
+# to this width, so sorting by path walks the thread depth-first with
+# siblings in posting order.
+COMMENT_PATH_STEP = 10
+
+# Slug allocations a post save makes before giving up on concurrent saves
+# taking the same slug
+SLUG_ATTEMPTS = 3
+
+
+def comment_path_segment(pk):
+    return str(pk).zfill(COMMENT_PATH_STEP)
+
+
+def comment_root_path():
+    """Database expression for the path of a top-level comment."""
+    return LPad(Cast('pk', models.CharField()), COMMENT_PATH_STEP, models.Value('0'))
+
 
 class User(AbstractUser):
     """
@@ -12,6 +35,11 @@ class User(AbstractUser):
         default=False,
         help_text="Designates whether this user can create and publish posts."
     )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of published posts, maintained by signals."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -28,6 +56,11 @@ class Category(models.Model):
     """
     name = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(max_length=100, unique=True, blank=True)
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of published posts, maintained by signals."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
@@ -54,26 +87,96 @@ class Post(models.Model):
     ]
 
     title = models.CharField(max_length=200)
+    # `slugs.title_key(title)`: what duplicate titles are found by
+    title_key = models.CharField(max_length=200, blank=True, default='', editable=False)
     slug = models.SlugField(max_length=200, unique=True, blank=True)
-    content = models.TextField()
+    # Markdown, rendered on every change (blog_api.rendering); the limit
+    # bounds what one save renders
+    content = models.TextField(max_length=100000)
     excerpt = models.TextField(max_length=500, blank=True)
+    # Rendered from `content` by blog_api.rendering when its hash changes
+    content_html = models.TextField(blank=True, default='', editable=False)
+    content_toc = models.JSONField(default=list, blank=True, editable=False)
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Minutes.")
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='draft')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='posts')
     image = models.CharField(max_length=500, blank=True, null=True)  # URL to image
+    # The uploaded PostImage shown as `image`, if any, and its width: what
+    # the srcset of its derivatives is built from (blog_api.images)
+    image_digest = models.CharField(max_length=64, blank=True, default='', editable=False)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of comments, maintained by signals."
+    )
+    views_count = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of reads, flushed in batches by blog_api.popularity."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember the loaded values so signals can tell what changed on save
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def save(self, *args, **kwargs):
-        # Auto-generate slug from title
+        self.title_key = title_key(self.title)
+        changed = {'title_key'}
+        changed.update(self.render_content())
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'title', 'content', 'excerpt'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, *changed}
+
         if not self.slug:
-            self.slug = slugify(self.title)
-        
-        # Auto-generate excerpt from content if not provided
-        if not self.excerpt and self.content:
-            self.excerpt = self.content[:200] + '...' if len(self.content) > 200 else self.content
-        
-        super().save(*args, **kwargs)
+            self._save_with_new_slug(*args, **kwargs)
+        else:
+            # Keep the row and the counters updated by post_save in one transaction
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        self._remember_saved_values(kwargs.get('update_fields'))
+
+    def _remember_saved_values(self, update_fields):
+        """After a save, what later saves of this instance compare against."""
+        fields = [
+            field for field in self._meta.concrete_fields
+            if update_fields is None or field.name in update_fields or field.attname in update_fields
+        ]
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}),
+            **{field.attname: getattr(self, field.attname) for field in fields},
+        }
+
+    def render_content(self):
+        """
+        Re-render `content` if it changed since it was last rendered, and
+        fill in a missing excerpt. Returns the names of the fields set.
+        """
+        return rendering.render_post(self)
+
+    def _save_with_new_slug(self, *args, **kwargs):
+        """Save under a free slug of the title (see blog_api.slugs)."""
+        max_length = self._meta.get_field('slug').max_length
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocate_slug(Post.objects.exclude(pk=self.pk), self.title, max_length)
+            try:
+                # A failed attempt rolls back only its own transaction (or savepoint)
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # A concurrent save took the slug first, unless it is something else
+                taken = Post.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if not taken or attempt == SLUG_ATTEMPTS - 1:
+                    self.slug = ''
+                    raise
 
     def __str__(self):
         return self.title
@@ -82,20 +185,51 @@ class Post(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
-            models.Index(fields=['status']),
-            models.Index(fields=['slug']),
+            # Keyset order of the NDJSON export
+            models.Index(fields=['status', 'updated_at', 'id']),
+            # Published lists, newest first (page-number and keyset order)
+            models.Index(fields=['status', '-created_at', '-id']),
+            models.Index(fields=['category', 'status', '-created_at']),
+            # by_author and my_posts; the status filter is applied while walking it
+            models.Index(fields=['author', '-created_at']),
+            # Duplicate-title check on create/update
+            models.Index(fields=['title_key']),
         ]
 
 
 class Comment(models.Model):
     """
     Comment model for user comments on posts.
+    Replies point at their `parent`; `path` (materialized ancestor ids) and
+    `depth` let a whole thread or subtree be read with one range scan.
     """
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='comments')
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments')
+    parent = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies'
+    )
+    path = models.CharField(max_length=255, blank=True, default='', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    replies_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        # Keep the row, its path and the counters in one transaction
+        with transaction.atomic():
+            creating = self._state.adding
+            if creating and self.parent_id:
+                self.depth = self.parent.depth + 1
+            super().save(*args, **kwargs)
+            if creating or not self.path:
+                prefix = self.parent.path if self.parent_id else ''
+                self.path = prefix + comment_path_segment(self.pk)
+                Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+    def subtree_bounds(self):
+        """`(low, high)` such that descendants have low < path < high."""
+        return self.path, self.path + '~'
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
@@ -103,4 +237,103 @@ class Comment(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
+            models.Index(fields=['post', 'path']),
+            # Comment lists and thread roots of a post, newest first
+            models.Index(fields=['post', '-created_at', '-id']),
         ]
+
+
+class PostRanking(models.Model):
+    """
+    Time-decayed popularity of a published post, one row per post that has
+    been read. Maintained by blog_api.popularity; `score` is the log2 of its
+    forward-decayed view count, so higher is more popular right now.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='ranking')
+    # Copy of post.category so per-category rankings are one index range
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='+')
+    score = models.FloatField(null=True)
+    updated_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f"Ranking of post {self.post_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score']),
+            models.Index(fields=['category', '-score']),
+        ]
+
+
+class PostTerm(models.Model):
+    """
+    One weighted term of a published post's TF-IDF vector (unit length),
+    kept by blog_api.related. Rows of the same term form its posting list.
+    """
+    # Covered by the unique (post, term) index
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+', db_index=False)
+    term = models.CharField(max_length=64)
+    weight = models.FloatField()
+
+    def __str__(self):
+        return f"{self.term} in post {self.post_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'term'], name='unique_post_term'),
+        ]
+        indexes = [
+            # Posting lists, read without touching the table
+            models.Index(fields=['term', 'post', 'weight']),
+        ]
+
+
+class RelatedPost(models.Model):
+    """
+    The `rank`-th most similar published post to `post` (0 is the closest),
+    kept by blog_api.related.
+    """
+    # Covered by the unique (post, rank) index
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='neighbours', db_index=False)
+    # Indexed to find the lists a post appears in when it changes
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='neighbour_of')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    def __str__(self):
+        return f"Post {self.related_id} related to post {self.post_id}"
+
+    class Meta:
+        constraints = [
+            # Also the index a post's neighbours are read from, in rank order
+            models.UniqueConstraint(fields=['post', 'rank'], name='unique_related_post_rank'),
+        ]
+
+
+class FeedSnapshot(models.Model):
+    """
+    A precomputed page payload, stored serialized and kept current by
+    blog_api.feed.
+    """
+    key = models.CharField(max_length=50, primary_key=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} feed"
+
+
+class PostImage(models.Model):
+    """
+    An uploaded image, stored once per content under its SHA-256 `digest`.
+    Its resized derivatives are files made by blog_api.images.
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10)
+    uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.width}x{self.height} {self.format})"
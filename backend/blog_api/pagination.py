@@ -0,0 +1,174 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.utils.dateparse import parse_datetime
+from rest_framework import filters
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the `(created_at, id)` key, newest first.
+
+    Each page is a single range scan on the `-created_at` index (`created_at
+    <= t`, minus the ties already seen with `id >= i`) limited to
+    `page_size + 1` rows, so there is no COUNT query and no OFFSET, and
+    latency stays flat at any depth.
+    Cursors are opaque base64 tokens; clients just follow `next`/`previous`.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = remove_query_param(request.build_absolute_uri(), 'page')
+        self.next_position = None
+        self.previous_position = None
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        if cursor is not None:
+            created_at, pk = cursor['position']
+            if reverse:
+                queryset = queryset.filter(created_at__gte=created_at).exclude(
+                    created_at=created_at, id__lte=pk
+                )
+            else:
+                queryset = queryset.filter(created_at__lte=created_at).exclude(
+                    created_at=created_at, id__gte=pk
+                )
+
+        ordering = ('created_at', 'id') if reverse else ('-created_at', '-id')
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        if results:
+            if has_next:
+                self.next_position = self.get_position(results[-1])
+            if has_previous:
+                self.previous_position = self.get_position(results[0])
+        return results
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return item['created_at'], item['id']
+        return item.created_at, item.pk
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii'))
+            created_at = parse_datetime(payload['t'])
+            pk = int(payload['i'])
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return {'position': (created_at, pk), 'reverse': reverse}
+
+    def encode_cursor(self, position, reverse=False):
+        created_at, pk = position
+        payload = {'t': created_at.isoformat(), 'i': pk}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def wants_keyset_pagination(request):
+    """
+    Cursor mode is opt-in: `?pagination=cursor` for the first page, and any
+    request carrying a `cursor` token after that.
+    """
+    params = request.query_params
+    return bool(params.get(KeysetPagination.cursor_query_param)) or params.get('pagination') == 'cursor'
+
+
+class KeysetPaginationMixin:
+    """
+    Lets a view serve keyset pages on request while keeping the default
+    page-number pagination for existing clients. `keyset_actions` limits
+    it to actions whose results are in `(created_at, id)` order (None: all);
+    other actions ignore `?pagination=cursor`.
+
+    The filter backends of `list` can order results otherwise (`?ordering=`,
+    or search relevance); asking for cursor pages of those is a 400 rather
+    than a silently re-sorted list.
+    """
+    keyset_pagination_class = KeysetPagination
+    keyset_actions = None
+    keyset_orderings = ('', '-created_at', '-created_at,-id')
+
+    @property
+    def paginator(self):
+        if (not hasattr(self, '_paginator') and self.pagination_class is not None
+                and (self.keyset_actions is None or self.action in self.keyset_actions)
+                and wants_keyset_pagination(self.request)):
+            if self.action == 'list' and self.reorders_results(self.request):
+                raise ValidationError({'pagination': [
+                    'Cursor pagination only serves the default newest-first order; '
+                    'drop `ordering`/`search` or use page numbers.'
+                ]})
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
+
+    def reorders_results(self, request):
+        """Whether the filter backends put results in another order than newest first."""
+        backends = getattr(self, 'filter_backends', ())
+        params = request.query_params
+        if any(issubclass(backend, filters.OrderingFilter) for backend in backends):
+            ordering = ''.join(params.get(api_settings.ORDERING_PARAM, '').split())
+            if ordering not in self.keyset_orderings:
+                return True
+            if ordering:
+                # An explicit order replaces search relevance
+                return False
+        return (any(issubclass(backend, filters.SearchFilter) for backend in backends)
+                and bool(params.get(api_settings.SEARCH_PARAM, '').strip()))
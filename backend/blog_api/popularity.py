@@ -0,0 +1,202 @@
+"""
+Write-behind view counting and time-decayed popularity rankings.
+
+Post reads only bump an in-process counter (`record_view`); nothing is
+written while the request is served. A background thread flushes the
+counts every VIEW_COUNT_FLUSH_INTERVAL seconds (and at exit): one batched
+UPDATE adds them to `Post.views_count`, and the `PostRanking` rows of the
+posts that were viewed are updated. No other row is touched, so a flush
+costs the same however many posts are ranked.
+
+Rankings use forward decay. A view at time t weighs 2^((t - EPOCH) /
+half-life), so a view from one half-life ago counts half as much as one
+now. Every row grows at the same rate, so rows updated at different times
+still compare correctly, and no periodic re-decay pass is needed. `score`
+holds the log2 of the weighted sum, so it grows linearly and never
+overflows. `decayed_views(score)` turns it back into a view count as of
+now. POPULAR_HALF_LIFE_HOURS sets the half-life. Changing it only affects
+new views.
+
+Reads made inside `views_not_recorded()` (tooling calling the endpoints,
+like blog_api.query_plans) are not counted.
+
+Counts sit in memory until flushed, so a worker that dies abruptly loses
+at most one interval of views. On a normal exit the `atexit` hook waits
+for a flush the thread has in progress, then writes what is left.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .models import Post, PostRanking
+from .response_cache import invalidate_tags
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+POPULAR_TAG = 'posts:popular'
+
+
+def get_half_life():
+    return getattr(settings, 'POPULAR_HALF_LIFE_HOURS', 72) * 3600
+
+
+def log_weight(now):
+    """log2 of the weight of one view at `now`."""
+    return (now - EPOCH).total_seconds() / get_half_life()
+
+
+def log2_add(a, b):
+    """log2(2^a + 2^b) without leaving the log domain; None is log2(0)."""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def decayed_views(score, now=None):
+    """Views behind `score`, each decayed to `now`."""
+    if score is None:
+        return 0.0
+    return 2 ** (score - log_weight(now or timezone.now()))
+
+
+class ViewCounter:
+    """
+    Views of each post slug since the last flush.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def add(self, slug):
+        with self.lock:
+            self.counts[slug] += 1
+
+    def drain(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+    def restore(self, counts):
+        """Put back counts whose flush failed."""
+        with self.lock:
+            self.counts.update(counts)
+
+
+def flush_views(counts, now=None):
+    """
+    Add `counts` ({slug: views}) to the published posts' view counts and
+    rankings. Returns the number of posts updated.
+    """
+    now = now or timezone.now()
+    rows = Post.objects.filter(slug__in=list(counts), status='published').values_list('pk', 'slug', 'category_id')
+    posts, views = {}, {}
+    for pk, slug, category_id in rows:
+        posts[pk], views[pk] = category_id, counts[slug]
+    if not posts:
+        return 0
+    weight = log_weight(now)
+
+    with transaction.atomic():
+        Post.objects.filter(pk__in=views).update(
+            views_count=F('views_count') + Case(*[When(pk=pk, then=Value(n)) for pk, n in views.items()])
+        )
+        # Rows are created empty first so concurrent flushes both end up
+        # adding to the same row under the lock below
+        PostRanking.objects.bulk_create(
+            [PostRanking(post_id=pk, category_id=category_id) for pk, category_id in posts.items()],
+            ignore_conflicts=True,
+        )
+        rankings = list(PostRanking.objects.select_for_update().filter(post_id__in=views))
+        for ranking in rankings:
+            ranking.score = log2_add(ranking.score, math.log2(views[ranking.post_id]) + weight)
+            ranking.category_id = posts[ranking.post_id]
+            ranking.updated_at = now
+        PostRanking.objects.bulk_update(rankings, ['score', 'category_id', 'updated_at'])
+
+    invalidate_tags({POPULAR_TAG})
+    return len(rankings)
+
+
+def post_moved(post_id, category_id):
+    """Keep a ranked post's category in step with the post."""
+    PostRanking.objects.filter(post_id=post_id).exclude(category_id=category_id).update(category_id=category_id)
+
+
+_counter = None
+_state_lock = threading.Lock()
+# Held from drain to write, so exit can't end a flush halfway
+_flush_lock = threading.Lock()
+_not_recording = ContextVar('views_not_recorded', default=False)
+
+
+def get_counter():
+    """The process's ViewCounter; the first call starts its flusher thread."""
+    global _counter
+    with _state_lock:
+        if _counter is None:
+            _counter = ViewCounter()
+            atexit.register(flush_at_exit)
+            interval = getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 10)
+            if interval:
+                threading.Thread(target=_flush_loop, args=(interval,), name='view-flush', daemon=True).start()
+    return _counter
+
+
+def record_view(slug):
+    if not _not_recording.get():
+        get_counter().add(slug)
+
+
+@contextmanager
+def views_not_recorded():
+    """Don't count the post reads made in the block as views."""
+    token = _not_recording.set(True)
+    try:
+        yield
+    finally:
+        _not_recording.reset(token)
+
+
+def flush():
+    """Write this process's pending views now."""
+    counter = get_counter()
+    with _flush_lock:
+        counts = counter.drain()
+        if not counts:
+            return 0
+        try:
+            return flush_views(counts)
+        except Exception:
+            counter.restore(counts)
+            raise
+
+
+def flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception('Could not write pending post views at exit')
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception:
+            logger.exception('Flushing post views failed')
+        finally:
+            connection.close()
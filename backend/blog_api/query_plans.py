@@ -0,0 +1,226 @@
+"""
+Query-plan regression checks for the read endpoints.
+
+`check_plans()` calls each endpoint in `plan_cases()` (or runs a query the
+endpoints depend on), records every SELECT it sends, and runs EXPLAIN on
+it. A plan fails when, on a table holding at least `min_rows` rows, it
+reads the whole table (SQLite `SCAN <table>` or an automatic index,
+PostgreSQL `Seq Scan`) or sorts rows in a temporary B-tree (SQLite
+`USE TEMP B-TREE`, PostgreSQL `Sort`) instead of walking an index in
+order. Small tables are exempt, because scanning them is what a planner
+should do.
+
+Plans follow the database's statistics. With `analyze`, SQLite tables are
+ANALYZEd first, so plans are made from row statistics as PostgreSQL's
+are; that writes the statistics into the database (`sqlite_stat1`) and
+changes the plans every later query there gets. Post reads made by the
+checks are not counted as views.
+
+Sorts feeding a window function are expected: the reply window of a
+comment thread ranks siblings within the `(post, path)` ranges it has
+already searched, so for those queries only the scans are checked.
+
+`manage.py check_query_plans` runs this against the configured database
+(ANALYZE only with `--analyze`). The perf suite runs it, analyzed, against
+the synthetic dataset.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import feed, popularity
+from .models import Category, Comment, Post
+from .related import document_frequencies, load_postings, term_counts
+from .slugs import allocate_slug
+
+# `run` takes an APIClient, authenticated as `user` when one is given
+PlanCase = namedtuple('PlanCase', 'name run user', defaults=(None,))
+PlanResult = namedtuple('PlanResult', 'case sql plan problems')
+
+# `SCAN t` reads the whole table; `SCAN t USING INDEX i` walks an index in order
+SQLITE_ACCESS = re.compile(r'^(SCAN|SEARCH) (\S+)(?: USING (AUTOMATIC )?(.*))?$')
+# Django aliases repeated tables as `"blog_api_comment" U0`
+SQL_ALIAS = re.compile(r'"(\w+)" (?:AS )?"?([A-Z]\d+)\b')
+
+
+def plan_cases():
+    """Endpoint queries to check, built from rows of the current database."""
+    post = Post.objects.filter(status='published').order_by('-comments_count', 'id').first()
+    category = Category.objects.order_by('-posts_count', 'id').first()
+    if post is None or category is None:
+        return []
+    comment = Comment.objects.filter(post=post, replies_count__gt=0).order_by('id').first()
+    author = post.author
+    terms = list(term_counts(post.title, '')) or ['post']
+    posts = '/api/v1/posts/'
+    comments = f'{posts}{post.slug}/comments/'
+    cases = [
+        PlanCase('post-list', lambda client: client.get(posts)),
+        PlanCase('post-list-page', lambda client: client.get(f'{posts}?page=2')),
+        PlanCase('post-list-cursor', lambda client: client.get(f'{posts}?pagination=cursor')),
+        PlanCase('post-detail', lambda client: client.get(f'{posts}{post.slug}/')),
+        PlanCase('post-by-category', lambda client: client.get(f'{posts}category/{category.slug}/')),
+        PlanCase('post-by-author', lambda client: client.get(f'{posts}author/{author.username}/')),
+        PlanCase('post-popular', lambda client: client.get(f'{posts}popular/')),
+        PlanCase('post-popular-category', lambda client: client.get(f'{posts}popular/?category={category.slug}')),
+        PlanCase('post-related', lambda client: client.get(f'{posts}{post.slug}/related/')),
+        PlanCase('post-my-posts', lambda client: client.get(f'{posts}my-posts/'), author),
+        # The duplicate check in PostCreateUpdateSerializer.validate_title
+        PlanCase('post-title-check', lambda client: Post.objects.filter(title_key=post.title_key).exists()),
+        # The taken-slug range scan of a post create (blog_api.slugs)
+        PlanCase('post-slug-allocation', lambda client: allocate_slug(Post.objects, post.title)),
+        # Posting lists and document frequencies read when a post is saved (blog_api.related)
+        PlanCase('post-term-postings', lambda client: list(load_postings(terms))),
+        PlanCase('post-term-frequencies', lambda client: document_frequencies(terms)),
+        PlanCase('feed-home', lambda client: client.get('/api/v1/feed/home/')),
+        # Section queries of the home feed snapshot
+        PlanCase('feed-build', lambda client: feed.build()),
+        PlanCase('category-list', lambda client: client.get('/api/v1/categories/')),
+        PlanCase('comment-list', lambda client: client.get(comments)),
+        PlanCase('comment-list-cursor', lambda client: client.get(f'{comments}?pagination=cursor')),
+        PlanCase('comment-thread', lambda client: client.get(f'{comments}thread/')),
+    ]
+    if comment is not None:
+        cases.append(PlanCase('comment-replies', lambda client: client.get(f'{comments}{comment.pk}/replies/')))
+    return cases
+
+
+class QueryRecorder:
+    """Execute wrapper that keeps the SQL and params of every SELECT."""
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def explain(sql, params):
+    """Return the plan of a query as a list of lines (SQLite) or a JSON tree (PostgreSQL)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            return cursor.fetchone()[0][0]['Plan']
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[3] for row in cursor.fetchall()]
+    raise NotImplementedError(f'No query plan support for {connection.vendor}')
+
+
+def plan_lines(plan, indent=0):
+    """Human-readable lines of a plan from `explain()`."""
+    if isinstance(plan, list):
+        return plan
+    relation = f" on {plan['Relation Name']}" if 'Relation Name' in plan else ''
+    index = f" using {plan['Index Name']}" if 'Index Name' in plan else ''
+    lines = ['  ' * indent + f"{plan['Node Type']}{relation}{index}"]
+    for child in plan.get('Plans', []):
+        lines.extend(plan_lines(child, indent + 1))
+    return lines
+
+
+class TableSizes:
+    """Row counts of tables, counted once each."""
+    def __init__(self):
+        self.tables = set(connection.introspection.table_names())
+        self.counts = {}
+
+    def __call__(self, table):
+        """Row count of `table`, or None for subqueries and other non-tables."""
+        if table not in self.tables:
+            return None
+        if table not in self.counts:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                self.counts[table] = cursor.fetchone()[0]
+        return self.counts[table]
+
+
+def sqlite_problems(sql, lines, rows, min_rows):
+    aliases = {alias: table for table, alias in SQL_ALIAS.findall(sql)}
+    problems = []
+    large = set()
+    for line in lines:
+        access = SQLITE_ACCESS.match(line)
+        if access is None:
+            continue
+        kind, table, automatic, index = access.groups()
+        table = aliases.get(table, table)
+        count = rows(table)
+        if count is None or count < min_rows:
+            continue
+        large.add(table)
+        if automatic or (kind == 'SCAN' and not index):
+            problems.append(f'full scan of {table} ({count} rows)')
+    if large and not is_window_query(sql):
+        tables = ', '.join(sorted(large))
+        problems.extend(f'{line} over {tables}' for line in lines if line.startswith('USE TEMP B-TREE'))
+    return problems
+
+
+def postgresql_problems(sql, plan, rows, min_rows):
+    problems = []
+
+    def large_relations(node):
+        found = set()
+        if (rows(node.get('Relation Name')) or 0) >= min_rows:
+            found.add(node['Relation Name'])
+        for child in node.get('Plans', []):
+            found |= large_relations(child)
+        return found
+
+    def walk(node):
+        table = node.get('Relation Name')
+        if node['Node Type'] == 'Seq Scan' and (rows(table) or 0) >= min_rows:
+            problems.append(f'full scan of {table} ({rows(table)} rows)')
+        if node['Node Type'] == 'Sort' and not is_window_query(sql):
+            large = large_relations(node)
+            if large:
+                problems.append(f"sort on {', '.join(node.get('Sort Key', []))} over {', '.join(sorted(large))}")
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan)
+    return problems
+
+
+def is_window_query(sql):
+    return ' OVER (' in sql
+
+
+def check_plans(min_rows=1000, cases=None, analyze=False):
+    """
+    Run every case and EXPLAIN the SELECTs it issued. Returns PlanResults,
+    one per distinct query; `problems` is empty for plans that pass.
+    """
+    if cases is None:
+        cases = plan_cases()
+    if analyze and connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+    rows = TableSizes()
+    find_problems = postgresql_problems if connection.vendor == 'postgresql' else sqlite_problems
+    results = []
+    # The uncached path is the one that reaches the database
+    with override_settings(RESPONSE_CACHE_TIMEOUT=0, REQUEST_TIMING_SAMPLE_RATE=0, ALLOWED_HOSTS=['testserver']):
+        for case in cases:
+            client = APIClient()
+            if case.user is not None:
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(case.user)}')
+            recorder = QueryRecorder()
+            with connection.execute_wrapper(recorder), popularity.views_not_recorded():
+                case.run(client)
+            seen = set()
+            for sql, params in recorder.queries:
+                if sql in seen:
+                    continue
+                seen.add(sql)
+                plan = explain(sql, params)
+                results.append(PlanResult(case, sql, plan, find_problems(sql, plan, rows, min_rows)))
+    return results
+
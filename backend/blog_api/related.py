@@ -0,0 +1,352 @@
+"""
+Related posts by TF-IDF similarity of post titles and content.
+
+Each published post is turned into a sparse TF-IDF vector: sublinear term
+frequencies (title words count TITLE_WEIGHT times) times smoothed inverse
+document frequency, cut to the MAX_TERMS heaviest terms and scaled to unit
+length. Terms found in more than MAX_DF of the posts, or in more than
+RELATED_MAX_POSTINGS of them, say nothing about relatedness and get no
+weight, which keeps every posting list under that length. Every distinct
+term of a post is stored as a `PostTerm` row (weight 0 when it is not in
+the vector), so a term's rows are both its posting list and its document
+frequency. The RELATED_POSTS_COUNT nearest neighbours of each post by
+cosine similarity are stored as ranked `RelatedPost` rows, and reading
+them is one index range.
+
+`rebuild()` is a batch job over the posts, read BATCH_SIZE at a time: one
+pass counts document frequencies, a second stores the vectors, and the
+neighbours are then found for BATCH_SIZE posts at a time from the posting
+lists of their terms (the sparse product X·Xᵀ, one block of rows at a
+time). It holds the vocabulary and one block in memory, and since posting
+lists are capped its work grows linearly with the number of posts.
+
+`update_post()` handles one saved post. The Post signals decide at save
+time whether the post's text changed and queue the update for when the
+transaction commits. A background thread then runs it against the post
+as it is by then (RELATED_POSTS_IN_BACKGROUND; off, it runs in the
+committing thread). It re-vectorizes the post against the current
+document frequencies, scores it against the posting lists of its terms,
+and patches the neighbour lists it enters or moves up in. Only the lists
+it drops in or leaves are recomputed from scratch. Vectors of other posts
+keep the document frequencies they were built with, and an update lost
+with its process stays lost, until the next `manage.py
+rebuild_related_posts`.
+"""
+import heapq
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import Post, PostTerm, RelatedPost
+
+logger = logging.getLogger(__name__)
+
+# Words of three or more letters
+_WORD_RE = re.compile(r'[^\W\d_]{3,}', re.UNICODE)
+
+TITLE_WEIGHT = 3
+MAX_TERMS = 64
+MAX_DF = 0.5
+# Below this many posts no term is too common to count
+MAX_DF_MIN_POSTS = 20
+TERM_LENGTH = 64
+BATCH_SIZE = 1000
+INDEXED_FIELDS = ('title', 'content', 'status')
+
+STOP_WORDS = frozenset('''
+    about above after again against all also and any are because been before being below between both
+    but can could did does doing down during each few for from further had has have having her here
+    hers herself him himself his how into its itself just more most myself nor not now off once only
+    other our ours ourselves out over own same she should some such than that the their theirs them
+    themselves then there these they this those through too under until very was were what when where
+    which while who whom why will with would you your yours yourself yourselves
+'''.split())
+
+
+def get_count():
+    return getattr(settings, 'RELATED_POSTS_COUNT', 5)
+
+
+def get_max_postings():
+    return getattr(settings, 'RELATED_MAX_POSTINGS', 1000)
+
+
+def _words(text):
+    for word in _WORD_RE.findall((text or '').lower()):
+        if word not in STOP_WORDS:
+            yield word[:TERM_LENGTH]
+
+
+def term_counts(title, content):
+    """Occurrences of each term in a post, title words weighted up."""
+    counts = Counter(_words(content))
+    for word in _words(title):
+        counts[word] += TITLE_WEIGHT
+    return counts
+
+
+def vectorize(counts, document_frequency, total):
+    """
+    Unit-length TF-IDF vector ({term: weight}) of a post's `counts`, where
+    `document_frequency(term)` counts the posts (this one included) out of
+    `total` that use the term.
+    """
+    limit = min(MAX_DF * total if total >= MAX_DF_MIN_POSTS else total, get_max_postings())
+    weights = {}
+    for term, count in counts.items():
+        frequency = document_frequency(term)
+        if frequency <= limit:
+            weights[term] = (1 + math.log(count)) * (math.log((1 + total) / (1 + frequency)) + 1)
+    if len(weights) > MAX_TERMS:
+        weights = dict(heapq.nlargest(MAX_TERMS, weights.items(), key=lambda item: (item[1], item[0])))
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    return {term: weight / norm for term, weight in weights.items()} if norm else {}
+
+
+def similarities(vector, postings, exclude=None):
+    """Cosine similarity of `vector` with every post sharing a term with it."""
+    scores = defaultdict(float)
+    for term, weight in vector.items():
+        for pk, other in postings.get(term, ()):
+            scores[pk] += weight * other
+    scores.pop(exclude, None)
+    return scores
+
+
+def nearest(scores, count):
+    """The `count` best (pk, score) pairs, ties going to the older post."""
+    return heapq.nlargest(count, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def _chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _keyset(queryset, *fields, size=BATCH_SIZE):
+    """Yield `queryset`'s `(pk, *fields)` rows in pk order, `size` to a query."""
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(page.order_by('pk').values_list('pk', *fields)[:size])
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def load_postings(terms, model=PostTerm):
+    """{term: [(pk, weight), ...]} for the weighted rows of `terms`."""
+    postings = defaultdict(list)
+    for chunk in _chunks(terms):
+        rows = model.objects.filter(term__in=chunk, weight__gt=0).values_list('post_id', 'term', 'weight')
+        for pk, term, weight in rows:
+            postings[term].append((pk, weight))
+    return postings
+
+
+def load_vectors(pks, model=PostTerm):
+    """{pk: vector} of already indexed posts, from their stored rows."""
+    vectors = defaultdict(dict)
+    for chunk in _chunks(pks):
+        rows = model.objects.filter(post_id__in=chunk, weight__gt=0).values_list('post_id', 'term', 'weight')
+        for pk, term, weight in rows:
+            vectors[pk][term] = weight
+    return vectors
+
+
+def document_frequencies(terms):
+    """{term: number of indexed posts using it} for `terms`."""
+    frequencies = {}
+    for chunk in _chunks(terms):
+        frequencies.update(
+            PostTerm.objects.filter(term__in=chunk).order_by().values_list('term').annotate(Count('post'))
+        )
+    return frequencies
+
+
+def _write_lists(lists, count):
+    """Replace the neighbour lists of the posts in `lists` ({pk: {related pk: score}})."""
+    for chunk in _chunks(lists):
+        RelatedPost.objects.filter(post_id__in=chunk).delete()
+    RelatedPost.objects.bulk_create(
+        [
+            RelatedPost(post_id=pk, related_id=related, rank=rank, score=score)
+            for pk, scores in lists.items()
+            for rank, (related, score) in enumerate(nearest(scores, count))
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+
+def rebuild(apps=None):
+    """
+    Recompute every published post's vector and neighbours; returns how
+    many were indexed. Migrations pass their app registry as `apps`.
+    """
+    post_model, term_model, related_model = (
+        (apps.get_model('blog_api', name) for name in ('Post', 'PostTerm', 'RelatedPost'))
+        if apps is not None else (Post, PostTerm, RelatedPost)
+    )
+    posts = post_model.objects.filter(status='published')
+    frequencies = Counter()
+    total = 0
+    for rows in _keyset(posts, 'title', 'content'):
+        for _, title, content in rows:
+            frequencies.update(term_counts(title, content).keys())
+        total += len(rows)
+    count = get_count()
+
+    with transaction.atomic():
+        term_model.objects.all().delete()
+        related_model.objects.all().delete()
+        for rows in _keyset(posts, 'title', 'content'):
+            terms = []
+            for pk, title, content in rows:
+                counts = term_counts(title, content)
+                vector = vectorize(counts, frequencies.__getitem__, total)
+                terms.extend(term_model(post_id=pk, term=term, weight=vector.get(term, 0.0)) for term in counts)
+            term_model.objects.bulk_create(terms, batch_size=BATCH_SIZE)
+
+        for rows in _keyset(posts):
+            vectors = load_vectors([pk for pk, in rows], term_model)
+            postings = load_postings({term for vector in vectors.values() for term in vector}, term_model)
+            related_model.objects.bulk_create(
+                [
+                    related_model(post_id=pk, related_id=related, rank=rank, score=score)
+                    for pk, vector in vectors.items()
+                    for rank, (related, score) in enumerate(nearest(similarities(vector, postings, pk), count))
+                ],
+                batch_size=BATCH_SIZE,
+            )
+    return total
+
+
+def needs_update(post, created):
+    """Whether a save changed what `post` is indexed by (the text of a published post)."""
+    if created:
+        return post.status == 'published'
+    loaded = getattr(post, '_loaded_values', {})
+    if any(field not in loaded for field in INDEXED_FIELDS):
+        return True
+    if loaded['status'] != 'published' and post.status != 'published':
+        return False
+    return any(loaded[field] != getattr(post, field) for field in INDEXED_FIELDS)
+
+
+def _index(pk, counts):
+    """Store the terms of post `pk` and return its vector."""
+    total = Post.objects.filter(status='published').count()
+    frequencies = document_frequencies(counts)
+    # The post's own rows are not stored yet
+    vector = vectorize(counts, lambda term: frequencies.get(term, 0) + 1, total)
+    PostTerm.objects.bulk_create(
+        [PostTerm(post_id=pk, term=term, weight=vector.get(term, 0.0)) for term in counts],
+        batch_size=BATCH_SIZE,
+    )
+    return vector
+
+
+def _recompute(pks, count):
+    """Neighbours of already indexed posts, from their stored vectors."""
+    vectors = load_vectors(pks)
+    postings = load_postings({term for vector in vectors.values() for term in vector})
+    return {pk: dict(nearest(similarities(vectors[pk], postings, pk), count)) for pk in pks}
+
+
+def update_post(pk, created=False):
+    """
+    Re-index post `pk` as currently stored (dropping it unless it is
+    published) and patch the neighbour lists it changes.
+    """
+    count = get_count()
+    with transaction.atomic():
+        post = Post.objects.filter(pk=pk).values_list('title', 'content', 'status').first()
+        counts = term_counts(post[0], post[1]) if post is not None and post[2] == 'published' else {}
+        listed_by = {}
+        if not created:
+            listed_by = dict(RelatedPost.objects.filter(related_id=pk).values_list('post_id', 'score'))
+            PostTerm.objects.filter(post_id=pk).delete()
+        vector = _index(pk, counts) if counts else {}
+        scores = similarities(vector, load_postings(vector), pk)
+
+        # A list the post fell in (or left) may now miss a post it never held
+        stale = [other for other, score in listed_by.items() if scores.get(other, 0.0) < score]
+        candidates = [other for other in scores if other not in stale]
+        last = {}
+        for chunk in _chunks(candidates):
+            last.update(RelatedPost.objects.filter(post_id__in=chunk, rank=count - 1).values_list('post_id', 'score'))
+        # Lists with fewer than `count` posts have no last score and take any match
+        entering = [other for other in candidates if other in listed_by or scores[other] > last.get(other, 0.0)]
+
+        lists = defaultdict(dict)
+        for chunk in _chunks(entering):
+            rows = RelatedPost.objects.filter(post_id__in=chunk).values_list('post_id', 'related_id', 'score')
+            for other, related, score in rows:
+                lists[other][related] = score
+        for other in entering:
+            lists[other][pk] = scores[other]
+        lists.update(_recompute(stale, count) if stale else {})
+        if post is not None:
+            lists[pk] = scores
+        _write_lists(lists, count)
+
+
+def listing_posts(post_id):
+    """Posts whose neighbour lists hold `post_id`."""
+    return list(RelatedPost.objects.filter(related_id=post_id).values_list('post_id', flat=True))
+
+
+def post_deleted(listed_by):
+    """Refill the lists a deleted post was in (`listing_posts()` before the delete)."""
+    if not listed_by:
+        return
+    count = get_count()
+    with transaction.atomic():
+        _write_lists(_recompute(listed_by, count), count)
+
+
+_executor = None
+_state_lock = threading.Lock()
+
+
+def get_executor():
+    """One thread per process, so its index updates never race each other."""
+    global _executor
+    with _state_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='related')
+    return _executor
+
+
+def _run(function, *args):
+    try:
+        function(*args)
+    except Exception:
+        logger.exception('Updating the related-posts index failed; rebuild_related_posts repairs it')
+
+
+def _run_in_background(function, *args):
+    try:
+        _run(function, *args)
+    finally:
+        connection.close()
+
+
+def schedule(function, *args):
+    """Run `function(*args)` once the current transaction commits, off the request path."""
+    def enqueue():
+        if getattr(settings, 'RELATED_POSTS_IN_BACKGROUND', True):
+            get_executor().submit(_run_in_background, function, *args)
+        else:
+            _run(function, *args)
+
+    transaction.on_commit(enqueue, robust=True)
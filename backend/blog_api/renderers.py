@@ -0,0 +1,73 @@
+"""
+Faster renderers for the API.
+
+FastJSONRenderer produces the same bytes as DRF's JSONRenderer using
+orjson, and MessagePackRenderer serves `application/msgpack`. Both hand
+values the native encoders don't cover (datetimes, Decimals, lazy strings)
+to DRF's JSONEncoder, so they come out exactly as in the JSON output.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib renderer
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """Encode non-native values the way DRF's JSONEncoder does."""
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer backed by orjson. Indented (browsable/`; indent=`)
+    output, non-default JSON settings and anything orjson rejects go
+    through the stdlib renderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or not self.compact or self.ensure_ascii or not self.strict
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # Datetimes go through DRF's encoder to keep its millisecond format
+            ret = orjson.dumps(
+                data, default=encode_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Match JSONRenderer: escape U+2028/U+2029 so output is a JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders data as MessagePack for clients sending `Accept: application/msgpack`.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if msgpack is None:
+            raise ImproperlyConfigured('MessagePackRenderer requires the msgpack package.')
+        return msgpack.packb(data, default=encode_default, use_bin_type=True, datetime=False)
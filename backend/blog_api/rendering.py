@@ -0,0 +1,288 @@
+"""
+Markdown rendering of post content, done once per content change.
+
+Post content is markdown. `render()` turns it into HTML, a table of
+contents, a word count, a reading time and a plain-text excerpt.
+`Post.save()` stores them with the post whenever `content_hash()` of the
+content differs from the stored one, so reads serve them as they are.
+Bump RENDERER_VERSION when the output changes; `manage.py
+render_posts` then re-renders the posts rendered by an older version.
+
+The renderer covers the markdown posts are written in: ATX headings,
+paragraphs, block quotes, bullet and numbered lists, fenced code, rules,
+and inline code, links, bold and italics. Anything else is text. Every
+piece of text is escaped and only those elements are emitted, with no
+attributes but heading ids and link hrefs, so the HTML is safe to insert
+as it is. Links keep their href only for http(s), mailto and
+site-relative URLs.
+"""
+import hashlib
+import math
+import re
+from collections import namedtuple
+
+from django.utils.html import escape
+from django.utils.text import slugify
+
+RENDERER_VERSION = 2
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 200
+BATCH_SIZE = 500
+RENDERED_FIELDS = ('content_html', 'content_toc', 'word_count', 'reading_time', 'content_hash')
+# Heading levels listed in the table of contents
+TOC_LEVELS = (2, 3)
+
+Rendered = namedtuple('Rendered', 'html toc word_count reading_time excerpt')
+
+_HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_FENCE_RE = re.compile(r'^(```|~~~)')
+_RULE_RE = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+_QUOTE_RE = re.compile(r'^ {0,3}> ?')
+_BULLET_RE = re.compile(r'^ {0,3}[-*+]\s+')
+_NUMBER_RE = re.compile(r'^ {0,3}\d{1,9}[.)]\s+')
+# Longest link label or emphasized text, in characters. A closing
+# delimiter is only looked for this far past an opening one (and on the
+# same line), so text full of unclosed `*`, `_` or `[` renders in linear
+# time; longer runs are left as text.
+INLINE_SPAN = 500
+_INLINE_RE = re.compile(
+    r'`(?P<code>[^`]+)`'
+    rf'|\[(?P<label>[^\]\n]{{1,{INLINE_SPAN}}})\]\((?P<url>(?:[^()\s]|\([^()\s]*\))+)\)'
+    rf'|\*\*(?P<strong>\S(?:.{{0,{INLINE_SPAN - 2}}}?\S)?)\*\*'
+    rf'|__(?P<strong2>\S(?:.{{0,{INLINE_SPAN - 2}}}?\S)?)__'
+    rf'|\*(?P<em>\S(?:.{{0,{INLINE_SPAN - 2}}}?\S)?)\*'
+    rf'|(?<!\w)_(?P<em2>\S(?:.{{0,{INLINE_SPAN - 2}}}?\S)?)_(?!\w)'
+)
+_SAFE_URL_RE = re.compile(r'^(?:https?://|mailto:|/(?!/)|#)', re.IGNORECASE)
+_WORD_RE = re.compile(r'\w+(?:[\'’-]\w+)*')
+
+
+def content_hash(content):
+    """What the stored rendering of `content` is keyed by."""
+    return hashlib.sha256(f'{RENDERER_VERSION}\n{content or ""}'.encode()).hexdigest()
+
+
+def render_inline(text):
+    """Return `(html, plain text)` of one block's inline markdown."""
+    html, plain = [], []
+    position = 0
+    for match in _INLINE_RE.finditer(text):
+        html.append(escape(text[position:match.start()]))
+        plain.append(text[position:match.start()])
+        position = match.end()
+        kind = match.lastgroup
+        if kind == 'code':
+            html.append(f'<code>{escape(match["code"])}</code>')
+            plain.append(match['code'])
+            continue
+        inner_html, inner_plain = render_inline(match[kind] if kind != 'url' else match['label'])
+        plain.append(inner_plain)
+        if kind == 'url':
+            url = match['url']
+            html.append(f'<a href="{escape(url)}">{inner_html}</a>' if _SAFE_URL_RE.match(url) else inner_html)
+        elif kind in ('strong', 'strong2'):
+            html.append(f'<strong>{inner_html}</strong>')
+        else:
+            html.append(f'<em>{inner_html}</em>')
+    html.append(escape(text[position:]))
+    plain.append(text[position:])
+    return ''.join(html), ''.join(plain)
+
+
+class _Renderer:
+    def __init__(self):
+        self.toc = []
+        self.ids = set()
+        # Plain text of each paragraph-like block, for word count and excerpt
+        self.paragraphs = []
+        self.words = 0
+
+    def add_text(self, text, paragraph=False):
+        self.words += len(_WORD_RE.findall(text))
+        if paragraph:
+            self.paragraphs.append(' '.join(text.split()))
+
+    def heading_id(self, text):
+        base = slugify(text) or 'section'
+        candidate, n = base, 1
+        while candidate in self.ids:
+            n += 1
+            candidate = f'{base}-{n}'
+        self.ids.add(candidate)
+        return candidate
+
+    def render(self, lines, in_quote=False):
+        out = []
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            if not line.strip():
+                i += 1
+                continue
+
+            fence = _FENCE_RE.match(line.lstrip())
+            if fence:
+                end = i + 1
+                while end < len(lines) and not lines[end].lstrip().startswith(fence.group(1)):
+                    end += 1
+                code = '\n'.join(lines[i + 1:end])
+                self.add_text(code)
+                out.append(f'<pre><code>{escape(code)}</code></pre>')
+                i = end + 1
+                continue
+
+            heading = _HEADING_RE.match(line.lstrip())
+            if heading:
+                level = len(heading.group(1))
+                html, plain = render_inline(heading.group(2))
+                self.add_text(plain)
+                if in_quote:
+                    out.append(f'<h{level}>{html}</h{level}>')
+                else:
+                    anchor = self.heading_id(plain)
+                    if level in TOC_LEVELS:
+                        self.toc.append({'level': level, 'text': plain, 'id': anchor})
+                    out.append(f'<h{level} id="{anchor}">{html}</h{level}>')
+                i += 1
+                continue
+
+            if _RULE_RE.match(line):
+                out.append('<hr>')
+                i += 1
+                continue
+
+            if _QUOTE_RE.match(line):
+                end = i
+                while end < len(lines) and lines[end].strip() and _QUOTE_RE.match(lines[end]):
+                    end += 1
+                quoted = [_QUOTE_RE.sub('', quoted_line, count=1) for quoted_line in lines[i:end]]
+                out.append(f'<blockquote>{self.render(quoted, in_quote=True)}</blockquote>')
+                i = end
+                continue
+
+            marker = _BULLET_RE if _BULLET_RE.match(line) else _NUMBER_RE if _NUMBER_RE.match(line) else None
+            if marker is not None:
+                items = []
+                while i < len(lines) and lines[i].strip():
+                    if marker.match(lines[i]):
+                        items.append(marker.sub('', lines[i], count=1))
+                    elif items and lines[i].startswith((' ', '\t')):
+                        # Continuation of the item above
+                        items[-1] += ' ' + lines[i].strip()
+                    else:
+                        break
+                    i += 1
+                rendered = []
+                for item in items:
+                    html, plain = render_inline(item.strip())
+                    self.add_text(plain, paragraph=True)
+                    rendered.append(f'<li>{html}</li>')
+                tag = 'ul' if marker is _BULLET_RE else 'ol'
+                out.append(f'<{tag}>{"".join(rendered)}</{tag}>')
+                continue
+
+            end = i
+            while end < len(lines) and lines[end].strip() and not (
+                end > i and self.starts_block(lines[end])
+            ):
+                end += 1
+            html, plain = render_inline('\n'.join(line.strip() for line in lines[i:end]))
+            self.add_text(plain, paragraph=True)
+            out.append(f'<p>{html}</p>')
+            i = end
+        return '\n'.join(out)
+
+    @staticmethod
+    def starts_block(line):
+        stripped = line.lstrip()
+        return bool(
+            _FENCE_RE.match(stripped) or _HEADING_RE.match(stripped) or _RULE_RE.match(line)
+            or _QUOTE_RE.match(line) or _BULLET_RE.match(line) or _NUMBER_RE.match(line)
+        )
+
+
+def make_excerpt(paragraphs, length=EXCERPT_LENGTH):
+    """The opening text of `paragraphs`, cut at a word boundary within `length` characters."""
+    text = ' '.join(paragraphs)
+    if len(text) <= length:
+        return text
+    cut = text[:length + 1].rsplit(None, 1)[0] if ' ' in text[:length + 1] else text[:length]
+    return cut.rstrip(' ,;:.-—') + '...'
+
+
+def render(content):
+    """Render markdown `content` into a `Rendered`."""
+    renderer = _Renderer()
+    html = renderer.render((content or '').replace('\r\n', '\n').replace('\r', '\n').split('\n'))
+    reading_time = math.ceil(renderer.words / WORDS_PER_MINUTE) if renderer.words else 0
+    return Rendered(html, renderer.toc, renderer.words, reading_time, make_excerpt(renderer.paragraphs))
+
+
+def is_generated_excerpt(excerpt, content, rendered=None):
+    """
+    Whether `excerpt` is empty or was generated from `content`, by
+    `render()` (`rendered` when already done) or by the plain cut of the
+    first 200 characters posts used to get.
+    """
+    if not excerpt:
+        return True
+    content = content or ''
+    if excerpt in (content, content[:200] + '...'):
+        return True
+    return excerpt == (rendered or render(content)).excerpt
+
+
+def render_post(post):
+    """
+    Store the rendering of `post.content` on `post` unless its hash is
+    current. An excerpt generated from the content it had when loaded is
+    replaced too. Returns the names of the fields set.
+    """
+    digest = content_hash(post.content)
+    if digest == post.content_hash and post.excerpt:
+        return set()
+    rendered = render(post.content)
+    post.content_html, post.content_toc = rendered.html, rendered.toc
+    post.word_count, post.reading_time = rendered.word_count, rendered.reading_time
+    post.content_hash = digest
+    fields = set(RENDERED_FIELDS)
+    previous = getattr(post, '_loaded_values', {}).get('content', post.content)
+    if is_generated_excerpt(post.excerpt, previous, rendered if previous == post.content else None):
+        post.excerpt = rendered.excerpt
+        fields.add('excerpt')
+    return fields
+
+
+def render_posts(queryset, reindex=None, batch_size=BATCH_SIZE):
+    """
+    Render the posts of `queryset` whose stored rendering is missing or
+    stale (older content or RENDERER_VERSION); returns how many changed.
+    Writes with `bulk_update`, so no signals are sent: `reindex(posts)` is
+    called with the posts whose excerpt changed, for the search index.
+    """
+    posts = queryset.only('pk', 'title', 'content', 'excerpt', 'content_hash').order_by('pk')
+    count = 0
+    for chunk in _chunks(posts.iterator(chunk_size=batch_size), batch_size):
+        changed, new_excerpts = [], []
+        for post in chunk:
+            excerpt = post.excerpt
+            if render_post(post):
+                changed.append(post)
+                if post.excerpt != excerpt:
+                    new_excerpts.append(post)
+        queryset.model.objects.bulk_update(changed, [*RENDERED_FIELDS, 'excerpt'])
+        count += len(changed)
+        if reindex is not None and new_excerpts:
+            reindex(new_excerpts)
+    return count
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
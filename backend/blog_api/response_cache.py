@@ -0,0 +1,244 @@
+"""
+Tag-invalidated response cache and conditional GET for read-only endpoints.
+
+Rendered GET responses are stored under a key built from the path, the
+query string, the negotiated media type and the caller's visibility class
+(anonymous, reader, or the individual author, who also sees their drafts).
+
+Every entry records the version stamp of each tag it depends on (post
+slug, category, author, collection). Invalidating a tag just gives it a new
+stamp, so only the entries carrying that tag stop matching; nothing has
+to enumerate keys, which keeps this working on the file-based cache
+backend. The stamps have to be seen by every worker, so the cache is
+refused on a per-process backend (local memory).
+
+Responses also carry a strong ETag (hash of the rendered body) and a
+Last-Modified taken from the newest stamp among their tags. A post's stamp
+moves whenever the post is saved (its updated_at) or gets comment
+activity, and collection stamps move on any write to the collection. When
+a valid entry exists, If-None-Match / If-Modified-Since are answered with
+a 304 straight from the cache, before any query or serialization.
+
+A response is only stored if none of its tags moved while it was being
+built: the tags known before the view runs are snapshotted then and must
+still carry the same stamps, and the tags learnt from the data (categories
+and authors of the items) must not have been stamped since the view
+started. Otherwise a write committing between the view's queries and the
+store would leave its old content cached under the new stamps.
+"""
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+KEY_PREFIX = 'resp'
+TAG_PREFIX = 'resp-tag'
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 0)
+
+
+def check_shared_cache():
+    """
+    Refuse to cache responses in a per-process cache (called from
+    AppConfig.ready): a write would only invalidate the entries of the
+    worker that made it, and the others would serve stale responses.
+    """
+    if get_timeout() > 0 and isinstance(get_cache(), LocMemCache):
+        raise ImproperlyConfigured(
+            'RESPONSE_CACHE_TIMEOUT needs a cache shared between processes (Redis, Memcached, files); '
+            'set CACHE_BACKEND or RESPONSE_CACHE_TIMEOUT=0.'
+        )
+
+
+def _tag_key(tag):
+    return f'{TAG_PREFIX}:{tag}'
+
+
+def new_stamp(issued=None):
+    """A unique tag version that also records when it was issued."""
+    return f'{time.time() if issued is None else issued:.6f}:{uuid.uuid4().hex[:12]}'
+
+
+def stamp_time(stamp):
+    return float(stamp.split(':', 1)[0])
+
+
+def tag_versions(tags, create=False, issued=None):
+    """
+    Return the current stamp of each tag. With `create`, tags that have
+    no stamp yet (never seen, or evicted) are given one, dated `issued`.
+    """
+    cache = get_cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: value for key, value in found.items()}
+    if create:
+        for tag in tags:
+            if tag not in versions:
+                # add() keeps whichever writer got there first
+                cache.add(_tag_key(tag), new_stamp(issued), None)
+                versions[tag] = cache.get(_tag_key(tag))
+    return versions
+
+
+def invalidate_tags(tags):
+    """Give each tag a fresh stamp once the current transaction commits."""
+    tags = {tag for tag in tags if tag}
+    if not tags:
+        return
+
+    def bump():
+        get_cache().set_many({_tag_key(tag): new_stamp() for tag in tags}, None)
+
+    transaction.on_commit(bump)
+
+
+def visibility_class(user):
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    if user.is_author:
+        return f'author:{user.pk}'
+    return 'reader'
+
+
+def response_key(request):
+    query = '&'.join(sorted(request.META.get('QUERY_STRING', '').split('&')))
+    raw = '|'.join([
+        request.path,
+        query,
+        getattr(request, 'accepted_media_type', '') or '',
+        visibility_class(request.user),
+    ])
+    return f'{KEY_PREFIX}:{hashlib.sha256(raw.encode()).hexdigest()}'
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Clients may keep the body but must revalidate; content varies per
+    # caller and per negotiated format, as the cache key does
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Authorization', 'Accept'))
+
+
+def get_cached_response(request):
+    """
+    Return the cached response for `request` (or a 304 for it), or None
+    when there is no entry or one of its tags has moved on.
+    """
+    entry = get_cache().get(response_key(request))
+    if entry is None:
+        return None
+    versions, status, content_type, content, etag, last_modified = entry
+    if tag_versions(list(versions)) != versions:
+        return None
+    response = HttpResponse(content, status=status, content_type=content_type)
+    response['X-Cache'] = 'HIT'
+    set_validators(response, etag, last_modified)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+def snapshot_tags(tags):
+    """`(started, versions)` of `tags`, taken before a view reads the database."""
+    # At the precision of stamps, so tags dated `started` don't look newer
+    started = stamp_time(new_stamp())
+    return started, tag_versions(sorted(tags), create=True, issued=started)
+
+
+def tags_moved(snapshot, versions):
+    """Whether any tag in `versions` was invalidated since `snapshot` was taken."""
+    started, known = snapshot
+    if any(versions.get(tag) != stamp for tag, stamp in known.items()):
+        return True
+    return any(stamp_time(stamp) > started for stamp in versions.values())
+
+
+def finish_response(request, response, tags, snapshot=None):
+    """
+    Attach validators to a freshly rendered response, cache it unless one
+    of its tags moved since `snapshot` (see `snapshot_tags()`), and turn it
+    into a 304 when the client's copy is still current.
+    """
+    started = snapshot[0] if snapshot is not None else None
+    # Tags first seen now are dated back, so only real invalidations look newer
+    versions = tag_versions(sorted(tags), create=True, issued=started)
+    etag = quote_etag(hashlib.sha256(response.content).hexdigest()[:32])
+    last_modified = int(max((stamp_time(stamp) for stamp in versions.values()), default=time.time()))
+    set_validators(response, etag, last_modified)
+
+    timeout = get_timeout()
+    if timeout > 0 and snapshot is not None and not tags_moved(snapshot, versions):
+        entry = (versions, response.status_code, response['Content-Type'], response.content, etag, last_modified)
+        get_cache().set(response_key(request), entry, timeout)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+class CachedResponseMixin:
+    """
+    Serve `cache_actions` from the response cache for GET/HEAD requests,
+    with ETag/Last-Modified validation.
+
+    Views provide `get_cache_tags(data)` returning the tags the rendered
+    response depends on; signals invalidate those tags on writes. It is
+    also called with `data=None` before the view runs, for the tags known
+    from the request alone.
+    """
+    cache_actions = ('list', 'retrieve')
+
+    def is_cacheable(self, request):
+        return request.method in ('GET', 'HEAD') and self.action in self.cache_actions
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication and permissions run first so the visibility class is known
+        super().initial(request, *args, **kwargs)
+        cached = self.cached_response(request)
+        if cached is not None:
+            self.get = self.head = lambda *args, **kwargs: cached
+
+    def cached_response(self, request):
+        if not self.is_cacheable(request) or get_timeout() <= 0:
+            return None
+        cached = get_cached_response(request)
+        if cached is None:
+            self._tag_snapshot = snapshot_tags(self.get_cache_tags(None))
+        return cached
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (self.is_cacheable(request) and response.status_code == 200
+                and getattr(response, 'data', None) is not None):
+            tags = self.get_cache_tags(response.data)
+            snapshot = getattr(self, '_tag_snapshot', None)
+            response.add_post_render_callback(
+                lambda rendered: finish_response(request, rendered, tags, snapshot)
+            )
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def get_cache_tags(self, data):
+        return set()
+
+
+def items_of(data):
+    """The list of objects in a list, paginated or detail payload."""
+    if data is None:
+        return []
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return data['results']
+    if isinstance(data, list):
+        return data
+    return [data]
@@ -0,0 +1,300 @@
+"""
+Full-text search backends for posts.
+
+Each backend keeps an inverted index of Post title/excerpt/content in a side
+table that is updated from the Post save/delete signals, and knows how to
+narrow a Post queryset to the matching rows with a relevance rank and a
+highlighted snippet annotated on each result.
+
+    - SQLiteSearchBackend: FTS5 virtual table (development)
+    - PostgresSearchBackend: tsvector column with a GIN index (production)
+    - BasicSearchBackend: no index, falls back to icontains lookups
+
+The backend is picked from the database vendor unless BLOG_SEARCH_BACKEND
+points at a dotted path to a backend class.
+"""
+import itertools
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q, TextField
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+INDEX_BATCH_SIZE = 1000
+
+
+def _connection(schema_editor=None):
+    return schema_editor.connection if schema_editor is not None else connection
+
+
+def parse_terms(query):
+    """Split a raw search string into plain word tokens."""
+    return _TERM_RE.findall(query or '')
+
+
+def _index_rows(posts):
+    """Yield lists of `(id, title, excerpt, content)` rows in batches."""
+    rows = ((post.pk, post.title, post.excerpt or '', post.content or '') for post in posts)
+    while True:
+        batch = list(itertools.islice(rows, INDEX_BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+class BaseSearchBackend:
+    """
+    Interface shared by all search backends.
+    """
+    vendor = None
+
+    def setup(self, schema_editor=None):
+        """Create the index structures (called from migrations)."""
+
+    def teardown(self, schema_editor=None):
+        """Drop the index structures (called from migrations)."""
+
+    def index_post(self, post):
+        """Add or refresh a single post in the index."""
+
+    def remove_post(self, post_id):
+        """Drop a single post from the index."""
+
+    def index_posts(self, posts):
+        """Add or refresh an iterable of posts; returns how many were indexed."""
+        count = 0
+        for post in posts:
+            self.index_post(post)
+            count += 1
+        return count
+
+    def rebuild(self, posts):
+        """Re-index an iterable of posts from scratch."""
+        self.clear()
+        return self.index_posts(posts)
+
+    def clear(self):
+        """Remove every entry from the index."""
+
+    def search(self, queryset, query):
+        """
+        Return `queryset` narrowed to posts matching `query`, annotated with
+        `search_rank` (higher is better) and `search_snippet`.
+        """
+        raise NotImplementedError
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """
+    Unindexed fallback: every term must appear in title, excerpt or content.
+    """
+    fields = ('title', 'excerpt', 'content')
+
+    def search(self, queryset, query):
+        for term in parse_terms(query):
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset.annotate(
+            search_rank=RawSQL('0.0', [], output_field=FloatField()),
+            search_snippet=RawSQL("''", [], output_field=TextField()),
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 index. The virtual table keeps its own copy of the text so
+    rows can be replaced without knowing the previous values.
+    """
+    vendor = 'sqlite'
+    table = 'blog_api_post_fts'
+
+    def setup(self, schema_editor=None):
+        with _connection(schema_editor).cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                "USING fts5(title, excerpt, content, tokenize='porter unicode61')"
+            )
+
+    def teardown(self, schema_editor=None):
+        with _connection(schema_editor).cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, excerpt, content) VALUES (%s, %s, %s, %s)',
+                [post.pk, post.title, post.excerpt or '', post.content or ''],
+            )
+
+    def index_posts(self, posts):
+        count = 0
+        with connection.cursor() as cursor:
+            for batch in _index_rows(posts):
+                cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [[row[0]] for row in batch])
+                cursor.executemany(
+                    f'INSERT INTO {self.table} (rowid, title, excerpt, content) VALUES (%s, %s, %s, %s)',
+                    batch,
+                )
+                count += len(batch)
+        return count
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def build_match(self, query):
+        # Quote every term so user input can't inject FTS5 syntax; the last
+        # term is a prefix match to support search-as-you-type.
+        terms = parse_terms(query)
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def search(self, queryset, query):
+        match = self.build_match(query)
+        if match is None:
+            return queryset
+        table = self.table
+        post_table = queryset.model._meta.db_table
+        # bm25() returns lower-is-better scores; negate so higher is better.
+        # Column weights favour title over excerpt over content.
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT -bm25({table}, 10.0, 4.0, 1.0) FROM {table} '
+                f'WHERE {table} MATCH %s AND rowid = {post_table}.id',
+                [match],
+                output_field=FloatField(),
+            ),
+            search_snippet=RawSQL(
+                f"SELECT snippet({table}, -1, %s, %s, '…', 24) FROM {table} "
+                f'WHERE {table} MATCH %s AND rowid = {post_table}.id',
+                [HIGHLIGHT_START, HIGHLIGHT_STOP, match],
+                output_field=TextField(),
+            ),
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL tsvector index. Title, excerpt and content are weighted
+    A/B/C so title hits rank first.
+    """
+    vendor = 'postgresql'
+    table = 'blog_api_post_search'
+    config = 'english'
+
+    def setup(self, schema_editor=None):
+        with _connection(schema_editor).cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'post_id bigint PRIMARY KEY REFERENCES blog_api_post (id) '
+                'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_document_gin '
+                f'ON {self.table} USING GIN (document)'
+            )
+
+    def teardown(self, schema_editor=None):
+        with _connection(schema_editor).cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def upsert_sql(self):
+        return (
+            f'INSERT INTO {self.table} (post_id, document) VALUES (%s, '
+            f"setweight(to_tsvector('{self.config}', %s), 'A') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'B') || "
+            f"setweight(to_tsvector('{self.config}', %s), 'C')) "
+            'ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document'
+        )
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(self.upsert_sql(), [post.pk, post.title, post.excerpt or '', post.content or ''])
+
+    def index_posts(self, posts):
+        count = 0
+        with connection.cursor() as cursor:
+            for batch in _index_rows(posts):
+                cursor.executemany(self.upsert_sql(), batch)
+                count += len(batch)
+        return count
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE post_id = %s', [post_id])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def build_tsquery(self, query):
+        terms = parse_terms(query)
+        if not terms:
+            return None
+        terms[-1] += ':*'
+        return ' & '.join(terms)
+
+    def search(self, queryset, query):
+        tsquery = self.build_tsquery(query)
+        if tsquery is None:
+            return queryset
+        table = self.table
+        post_table = queryset.model._meta.db_table
+        to_query = f"to_tsquery('{self.config}', %s)"
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT post_id FROM {table} WHERE document @@ {to_query}', [tsquery])
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT ts_rank_cd(document, {to_query}) FROM {table} '
+                f'WHERE post_id = {post_table}.id',
+                [tsquery],
+                output_field=FloatField(),
+            ),
+            search_snippet=RawSQL(
+                f"ts_headline('{self.config}', {post_table}.content, {to_query}, %s)",
+                [tsquery, f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+                          'MaxWords=35, MinWords=15, MaxFragments=2'],
+                output_field=TextField(),
+            ),
+        )
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured search backend instance (cached per process)."""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'BLOG_SEARCH_BACKEND', '')
+        if path:
+            backend_class = import_string(path)
+        else:
+            backend_class = VENDOR_BACKENDS.get(connection.vendor, BasicSearchBackend)
+        _backend = backend_class()
+    return _backend
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt import serializers as jwt_serializers
+from ..tokens import RefreshToken
 
 User = get_user_model()
 
@@ -46,12 +48,21 @@ class UserProfileSerializer(serializers.ModelSerializer):
     """
     Detailed serializer for authenticated user's own profile.
     """
-    posts_count = serializers.SerializerMethodField()
-
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'is_author', 'created_at', 'posts_count')
         read_only_fields = ('id', 'username', 'created_at', 'posts_count')
 
-    def get_posts_count(self, obj):
-        return obj.posts.filter(status='published').count()
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """
+    Login serializer issuing refresh tokens with batched outstanding rows.
+    """
+    token_class = RefreshToken
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    Refresh serializer checking the blacklist through the in-memory filter.
+    """
+    token_class = RefreshToken
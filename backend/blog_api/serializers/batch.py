@@ -0,0 +1,31 @@
+from rest_framework import serializers
+from ..batch import get_max_requests
+
+
+class SubRequestSerializer(serializers.Serializer):
+    """
+    One call in a batch: an API path (with any query string) and, for
+    writes, its JSON body.
+    """
+    method = serializers.ChoiceField(choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE'))
+    path = serializers.RegexField(r'^/api/v1/[^#]*$', max_length=2000)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict) and isinstance(data.get('method'), str):
+            data = {**data, 'method': data['method'].upper()}
+        return super().to_internal_value(data)
+
+
+class BatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch requests.
+    """
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        limit = get_max_requests()
+        if len(value) > limit:
+            raise serializers.ValidationError(f'Ensure this list has no more than {limit} requests.')
+        return value
@@ -1,24 +1,45 @@
 from rest_framework import serializers
 from ..models import Comment
 from .auth import UserSerializer
+from ..fieldsets import SparseFieldsetMixin
+from ..threads import get_max_depth
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for Comment model.
+    `parent` is null for top-level comments.
     """
     author = UserSerializer(read_only=True)
+    compilable = True
     
     class Meta:
         model = Comment
-        fields = ('id', 'content', 'author', 'post', 'created_at')
-        read_only_fields = ('id', 'author', 'post', 'created_at')
+        fields = ('id', 'content', 'author', 'post', 'parent', 'depth', 'replies_count', 'created_at')
+        read_only_fields = ('id', 'author', 'post', 'parent', 'depth', 'replies_count', 'created_at')
 
 
 class CommentCreateSerializer(serializers.ModelSerializer):
     """
-    Serializer for creating comments.
+    Serializer for creating comments and replies.
+    The view puts the target post in the context as `post`.
     """
+    parent = serializers.PrimaryKeyRelatedField(
+        queryset=Comment.objects.all(), required=False, allow_null=True
+    )
+    
     class Meta:
         model = Comment
-        fields = ('content',)
+        fields = ('content', 'parent')
+    
+    def validate_parent(self, parent):
+        if parent is None:
+            return parent
+        post = self.context.get('post')
+        if post is not None and parent.post_id != post.pk:
+            raise serializers.ValidationError("Replies must be on the same post as their parent.")
+        if parent.depth + 1 >= get_max_depth():
+            raise serializers.ValidationError(
+                f"Replies can be nested at most {get_max_depth()} levels deep."
+            )
+        return parent
@@ -0,0 +1,220 @@
+"""
+Compiled serialization for hot list endpoints.
+
+`CompiledSerializer` turns a (possibly sparse) ModelSerializer into a flat
+list of per-field accessors once per class and field selection, then builds the nested output dicts
+straight from `.values()` rows: no model instances, no per-row field
+lookup, and a precomputed fast path for UTC ISO-8601 datetimes. The output
+renders to exactly the same JSON bytes as the regular serializer.
+
+Serializers opt in with `compilable = True`; `compiled_annotations` names
+queryset annotations copied into the output when present (e.g. search
+snippets).
+"""
+from datetime import timezone as dt_timezone
+from types import SimpleNamespace
+
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from ..fieldsets import serializer_projection
+from ..instrumentation import serialized, serializing
+
+ISO_8601 = 'iso-8601'
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def _identity(value):
+    return value
+
+
+def _compile_datetime(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if (output_format is None or output_format.lower() != ISO_8601
+            or field_timezone is None or field_timezone.utcoffset(None) != dt_timezone.utc.utcoffset(None)):
+        return None
+
+    def to_iso(value):
+        if isinstance(value, str):
+            return value
+        if value.tzinfo is None:
+            # What the field's enforce_timezone() does in UTC
+            value = value.replace(tzinfo=dt_timezone.utc)
+        elif value.utcoffset():
+            value = value.astimezone(dt_timezone.utc)
+        text = value.isoformat()
+        if text.endswith('+00:00'):
+            text = text[:-6] + 'Z'
+        return text
+    return to_iso
+
+
+def _compile_value(field):
+    """A converter for the field's non-null values, or None to use the field's own."""
+    if isinstance(field, serializers.DateTimeField):
+        return _compile_datetime(field)
+    if isinstance(field, serializers.CharField):
+        return lambda value: value if type(value) is str else str(value)
+    if isinstance(field, (serializers.BooleanField, serializers.PrimaryKeyRelatedField)):
+        if getattr(field, 'pk_field', None) is not None:
+            raise NotCompilable(field)
+        return _identity
+    if isinstance(field, serializers.IntegerField):
+        return int
+    if isinstance(field, serializers.RelatedField):
+        raise NotCompilable(field)
+    return None
+
+
+def _compile_fields(serializer, prefix):
+    """
+    Return a list of `(key, getter)` pairs, getter taking a values() row and
+    the serializer being compiled for (or the nested one at its level). The
+    getters keep no serializer or field instance, so one plan serves every
+    request, each with its own serializer context.
+    """
+    projection_fields = getattr(serializer, 'projection_fields', {})
+    getters = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.SerializerMethodField):
+            method = getattr(type(serializer), field.method_name)
+            sources = [(source, f'{prefix}{source}') for source in projection_fields[name]]
+            getters.append((name, _method_getter(method, sources)))
+        elif isinstance(field, serializers.BaseSerializer):
+            if isinstance(field, serializers.ListSerializer):
+                raise NotCompilable(field)
+            path = f'{prefix}{field.source}'
+            getters.append((name, _nested_getter(path, name, _compile_fields(field, f'{path}__'))))
+        else:
+            convert = _compile_value(field)
+            path = f'{prefix}{field.source}'
+            if convert is None:
+                getters.append((name, _field_getter(path, name)))
+            else:
+                getters.append((name, _value_getter(path, convert)))
+    return getters
+
+
+def _value_getter(path, convert):
+    def get(row, serializer):
+        value = row[path]
+        return None if value is None else convert(value)
+    return get
+
+
+def _field_getter(path, name):
+    def get(row, serializer):
+        value = row[path]
+        return None if value is None else serializer.fields[name].to_representation(value)
+    return get
+
+
+def _nested_getter(path, name, getters):
+    def get(row, serializer):
+        if row[path] is None:
+            return None
+        nested = serializer.fields[name]
+        return {key: getter(row, nested) for key, getter in getters}
+    return get
+
+
+def _method_getter(func, sources):
+    def get(row, serializer):
+        return func(serializer, SimpleNamespace(**{attr: row[path] for attr, path in sources}))
+    return get
+
+
+class CompiledPlan:
+    """
+    The columns and getters for one serializer class and field selection.
+    """
+    def __init__(self, serializer, required=()):
+        projection = serializer_projection(serializer)
+        if projection is None:
+            raise NotCompilable(serializer)
+        self.paths = sorted(set(projection[0]) | set(required))
+        self.getters = _compile_fields(serializer, '')
+        self.annotations = tuple(getattr(serializer, 'compiled_annotations', ()))
+
+
+class CompiledSerializer:
+    """
+    Values-based equivalent of a ModelSerializer instance: a shared plan
+    run with that instance (and so its context).
+    """
+    def __init__(self, plan, serializer):
+        self.plan = plan
+        self.serializer = serializer
+
+    def values(self, queryset):
+        """Return `(rows, annotations)`: the values() queryset to page over,
+        and the annotations it carries that belong in the output."""
+        annotations = tuple(name for name in self.plan.annotations if name in queryset.query.annotations)
+        return queryset.values(*self.plan.paths, *annotations), annotations
+
+    def to_representation(self, row, annotations=()):
+        serializer = self.serializer
+        data = {key: getter(row, serializer) for key, getter in self.plan.getters}
+        for name in annotations:
+            if row[name] is not None:
+                data[name] = row[name]
+        return data
+
+    def serialize(self, rows, annotations=()):
+        with serializing():
+            return [self.to_representation(row, annotations) for row in rows]
+
+
+_compiled = {}
+
+
+def get_compiled_serializer(serializer, required=()):
+    """
+    Return a CompiledSerializer for `serializer`, or None when it (or the
+    COMPILED_SERIALIZERS setting) doesn't allow it. Plans are cached per
+    serializer class and field selection.
+    """
+    if not getattr(settings, 'COMPILED_SERIALIZERS', True) or not getattr(serializer, 'compilable', False):
+        return None
+    key = (type(serializer), tuple(serializer.fields), tuple(required))
+    if key not in _compiled:
+        try:
+            _compiled[key] = CompiledPlan(serializer, required)
+        except NotCompilable:
+            _compiled[key] = None
+    plan = _compiled[key]
+    return None if plan is None else CompiledSerializer(plan, serializer)
+
+
+class CompiledListMixin:
+    """
+    View mixin serving list responses through the compiled serializer when
+    the list serializer supports it, and through DRF otherwise.
+    """
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset):
+        serializer = self.get_serializer(many=True)
+        compiled = get_compiled_serializer(
+            serializer.child, getattr(self, 'projection_required', ())
+        )
+        if compiled is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(serialized(self.get_serializer(page, many=True)))
+            return Response(serialized(self.get_serializer(queryset, many=True)))
+
+        rows, annotations = compiled.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page, annotations))
+        return Response(compiled.serialize(rows, annotations))
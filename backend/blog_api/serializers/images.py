@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from .. import images
+from ..models import PostImage
+
+
+class PostImageSerializer(serializers.ModelSerializer):
+    """
+    Serializer for image uploads. Saving stores the file once per content
+    and returns the existing image when the same file was uploaded before.
+    """
+    file = serializers.ImageField(write_only=True)
+    id = serializers.CharField(source='digest', read_only=True)
+    url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PostImage
+        fields = ('id', 'file', 'url', 'srcset', 'width', 'height', 'format', 'created_at')
+        read_only_fields = ('id', 'width', 'height', 'format', 'created_at')
+
+    def get_url(self, obj):
+        return images.default_url(obj.digest, obj.width)
+
+    def get_srcset(self, obj):
+        return images.srcset(obj.digest, obj.width)
+
+    def validate_file(self, value):
+        limit = getattr(settings, 'IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+        if value.size > limit:
+            raise serializers.ValidationError(f"Ensure the image is no larger than {limit} bytes.")
+        # Read from the header by ImageField; decoding is what takes memory
+        width, height = value.image.size
+        limit = images.get_max_pixels()
+        if width * height > limit:
+            raise serializers.ValidationError(f"Ensure the image has no more than {limit} pixels.")
+        return value
+
+    def create(self, validated_data):
+        file = validated_data['file']
+        digest = images.digest_file(file)
+        image = PostImage.objects.filter(pk=digest).first()
+        self.created = image is None
+        if image is not None:
+            return image
+
+        width, height, image_format = images.save_original(file, digest)
+        image, self.created = PostImage.objects.get_or_create(digest=digest, defaults={
+            'width': width, 'height': height, 'format': image_format,
+            'uploaded_by': validated_data.get('uploaded_by'),
+        })
+        if self.created:
+            transaction.on_commit(lambda: images.schedule(digest, width))
+        return image
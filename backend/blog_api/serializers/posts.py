@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from ..models import Post, Category
+from .. import images
+from ..models import Post, Category, PostImage
+from ..fieldsets import SparseFieldsetMixin
+from ..slugs import title_key
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -10,6 +13,7 @@ class UserSerializer(serializers.ModelSerializer):
     Serializer for User model in posts.
     """
     display_name = serializers.SerializerMethodField()
+    projection_fields = {'display_name': ('first_name', 'last_name', 'username')}
     
     class Meta:
         model = User
@@ -37,34 +41,53 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'slug', 'created_at')
 
 
-class PostListSerializer(serializers.ModelSerializer):
+class PostListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for listing posts (minimal data).
     """
     author = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
+    image_srcset = serializers.SerializerMethodField()
+    projection_fields = {'image_srcset': ('image_digest', 'image_width')}
+    compilable = True
+    compiled_annotations = ('search_snippet',)
     
     class Meta:
         model = Post
-        fields = ('id', 'title', 'slug', 'excerpt', 'author', 'category', 'image', 'status', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'slug', 'created_at', 'updated_at')
+        fields = ('id', 'title', 'slug', 'excerpt', 'author', 'category', 'image', 'image_srcset', 'status', 'reading_time', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'slug', 'reading_time', 'created_at', 'updated_at')
 
+    def get_image_srcset(self, obj):
+        # {"webp": srcset, "jpeg": srcset} of uploaded images, null for image URLs
+        return images.srcset(obj.image_digest, obj.image_width)
 
-class PostDetailSerializer(serializers.ModelSerializer):
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Search results carry a highlighted snippet from the full-text index
+        snippet = getattr(instance, 'search_snippet', None)
+        if snippet is not None:
+            data['search_snippet'] = snippet
+        return data
+
+
+class PostDetailSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for post detail (full data).
     """
     author = UserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
-    comments_count = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    projection_fields = {'image_srcset': ('image_digest', 'image_width')}
+    compilable = True
     
     class Meta:
         model = Post
-        fields = ('id', 'title', 'slug', 'content', 'excerpt', 'author', 'category', 'image', 'status', 'created_at', 'updated_at', 'comments_count')
-        read_only_fields = ('id', 'slug', 'author', 'created_at', 'updated_at', 'comments_count')
-    
-    def get_comments_count(self, obj):
-        return obj.comments.count()
+        fields = ('id', 'title', 'slug', 'content', 'content_html', 'content_toc', 'word_count', 'reading_time', 'excerpt', 'author', 'category', 'image', 'image_srcset', 'status', 'created_at', 'updated_at', 'comments_count')
+        # content_html, content_toc, word_count and reading_time are rendered on save (blog_api.rendering)
+        read_only_fields = ('id', 'slug', 'content_html', 'content_toc', 'word_count', 'reading_time', 'author', 'created_at', 'updated_at', 'comments_count')
+
+    def get_image_srcset(self, obj):
+        return images.srcset(obj.image_digest, obj.image_width)
 
 
 class PostCreateUpdateSerializer(serializers.ModelSerializer):
@@ -76,18 +99,46 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
         source='category',
         write_only=True
     )
+    # An uploaded image (POST /api/v1/images/); sets `image` to its URL
+    image_id = serializers.PrimaryKeyRelatedField(
+        queryset=PostImage.objects.all(),
+        required=False,
+        allow_null=True,
+        write_only=True
+    )
     
     class Meta:
         model = Post
-        fields = ('title', 'content', 'excerpt', 'category_id', 'image', 'status')
+        fields = ('title', 'content', 'excerpt', 'category_id', 'image', 'image_id', 'status')
     
     def validate_title(self, value):
-        # Check for duplicate titles (excluding current instance on update)
-        instance = self.instance
-        if instance:
-            if Post.objects.exclude(pk=instance.pk).filter(title=value).exists():
-                raise serializers.ValidationError("A post with this title already exists.")
-        else:
-            if Post.objects.filter(title=value).exists():
-                raise serializers.ValidationError("A post with this title already exists.")
+        # NFKC and case folding can lengthen a title past what its key's
+        # column holds (one 'ﷺ' becomes 18 characters)
+        key = title_key(value)
+        limit = Post._meta.get_field('title_key').max_length
+        if len(key) > limit:
+            raise serializers.ValidationError(
+                f"Ensure this title has no more than {limit} characters once normalized."
+            )
+        # Check for duplicate titles, ignoring case and spacing (excluding
+        # current instance on update); one lookup on the title_key index
+        posts = Post.objects.filter(title_key=key)
+        if self.instance:
+            posts = posts.exclude(pk=self.instance.pk)
+        if posts.exists():
+            raise serializers.ValidationError("A post with this title already exists.")
         return value
+
+    def validate(self, attrs):
+        if 'image_id' in attrs:
+            image = attrs.pop('image_id')
+            attrs['image_digest'] = image.digest if image else ''
+            attrs['image_width'] = image.width if image else None
+            if image:
+                attrs['image'] = images.default_url(image.digest, image.width)
+            else:
+                attrs.setdefault('image', None)
+        elif 'image' in attrs:
+            # A plain image URL replaces an uploaded image
+            attrs['image_digest'], attrs['image_width'] = '', None
+        return attrs
@@ -0,0 +1,176 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from .models import Category, Comment, Post, User
+from .search import get_search_backend
+from .response_cache import invalidate_tags
+from .live import publish_comment_event
+from .authentication import invalidate_user
+from . import counters, feed, popularity, related
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, raw=False, **kwargs):
+    """Keep the full-text index in step with saved posts."""
+    if raw:
+        return
+    get_search_backend().index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """Drop deleted posts from the full-text index."""
+    get_search_backend().remove_post(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def update_related_posts(sender, instance, created, raw=False, **kwargs):
+    """Patch the related-posts index when a published post's text changes."""
+    # Decided now, while the instance still holds the values it was loaded with
+    if raw or not related.needs_update(instance, created):
+        return
+    related.schedule(related.update_post, instance.pk, created)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_related_listings(sender, instance, **kwargs):
+    # The cascade removes these rows before post_delete
+    instance._related_listed_by = related.listing_posts(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def refill_related_posts(sender, instance, **kwargs):
+    related.schedule(related.post_deleted, getattr(instance, '_related_listed_by', ()))
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_counter_state(sender, instance, raw=False, **kwargs):
+    # Post.save() runs in a transaction, which keeps the row locked
+    if raw:
+        return
+    instance._counter_state = counters.locked_post_state(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_post_counters(sender, instance, raw=False, **kwargs):
+    """Move published-post counts when status, category or author change."""
+    if raw:
+        return
+    new_state = counters.post_state(instance)
+    old_state = getattr(instance, '_counter_state', None)
+    counters.post_changed(old_state, new_state)
+    if old_state and old_state['category_id'] != new_state['category_id']:
+        popularity.post_moved(instance.pk, new_state['category_id'])
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_state(sender, instance, **kwargs):
+    # Deletes run in a transaction too
+    instance._counter_state = counters.locked_post_state(instance)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_counters(sender, instance, **kwargs):
+    counters.post_changed(getattr(instance, '_counter_state', None), None)
+
+
+@receiver(post_save, sender=Comment)
+def count_new_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.comment_changed(instance.post_id, 1)
+        counters.reply_changed(instance.parent_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.comment_changed(instance.post_id, -1)
+    # A no-op when the parent is going away in the same cascade
+    counters.reply_changed(instance.parent_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def broadcast_saved_comment(sender, instance, created, raw=False, **kwargs):
+    """Push new and edited comments to live streams."""
+    if raw:
+        return
+    publish_comment_event(instance, 'comment.created' if created else 'comment.updated')
+
+
+@receiver(post_delete, sender=Comment)
+def broadcast_deleted_comment(sender, instance, **kwargs):
+    publish_comment_event(instance, 'comment.deleted')
+
+
+def _post_cache_tags(post, *states):
+    tags = {'posts', 'categories', f'post:{post.slug}', f'author:{post.author_id}'}
+    category_ids = {state['category_id'] for state in states if state}
+    for slug in Category.objects.filter(pk__in=category_ids).values_list('slug', flat=True):
+        tags.add(f'posts:category:{slug}')
+    username = User.objects.filter(pk=post.author_id).values_list('username', flat=True).first()
+    if username:
+        tags.add(f'posts:author:{username}')
+    return tags
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_state = getattr(instance, '_counter_state', None)
+    invalidate_tags(_post_cache_tags(instance, old_state, counters.post_state(instance)))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance, **kwargs):
+    invalidate_tags(_post_cache_tags(instance, counters.post_state(instance)))
+
+
+# Registered after the counter receivers so category counts are current
+@receiver(post_save, sender=Post)
+def update_feed_for_saved_post(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    feed.post_changed(instance, getattr(instance, '_counter_state', None), counters.post_state(instance))
+
+
+@receiver(post_delete, sender=Post)
+def update_feed_for_deleted_post(sender, instance, **kwargs):
+    feed.post_changed(instance, counters.post_state(instance), None)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_post(sender, instance, raw=False, **kwargs):
+    """Comments change the post detail's comments_count."""
+    if raw:
+        return
+    if Comment.post.is_cached(instance):
+        slug = instance.post.slug
+    else:
+        slug = Post.objects.filter(pk=instance.post_id).values_list('slug', flat=True).first()
+    invalidate_tags([f'post:{slug}'] if slug else [])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_tags(['categories', f'category:{instance.slug}'])
+        feed.categories_changed()
+
+
+@receiver(post_save, sender=User)
+def invalidate_author(sender, instance, created=False, raw=False, **kwargs):
+    """Nested author data (display name, is_author) appears in post payloads."""
+    if not raw:
+        invalidate_tags([f'author:{instance.pk}'])
+        if not created:
+            feed.author_changed(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, raw=False, **kwargs):
+    """Profile, password and is_author changes must reach the auth cache."""
+    if raw:
+        return
+    invalidate_user(instance.pk)
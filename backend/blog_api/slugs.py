@@ -0,0 +1,55 @@
+"""
+Title keys and slug allocation for posts.
+
+`title_key()` is the form titles are compared in: Unicode-normalized
+(NFKC), case-folded, with runs of whitespace collapsed. It is stored in the
+indexed `Post.title_key`, so the duplicate-title check is one index lookup.
+
+`allocate_slug()` gives a new post the slug of its title, or the next free
+`<slug>-<n>` when that is taken. Taken slugs of a title are `<slug>` and
+`<slug>-…`, which sort together between `<slug>` and `<slug>.` (slugs hold
+no other character below '.'), so the highest suffix in use is found with
+one range scan of the slug index. A `<slug>-<n>` only counts as a suffix
+when its post's title has the same base slug: "Foo 2024" owns `foo-2024`
+outright, and a new "Foo" after it is still `foo`. Two concurrent creates
+can still pick the same slug; the second insert then fails on the unique
+index and `Post.save()` allocates again, seeing the first one's row.
+"""
+import re
+import unicodedata
+
+from django.utils.text import slugify
+
+# Room kept at the end of the slug for a `-<n>` suffix
+SUFFIX_LENGTH = 10
+FALLBACK_SLUG = 'post'
+
+
+def title_key(title):
+    """The normalized form of `title` used to find duplicates."""
+    return ' '.join(unicodedata.normalize('NFKC', title or '').casefold().split())
+
+
+def base_slug(title, max_length):
+    slug = slugify(title)[:max_length - SUFFIX_LENGTH].strip('-_')
+    return slug or FALLBACK_SLUG
+
+
+def allocate_slug(queryset, title, max_length=200):
+    """A slug for `title` that no row of `queryset` uses."""
+    base = base_slug(title, max_length)
+    taken = dict(queryset.filter(
+        slug__gte=base, slug__lt=f'{base}.', slug__regex=rf'^{re.escape(base)}(-[0-9]+)?$'
+    ).order_by().values_list('slug', 'title'))
+    # Slugs given out as suffixes of `base`, not ones ending in a number of
+    # their own title (a post keeps its slug when its title is edited)
+    suffixes = [
+        int(slug[len(base) + 1:] or 1) for slug, other in taken.items()
+        if slug == base or base_slug(other, max_length) == base
+    ]
+    if not suffixes:
+        return base
+    suffix = max(suffixes) + 1
+    while f'{base}-{suffix}' in taken:
+        suffix += 1
+    return f'{base}-{suffix}'
@@ -0,0 +1,373 @@
+"""
+Deterministic synthetic dataset generator for load testing.
+
+Used by `seed_data --users/--posts/--comments` and the performance suite.
+The same seed always produces the same users, posts and comments:
+markdown articles of realistic length, authors and categories picked with
+a Zipf-like skew (a few prolific authors and popular sections), and
+comments concentrated on a minority of posts.
+
+Rows are written with batched `bulk_create` calls, one transaction per
+batch. Because bulk_create skips model signals, the denormalized counters
+are computed up front and stored with the rows, and the search index,
+related posts, home feed and response cache are brought up to date at the
+end. Published posts get
+read counts that loosely follow their comments, ranked as if read the day
+after they were posted.
+"""
+import itertools
+import math
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import F
+from django.utils.text import slugify
+
+from .models import Category, Comment, Post, PostRanking, User, comment_root_path
+from .feed import rebuild as rebuild_feed
+from .popularity import log_weight
+from .related import rebuild as rebuild_related
+from .rendering import content_hash, render
+from .response_cache import invalidate_tags
+from .search import get_search_backend
+from .slugs import title_key
+
+# Fixed anchor so timestamps are reproducible; posts span the years before it
+ANCHOR = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+SPAN = timedelta(days=3 * 365)
+
+AUTHOR_RATIO = 10  # one author per this many users
+PUBLISHED_RATIO = 0.9
+ZIPF_EXPONENT = 1.1
+COMMENT_ZIPF_EXPONENT = 0.8  # flatter: many posts get a few comments
+SAMPLE_CHUNK = 100_000
+
+CATEGORY_NAMES = [
+    'Architecture', 'Art', 'Design', 'Fashion', 'Food',
+    'Photography', 'Technology', 'Travel', 'Culture',
+    'Lifestyle', 'Music', 'Science',
+]
+
+FIRST_NAMES = [
+    'Ava', 'Ben', 'Chloe', 'Daniel', 'Elena', 'Felix', 'Grace', 'Hugo', 'Iris', 'Jonas',
+    'Kira', 'Leo', 'Maya', 'Noah', 'Olive', 'Priya', 'Quinn', 'Rosa', 'Sami', 'Theo',
+    'Uma', 'Victor', 'Wren', 'Yara', 'Zane', '',
+]
+LAST_NAMES = [
+    'Abbott', 'Bishop', 'Castillo', 'Dubois', 'Eriksen', 'Fischer', 'Garcia', 'Hoffman',
+    'Ito', 'Jensen', 'Kowalski', 'Larsen', 'Moreau', 'Nakamura', 'Okafor', 'Petrov',
+    'Quispe', 'Rossi', 'Schmidt', 'Tanaka', 'Usman', 'Varga', 'Weber', 'Yilmaz', '',
+]
+
+ADJECTIVES = [
+    'quiet', 'hidden', 'modern', 'forgotten', 'radical', 'slow', 'digital', 'analog',
+    'urban', 'coastal', 'minimal', 'vivid', 'honest', 'fragile', 'restless', 'sustainable',
+    'ancient', 'curious', 'unexpected', 'luminous', 'brutal', 'gentle', 'nomadic', 'open',
+]
+NOUNS = [
+    'cities', 'kitchens', 'cameras', 'gardens', 'machines', 'studios', 'rivers', 'markets',
+    'archives', 'songs', 'materials', 'islands', 'libraries', 'algorithms', 'textiles',
+    'bridges', 'galleries', 'harbors', 'forests', 'workshops', 'signals', 'streets', 'rooms',
+]
+TITLE_PATTERNS = [
+    'The {adj} {noun} of {place}',
+    'Why {adj} {noun} matter again',
+    'Notes on {adj} {noun}',
+    'Inside the {adj} {noun}',
+    'What {noun} teach us about {topic}',
+    'A field guide to {adj} {noun}',
+    'Rethinking {topic}: {adj} {noun}',
+]
+PLACES = [
+    'Lisbon', 'Kyoto', 'Oaxaca', 'Reykjavik', 'Marrakesh', 'Tallinn', 'Hanoi', 'Detroit',
+    'Valparaiso', 'Tbilisi', 'Lagos', 'Copenhagen', 'Montreal', 'Busan', 'Porto',
+]
+WORDS = (
+    'light space form material craft memory texture rhythm structure city people work time '
+    'design process tradition future history practice community value object idea story '
+    'culture system image sound color surface scale pattern change question detail balance '
+    'technology nature energy movement place attention language habit ritual tool method '
+    'archive landscape market season flavor journey experiment frame shadow echo signal'
+).split()
+VERBS = (
+    'shapes reveals questions reframes connects invites sustains transforms holds reflects '
+    'challenges balances carries softens sharpens rewards explores'
+).split()
+CONNECTORS = ['and', 'but', 'while', 'because', 'so', 'yet', 'even as', 'until']
+COMMENT_OPENERS = [
+    'Great piece.', 'This resonates with me.', 'Interesting perspective.', 'I disagree a little.',
+    'Thanks for writing this.', 'Beautifully put.', 'Sharing this with my team.', 'Fascinating.',
+]
+
+PASSWORD_HASH = None
+
+
+def _zipf_cum_weights(count, rng, exponent=ZIPF_EXPONENT):
+    """Cumulative Zipf-like weights over `count` items in a random rank order."""
+    ranks = list(range(count))
+    rng.shuffle(ranks)
+    weights = [0.0] * count
+    for rank, index in enumerate(ranks):
+        weights[index] = 1.0 / (rank + 1) ** exponent
+    return list(itertools.accumulate(weights))
+
+
+def _sample(rng, count, cum_weights, k):
+    """Yield `k` skewed picks from range(count) without building one huge list."""
+    population = range(count)
+    while k > 0:
+        size = min(k, SAMPLE_CHUNK)
+        yield from rng.choices(population, cum_weights=cum_weights, k=size)
+        k -= size
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let generated created_at/updated_at values through auto_now(_add)."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticDataGenerator:
+    """
+    Generates `users`, `posts` and `comments` rows for `seed`.
+    `progress(label, done, total)` is called after every batch.
+    """
+    def __init__(self, seed=42, batch_size=2000, progress=None):
+        self.seed = seed
+        self.batch_size = batch_size
+        self.progress = progress or (lambda label, done, total: None)
+        self.rng = random.Random(seed)
+        self.prefix = f's{seed}'
+
+    # Text -----------------------------------------------------------------
+
+    def _sentence(self, rng):
+        words = rng.choices(WORDS, k=rng.randint(4, 9))
+        sentence = f'{words[0].capitalize()} {rng.choice(VERBS)} {" ".join(words[1:])}'
+        if rng.random() < 0.4:
+            sentence += f' {rng.choice(CONNECTORS)} {" ".join(rng.choices(WORDS, k=rng.randint(3, 7)))}'
+        return sentence + '.'
+
+    def _build_pools(self):
+        rng = random.Random(self.seed * 7919 + 1)
+        self.paragraphs = [
+            ' '.join(self._sentence(rng) for _ in range(rng.randint(3, 7)))
+            for _ in range(600)
+        ]
+        self.headings = [
+            f'{rng.choice(ADJECTIVES).capitalize()} {rng.choice(NOUNS)}' for _ in range(200)
+        ]
+        self.comment_sentences = [self._sentence(rng) for _ in range(300)]
+
+    def title(self):
+        rng = self.rng
+        return rng.choice(TITLE_PATTERNS).format(
+            adj=rng.choice(ADJECTIVES), noun=rng.choice(NOUNS),
+            place=rng.choice(PLACES), topic=rng.choice(WORDS),
+        ).capitalize()
+
+    def content(self):
+        """Markdown article of a few hundred to ~1500 words."""
+        rng = self.rng
+        parts = [rng.choice(self.paragraphs)]
+        for _ in range(rng.randint(3, 7)):
+            parts.append(f'## {rng.choice(self.headings)}')
+            parts.extend(rng.choices(self.paragraphs, k=rng.randint(1, 4)))
+            if rng.random() < 0.25:
+                parts.append('\n'.join(f'- {rng.choice(self.comment_sentences)}' for _ in range(3)))
+        return '\n\n'.join(parts)
+
+    def comment(self):
+        rng = self.rng
+        return ' '.join([rng.choice(COMMENT_OPENERS)] + rng.choices(self.comment_sentences, k=rng.randint(0, 2)))
+
+    # Generation -----------------------------------------------------------
+
+    def generate(self, users, posts, comments):
+        global PASSWORD_HASH
+        if PASSWORD_HASH is None:
+            PASSWORD_HASH = make_password('demo123')
+        self._build_pools()
+        rng = self.rng
+
+        categories = [
+            Category.objects.get_or_create(slug=slugify(name), defaults={'name': name})[0]
+            for name in CATEGORY_NAMES
+        ]
+        authors = max(1, users // AUTHOR_RATIO) if users else 0
+
+        # Decide who wrote what first so counters can be stored with the rows
+        author_weights = _zipf_cum_weights(authors, rng) if authors else None
+        category_weights = _zipf_cum_weights(len(categories), rng)
+        post_authors = array('I', _sample(rng, authors, author_weights, posts))
+        post_categories = array('B', _sample(rng, len(categories), category_weights, posts))
+        post_published = array('B', (rng.random() < PUBLISHED_RATIO for _ in range(posts)))
+
+        author_counts = [0] * authors
+        category_counts = [0] * len(categories)
+        for author, category, published in zip(post_authors, post_categories, post_published):
+            if published:
+                author_counts[author] += 1
+                category_counts[category] += 1
+
+        comment_counts = array('I', [0]) * posts
+        if comments:
+            for post in _sample(rng, posts, _zipf_cum_weights(posts, rng, COMMENT_ZIPF_EXPONENT), comments):
+                comment_counts[post] += 1
+
+        user_ids = self.create_users(users, authors, author_counts)
+        post_ids, post_times = self.create_posts(
+            posts, user_ids, categories, post_authors, post_categories, post_published, comment_counts
+        )
+        self.create_comments(comments, user_ids, post_ids, post_times, comment_counts)
+        self.create_views(post_ids, post_times, post_published, comment_counts, categories, post_categories)
+
+        for category, count in zip(categories, category_counts):
+            if count:
+                Category.objects.filter(pk=category.pk).update(posts_count=F('posts_count') + count)
+
+        if post_ids:
+            get_search_backend().index_posts(
+                Post.objects.filter(pk__gte=min(post_ids)).only('id', 'title', 'excerpt', 'content')
+                .iterator(chunk_size=self.batch_size)
+            )
+            rebuild_related()
+        rebuild_feed()
+        invalidate_tags(
+            {'posts', 'categories'} | {f'posts:category:{category.slug}' for category in categories}
+        )
+        return {'users': len(user_ids), 'posts': len(post_ids), 'comments': comments}
+
+    def _batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def create_users(self, count, authors, author_counts):
+        rng = self.rng
+        ids = []
+        span = SPAN + timedelta(days=365)
+        with explicit_timestamps(User._meta.get_field('created_at')):
+            for start, end in self._batches(count):
+                batch = []
+                for i in range(start, end):
+                    joined = ANCHOR - span + span * (i / max(count, 1))
+                    batch.append(User(
+                        username=f'{self.prefix}_user_{i:07d}',
+                        email=f'{self.prefix}_user_{i}@example.com',
+                        first_name=rng.choice(FIRST_NAMES),
+                        last_name=rng.choice(LAST_NAMES),
+                        password=PASSWORD_HASH,
+                        is_author=i < authors,
+                        posts_count=author_counts[i] if i < authors else 0,
+                        date_joined=joined,
+                        created_at=joined,
+                    ))
+                with transaction.atomic():
+                    ids.extend(user.pk for user in User.objects.bulk_create(batch))
+                self.progress('users', end, count)
+        return ids
+
+    def create_posts(self, count, user_ids, categories, post_authors, post_categories,
+                     post_published, comment_counts):
+        rng = self.rng
+        ids = array('q')
+        times = array('d')
+        fields = (Post._meta.get_field('created_at'), Post._meta.get_field('updated_at'))
+        with explicit_timestamps(*fields):
+            for start, end in self._batches(count):
+                batch = []
+                for i in range(start, end):
+                    title = self.title()
+                    content = self.content()
+                    rendered = render(content)
+                    created = ANCHOR - SPAN + SPAN * (i / count) + timedelta(seconds=rng.randint(0, 3600))
+                    updated = created + timedelta(hours=rng.expovariate(1 / 48)) if rng.random() < 0.3 else created
+                    batch.append(Post(
+                        title=title,
+                        title_key=title_key(title),
+                        slug=f'{slugify(title)[:170]}-{self.prefix}-{i}',
+                        content=content,
+                        excerpt=rendered.excerpt,
+                        content_html=rendered.html,
+                        content_toc=rendered.toc,
+                        word_count=rendered.word_count,
+                        reading_time=rendered.reading_time,
+                        content_hash=content_hash(content),
+                        status='published' if post_published[i] else 'draft',
+                        author_id=user_ids[post_authors[i]],
+                        category=categories[post_categories[i]],
+                        image=f'https://picsum.photos/seed/{self.prefix}-{i}/1200/800' if rng.random() < 0.8 else None,
+                        comments_count=comment_counts[i],
+                        created_at=created,
+                        updated_at=updated,
+                    ))
+                    times.append(created.timestamp())
+                with transaction.atomic():
+                    ids.extend(post.pk for post in Post.objects.bulk_create(batch))
+                self.progress('posts', end, count)
+        return ids, times
+
+    def create_comments(self, count, user_ids, post_ids, post_times, comment_counts):
+        rng = self.rng
+        users = len(user_ids)
+        created_field = Comment._meta.get_field('created_at')
+        batch = []
+        done = 0
+        with explicit_timestamps(created_field):
+            for index, post_id in enumerate(post_ids):
+                posted = post_times[index]
+                for _ in range(comment_counts[index]):
+                    offset = min(rng.expovariate(1 / (3 * 86400)), ANCHOR.timestamp() - posted)
+                    batch.append(Comment(
+                        post_id=post_id,
+                        author_id=user_ids[rng.randrange(users)],
+                        content=self.comment(),
+                        created_at=datetime.fromtimestamp(posted + max(offset, 0), dt_timezone.utc),
+                    ))
+                    if len(batch) >= self.batch_size:
+                        self._insert_comments(batch)
+                        done += len(batch)
+                        batch = []
+                        self.progress('comments', done, count)
+            if batch:
+                self._insert_comments(batch)
+                done += len(batch)
+                self.progress('comments', done, count)
+
+    def create_views(self, post_ids, post_times, post_published, comment_counts, categories, post_categories):
+        rng = self.rng
+        for start, end in self._batches(len(post_ids)):
+            posts, rankings = [], []
+            for i in range(start, end):
+                if not post_published[i]:
+                    continue
+                views = (comment_counts[i] + 1) * rng.randint(20, 200)
+                read_at = datetime.fromtimestamp(post_times[i], dt_timezone.utc) + timedelta(days=1)
+                posts.append(Post(pk=post_ids[i], views_count=views))
+                rankings.append(PostRanking(
+                    post_id=post_ids[i],
+                    category=categories[post_categories[i]],
+                    score=math.log2(views) + log_weight(read_at),
+                    updated_at=read_at,
+                ))
+            with transaction.atomic():
+                Post.objects.bulk_update(posts, ['views_count'])
+                PostRanking.objects.bulk_create(rankings)
+            self.progress('views', end, len(post_ids))
+
+    def _insert_comments(self, batch):
+        # Generated comments are all top-level; their path is their own id
+        with transaction.atomic():
+            created = Comment.objects.bulk_create(batch)
+            Comment.objects.filter(pk__range=(created[0].pk, created[-1].pk)).update(path=comment_root_path())
@@ -0,0 +1,80 @@
+from django.core.cache import caches
+from django.db import transaction
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..authentication import CachedJWTAuthentication, get_local_cache
+from ..models import User
+from .utils import BlogTestCase, BlogTransactionTestCase, make_user
+
+
+class CachedUserTests(BlogTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('reader', first_name='Old')
+        self.token = AccessToken.for_user(self.user)
+        self.auth = CachedJWTAuthentication()
+
+    def test_hits_skip_the_database(self):
+        with self.assertNumQueries(1):
+            self.auth.get_user(self.token)
+        with self.assertNumQueries(0):
+            user = self.auth.get_user(self.token)
+        self.assertEqual((user.pk, user.first_name), (self.user.pk, 'Old'))
+        self.assertEqual(user.get_deferred_fields(), {'password', 'posts_count', 'last_login'})
+
+    def test_saves_invalidate(self):
+        self.auth.get_user(self.token)
+        self.user.first_name = 'New'
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.auth.get_user(self.token).first_name, 'New')
+
+    def stale_store(self):
+        """Store a row read before a write that committed in the meantime."""
+        user_id, claim = self.auth.identify(self.token)
+        entry, generation = self.auth.get_entry(user_id, claim)
+        self.assertIsNone(entry)
+        stale = User.objects.get(pk=self.user.pk)
+        User.objects.get(pk=self.user.pk).save()
+        self.auth.store_entry(stale, claim, generation)
+
+    def test_stale_rows_stored_after_a_write_are_not_served(self):
+        self.stale_store()
+        with self.assertNumQueries(1):
+            self.auth.get_user(self.token)
+        with self.assertNumQueries(0):
+            self.auth.get_user(self.token)
+
+    @override_settings(AUTH_USER_CACHE_ALIAS='default')
+    def test_stale_rows_in_the_shared_tier_are_not_served(self):
+        self.stale_store()
+        # As seen from another process
+        get_local_cache().clear()
+        with self.assertNumQueries(1):
+            self.auth.get_user(self.token)
+        get_local_cache().clear()
+        with self.assertNumQueries(0):
+            self.auth.get_user(self.token)
+        self.assertEqual(len(caches['default'].get_many([f'auth-user:{self.user.pk}'])), 1)
+
+    def test_rolled_back_reads_are_not_cached(self):
+        try:
+            with transaction.atomic():
+                User.objects.filter(pk=self.user.pk).update(first_name='Uncommitted')
+                self.assertEqual(self.auth.get_user(self.token).first_name, 'Uncommitted')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with self.assertNumQueries(1):
+            self.assertEqual(self.auth.get_user(self.token).first_name, 'Old')
+
+
+class CachedUserInTransactionTests(BlogTestCase):
+    def test_entries_are_stored_on_commit(self):
+        token = AccessToken.for_user(make_user('reader'))
+        auth = CachedJWTAuthentication()
+        with self.captureOnCommitCallbacks(execute=True):
+            auth.get_user(token)
+        with self.assertNumQueries(0):
+            auth.get_user(token)
@@ -0,0 +1,80 @@
+import threading
+from unittest import mock
+
+from django.db import connections
+from django.http import HttpRequest
+
+from ..views.posts import PostViewSet
+from .utils import BlogTestCase, BlogTransactionTestCase, client_for, make_author, make_post
+
+URL = '/api/v1/batch/'
+
+
+def get(path):
+    return {'method': 'GET', 'path': path}
+
+
+class BatchTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author()
+        self.post = make_post(self.author, title='Published')
+        self.draft = make_post(self.author, title='Draft', status='draft')
+
+    def run_batch(self, *items, **options):
+        client = client_for(self.author)
+        # Errors are reported (got_request_exception) but answered, not raised
+        client.raise_request_exception = False
+        response = client.post(URL, {'requests': list(items), **options}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_plain_view_exceptions_fail_only_their_request(self):
+        # The live stream is a plain async view; let it run outside ASGI
+        with mock.patch('blog_api.views.live.ASGIRequest', HttpRequest):
+            data = self.run_batch(
+                get(f'/api/v1/posts/{self.draft.slug}/comments/stream/'),
+                get(f'/api/v1/posts/{self.post.slug}/'),
+            )
+        statuses = [entry['status'] for entry in data['responses']]
+        self.assertEqual(statuses, [404, 200])
+        self.assertEqual(data['responses'][0]['body'], {'detail': 'Not Found.'})
+
+    def test_unexpected_errors_are_logged_500s(self):
+        with mock.patch.object(PostViewSet, 'list', side_effect=RuntimeError('boom')):
+            with self.assertLogs('django.request', 'ERROR'):
+                data = self.run_batch(get('/api/v1/posts/'), get('/api/v1/categories/'))
+        self.assertEqual([entry['status'] for entry in data['responses']], [500, 200])
+
+    def test_atomic_batches_roll_back_on_an_exception(self):
+        with mock.patch.object(PostViewSet, 'retrieve', side_effect=RuntimeError('boom')):
+            with self.assertLogs('django.request', 'ERROR'):
+                data = self.run_batch(
+                    {'method': 'PATCH', 'path': f'/api/v1/posts/{self.post.slug}/', 'body': {'title': 'Renamed'}},
+                    get(f'/api/v1/posts/{self.post.slug}/'),
+                    get('/api/v1/categories/'),
+                    atomic=True,
+                )
+        self.assertEqual([entry['status'] for entry in data['responses']], [200, 500, 424])
+        self.assertFalse(data['committed'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'Published')
+
+
+class ConcurrentBatchTests(BlogTransactionTestCase):
+    def test_reads_run_on_the_pool_and_close_their_connections(self):
+        author = make_author()
+        posts = [make_post(author, title=f'Post {i}') for i in range(3)]
+        closed = []
+
+        def close(wrapper):
+            closed.append(threading.current_thread().name)
+
+        with mock.patch.object(type(connections['default']), 'close', autospec=True, side_effect=close):
+            response = client_for().post(
+                URL, {'requests': [get(f'/api/v1/posts/{post.slug}/') for post in posts]}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        bodies = [entry['body'] for entry in response.json()['responses']]
+        self.assertEqual([body['title'] for body in bodies], ['Post 0', 'Post 1', 'Post 2'])
+        self.assertEqual(len([name for name in closed if name.startswith('batch')]), 3)
@@ -0,0 +1,79 @@
+from ..counters import reconcile
+from ..models import Category, Comment, Post, User
+from .utils import BlogTestCase, make_author, make_category, make_post, make_user
+
+
+class CounterTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author()
+        self.category = make_category()
+
+    def counts(self):
+        return (
+            Category.objects.get(pk=self.category.pk).posts_count,
+            User.objects.get(pk=self.author.pk).posts_count,
+        )
+
+    def test_only_published_posts_count(self):
+        post = make_post(self.author, category=self.category, status='draft')
+        self.assertEqual(self.counts(), (0, 0))
+        post.status = 'published'
+        post.save()
+        self.assertEqual(self.counts(), (1, 1))
+        # Saving the same instance again changes nothing
+        post.save()
+        self.assertEqual(self.counts(), (1, 1))
+        post.status = 'draft'
+        post.save()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_moves_between_categories_and_deletes(self):
+        other = make_category('History')
+        post = make_post(self.author, category=self.category)
+        post.category = other
+        post.save(update_fields=['category'])
+        self.assertEqual(self.counts(), (0, 1))
+        self.assertEqual(Category.objects.get(pk=other.pk).posts_count, 1)
+        post.delete()
+        self.assertEqual(Category.objects.get(pk=other.pk).posts_count, 0)
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_stale_instances_publish_a_draft_once(self):
+        draft = make_post(self.author, category=self.category, status='draft')
+        first, second = Post.objects.get(pk=draft.pk), Post.objects.get(pk=draft.pk)
+        for instance in (first, second):
+            instance.status = 'published'
+            instance.save()
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_deleting_a_post_published_elsewhere(self):
+        draft = make_post(self.author, category=self.category, status='draft')
+        stale = Post.objects.get(pk=draft.pk)
+        draft.status = 'published'
+        draft.save()
+        stale.delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_comment_counts(self):
+        post = make_post(self.author)
+        reader = make_user('reader')
+        comments = [Comment.objects.create(post=post, author=reader, content=str(i)) for i in range(3)]
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 3)
+        comments[0].delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
+
+    def test_reconcile_repairs_drift(self):
+        post = make_post(self.author, category=self.category)
+        Comment.objects.create(post=post, author=self.author, content='x')
+        Post.objects.filter(pk=post.pk).update(comments_count=7)
+        Category.objects.filter(pk=self.category.pk).update(posts_count=0)
+        fixed = reconcile()
+        self.assertEqual(fixed['post.comments_count'], 1)
+        self.assertEqual(fixed['category.posts_count'], 1)
+        self.assertEqual(fixed['user.posts_count'], 0)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.counts(), (1, 1))
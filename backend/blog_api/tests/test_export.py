@@ -0,0 +1,65 @@
+import json
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from ..export import iter_keyset
+from ..models import Post
+from .utils import BlogTestCase, client_for, make_author, make_post
+
+URL = '/api/v1/posts/export/'
+
+
+class ExportTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        author = make_author()
+        self.now = timezone.now()
+        for i in range(5):
+            post = make_post(author, title=f'Post {i}')
+            # Two pairs share an updated_at, so ties are ordered by id
+            Post.objects.filter(pk=post.pk).update(updated_at=self.now - timedelta(hours=5 - i // 2))
+        make_post(author, title='Draft', status='draft')
+        self.expected = list(
+            Post.objects.filter(status='published').order_by('updated_at', 'id').values_list('id', flat=True)
+        )
+
+    def lines(self, content):
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_streams_published_posts_in_keyset_order(self):
+        response = client_for().get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = self.lines(b''.join(response.streaming_content))
+        self.assertEqual([line['id'] for line in lines], self.expected)
+        self.assertEqual(lines[0]['content'], 'Some content.')
+
+    def test_uncompiled_output_matches(self):
+        compiled = b''.join(client_for().get(URL).streaming_content)
+        with override_settings(COMPILED_SERIALIZERS=False):
+            self.assertEqual(b''.join(client_for().get(URL).streaming_content), compiled)
+
+    def test_updated_since(self):
+        lines = self.lines(b''.join(client_for().get(URL).streaming_content))
+        since = lines[2]['updated_at']
+        response = client_for().get(URL, {'updated_since': since})
+        self.assertEqual(
+            [line['id'] for line in self.lines(b''.join(response.streaming_content))], self.expected[2:]
+        )
+        self.assertEqual(client_for().get(URL, {'updated_since': 'yesterday'}).status_code, 400)
+
+    def test_keyset_chunks_cover_every_row_once(self):
+        posts = Post.objects.filter(status='published')
+        for chunk_size in (1, 2, 5, 10):
+            with self.subTest(chunk_size), self.assertNumQueries(len(self.expected) // chunk_size + 1):
+                self.assertEqual([post.pk for post in iter_keyset(posts, chunk_size)], self.expected)
+
+    async def test_streams_asynchronously_under_asgi(self):
+        response = await self.async_client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([line['id'] for line in self.lines(content)], self.expected)
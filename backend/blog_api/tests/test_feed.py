@@ -0,0 +1,48 @@
+from unittest import mock
+
+from .. import feed
+from ..models import FeedSnapshot
+from .utils import BlogTestCase, client_for, make_author, make_category, make_post
+
+
+def latest_titles(data):
+    return [post['title'] for post in data['latest']]
+
+
+class HomeFeedTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author()
+        self.category = make_category()
+
+    def test_first_read_builds_and_writes_patch(self):
+        make_post(self.author, title='First', category=self.category)
+        response = client_for().get('/api/v1/feed/home/')
+        self.assertEqual(latest_titles(response.json()), ['First'])
+
+        make_post(self.author, title='Second', category=self.category)
+        data = feed.get_home()
+        self.assertEqual(latest_titles(data), ['Second', 'First'])
+        self.assertEqual(data['highlights'][0]['category'], self.category.slug)
+        self.assertEqual(data['hero']['title'], 'Second')
+
+    def test_writes_before_the_first_build_leave_it_to_the_reader(self):
+        make_post(self.author, title='Early')
+        # The write locked an empty snapshot instead of skipping it
+        self.assertEqual(FeedSnapshot.objects.get(key=feed.HOME).data, {})
+        self.assertEqual(latest_titles(feed.get_home()), ['Early'])
+
+    def test_readers_reuse_a_build_that_finished_while_they_waited(self):
+        built = feed.get_home()
+        with mock.patch.object(feed, 'build') as build:
+            self.assertEqual(feed.rebuild(missing_only=True), built)
+        build.assert_not_called()
+
+    def test_category_edits_rebuild_a_built_snapshot(self):
+        make_post(self.author, category=self.category)
+        feed.get_home()
+        self.category.name = 'Astronomy'
+        self.category.save()
+        data = feed.get_home()
+        self.assertEqual([category['name'] for category in data['categories']], ['Astronomy'])
+        self.assertEqual(data['latest'][0]['category']['name'], 'Astronomy')
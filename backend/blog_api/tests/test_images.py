@@ -0,0 +1,120 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from PIL.JpegImagePlugin import JpegImageFile
+
+from .. import images
+from ..models import PostImage
+from .utils import BlogTestCase, client_for, make_author
+
+URL = '/api/v1/images/'
+
+
+def image_file(size=(2000, 1000), image_format='JPEG', orientation=None, name='photo.jpg'):
+    out = io.BytesIO()
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    Image.new('RGB', size, 'teal').save(out, image_format, exif=exif)
+    return SimpleUploadedFile(name, out.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+class ImageTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = client_for(make_author())
+
+    def upload(self, file=None):
+        # The derivatives are made on demand in these tests
+        with mock.patch.object(images, 'schedule'):
+            return self.client.post(URL, {'file': file or image_file()}, format='multipart')
+
+    def get(self, url):
+        response = self.client.get(url)
+        if response.status_code == 200:
+            content = b''.join(response.streaming_content)
+            response.close()
+            return response, content
+        return response, None
+
+    def test_uploads_are_stored_once_per_content(self):
+        first = self.upload()
+        self.assertEqual(first.status_code, 201)
+        second = self.upload()
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.json()['id'], second.json()['id'])
+        self.assertEqual(PostImage.objects.count(), 1)
+
+        data = first.json()
+        self.assertEqual((data['width'], data['height'], data['format']), (2000, 1000, 'JPEG'))
+        self.assertTrue(data['url'].endswith('/1920.jpg'))
+        self.assertEqual([entry.split()[-1] for entry in data['srcset']['webp'].split(', ')],
+                         ['400w', '800w', '1200w', '1920w'])
+
+    def test_sizes_are_as_displayed(self):
+        data = self.upload(image_file((200, 100), orientation=6)).json()
+        self.assertEqual((data['width'], data['height']), (100, 200))
+        self.assertEqual(data['srcset']['jpeg'].split()[-1], '100w')
+
+    def test_derivatives_have_every_width_and_format(self):
+        digest = self.upload().json()['id']
+        self.assertEqual(images.make_derivatives(digest, 2000), 8)
+        self.assertEqual(images.make_derivatives(digest, 2000), 0)
+        for width in (400, 800, 1200, 1920):
+            for format_name, pillow_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                with Image.open(images.derivative_path(digest, width, format_name)) as derivative:
+                    self.assertEqual(derivative.format, pillow_format)
+                    self.assertEqual(derivative.size, (width, width // 2))
+                    self.assertFalse(derivative.getexif())
+
+    def test_jpegs_are_decoded_at_a_reduced_scale(self):
+        digest = self.upload(image_file((4000, 2000))).json()['id']
+        with mock.patch.object(JpegImageFile, 'draft', autospec=True, side_effect=JpegImageFile.draft) as draft:
+            images.make_derivatives(digest, 4000, only=(800, 'jpeg'))
+        draft.assert_called_once_with(mock.ANY, None, (800, 400))
+        with Image.open(images.derivative_path(digest, 800, 'jpeg')) as derivative:
+            self.assertEqual(derivative.size, (800, 400))
+
+    @override_settings(IMAGE_MAX_PIXELS=10_000)
+    def test_images_with_too_many_pixels_are_refused(self):
+        response = self.upload(image_file((200, 100)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pixels', response.json()['file'][0])
+        self.assertFalse(PostImage.objects.exists())
+
+    def test_missing_derivatives_are_made_when_requested(self):
+        digest = self.upload().json()['id']
+        path = images.derivative_path(digest, 400, 'webp')
+        self.assertFalse(path.exists())
+        response, content = self.get(images.derivative_url(digest, 400, 'webp'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(content, path.read_bytes())
+        self.assertEqual(Image.open(io.BytesIO(content)).size, (400, 200))
+
+    def test_unknown_derivatives_are_not_found(self):
+        digest = self.upload().json()['id']
+        other = 'f' * 64
+        for url in (
+            images.derivative_url(digest, 500, 'webp'),
+            images.derivative_url(digest, 400, 'webp').replace('.webp', '.png'),
+            images.derivative_url(other, 400, 'webp'),
+            images.derivative_url(digest, 400, 'webp').replace(f'/{digest[:2]}/', '/00/'),
+        ):
+            self.assertEqual(self.get(url)[0].status_code, 404, url)
+
+    def test_images_whose_original_is_gone_are_not_found(self):
+        digest = self.upload().json()['id']
+        shutil.rmtree(images.image_dir(digest))
+        self.assertEqual(self.get(images.derivative_url(digest, 400, 'jpeg'))[0].status_code, 404)
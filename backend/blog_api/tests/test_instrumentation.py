@@ -0,0 +1,103 @@
+import json
+import time
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework import serializers
+
+from ..authentication import CachedJWTAuthentication
+from ..serializers.categories import CategorySerializer
+from ..serializers.posts import PostDetailSerializer
+from .utils import (
+    BlogTestCase, BlogTransactionTestCase, client_for, make_author, make_category, make_post, make_user,
+    reset_process_state,
+)
+
+
+def timing_logs(logs):
+    return [json.loads(record.getMessage()) for record in logs.records]
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+class RequestTimingTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author()
+        for i in range(3):
+            make_post(self.author, title=f'Post {i}')
+
+    def test_sampled_requests_are_logged_without_a_header(self):
+        with self.assertLogs('blog_api.timing', 'INFO') as logs:
+            response = client_for(self.author).get('/api/v1/posts/')
+        self.assertNotIn('Server-Timing', response)
+        [line] = timing_logs(logs)
+        self.assertEqual((line['view'], line['status']), ('post-list', 200))
+        self.assertGreater(line['sql_count'], 0)
+        for metric in ('sql_ms', 'view_ms', 'serialize_ms', 'render_ms', 'total_ms'):
+            self.assertGreaterEqual(line[metric], 0, metric)
+
+    def test_staff_and_debug_get_the_header(self):
+        staff = make_user('staff', is_staff=True)
+        with self.assertLogs('blog_api.timing', 'INFO'):
+            response = client_for(staff).get('/api/v1/posts/')
+        names = [entry.split(';')[0].strip() for entry in response['Server-Timing'].split(',')]
+        self.assertEqual(names, ['db', 'view', 'serialize', 'render', 'total'])
+        with self.settings(DEBUG=True), self.assertLogs('blog_api.timing', 'INFO'):
+            self.assertIn('Server-Timing', client_for().get('/api/v1/posts/'))
+
+    def test_authentication_is_not_counted_as_serialization(self):
+        authenticate = CachedJWTAuthentication.authenticate
+
+        def slow_authenticate(self, request):
+            time.sleep(0.05)
+            return authenticate(self, request)
+
+        with mock.patch.object(CachedJWTAuthentication, 'authenticate', slow_authenticate):
+            with self.assertLogs('blog_api.timing', 'INFO') as logs:
+                client_for(self.author).get(f'/api/v1/posts/{self.author.posts.first().slug}/')
+        [line] = timing_logs(logs)
+        self.assertGreaterEqual(line['view_ms'], 50)
+        self.assertLess(line['serialize_ms'], 50)
+
+    def test_view_serialization_is_timed_without_patching_drf(self):
+        self.assertEqual(serializers.Serializer.data.fget.__module__, 'rest_framework.serializers')
+        make_category()
+
+        def slow(to_representation):
+            def wrapper(self, instance):
+                time.sleep(0.05)
+                return to_representation(self, instance)
+            return wrapper
+
+        for serializer, url in (
+            (PostDetailSerializer, f'/api/v1/posts/{self.author.posts.first().slug}/'),
+            (CategorySerializer, '/api/v1/categories/'),
+        ):
+            with mock.patch.object(serializer, 'to_representation', slow(serializer.to_representation)):
+                with self.assertLogs('blog_api.timing', 'INFO') as logs:
+                    client_for(self.author).get(url)
+            [line] = timing_logs(logs)
+            self.assertGreaterEqual(line['serialize_ms'], 50, url)
+            self.assertLess(line['view_ms'], 50, url)
+
+    def test_unsampled_requests(self):
+        with self.settings(REQUEST_TIMING_SAMPLE_RATE=0), self.assertNoLogs('blog_api.timing'):
+            self.assertNotIn('Server-Timing', client_for().get('/api/v1/posts/'))
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+class BatchTimingTests(BlogTransactionTestCase):
+    def test_batch_threads_record_their_queries(self):
+        author = make_author()
+        posts = [make_post(author, title=f'Post {i}') for i in range(3)]
+        body = {'requests': [{'method': 'GET', 'path': f'/api/v1/posts/{post.slug}/'} for post in posts]}
+
+        counts = {}
+        for workers in (1, 4):
+            reset_process_state()
+            with self.settings(BATCH_MAX_WORKERS=workers), self.assertLogs('blog_api.timing', 'INFO') as logs:
+                response = client_for(author).post('/api/v1/batch/', body, format='json')
+            self.assertEqual([item['status'] for item in response.json()['responses']], [200] * 3)
+            counts[workers] = timing_logs(logs)[0]['sql_count']
+        self.assertGreaterEqual(counts[1], 3)
+        self.assertEqual(counts[4], counts[1])
@@ -0,0 +1,131 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase
+
+from .. import live
+from ..live import BroadcastHub, Event, LocalBroadcastBackend, get_backend, get_hub
+from ..models import Comment
+from .utils import BlogTestCase, BlogTransactionTestCase, client_for, make_author, make_post, make_user
+
+
+def fresh_live_state(test):
+    for name in ('_hub', '_backend'):
+        patcher = mock.patch.object(live, name, None)
+        patcher.start()
+        test.addCleanup(patcher.stop)
+
+
+class BroadcastHubTests(SimpleTestCase):
+    def test_resumes_after_the_last_seen_event(self):
+        hub = BroadcastHub(history=3)
+        hub.subscribe(1)
+        for i in range(1, 5):
+            hub.deliver(Event(str(i), 1, 'comment.created', {}))
+        self.assertEqual([event.id for event in hub.since(1, '3')[0]], ['4'])
+        self.assertEqual(hub.since(1, '1'), ([], False))
+
+    def test_posts_without_recent_streams_forget_their_history(self):
+        hub = BroadcastHub(grace=30)
+        hub.subscribe(1)
+        hub.deliver(Event('1', 1, 'comment.created', {}))
+        hub.unsubscribe(1)
+        self.assertTrue(hub.active(1))
+        # Reconnecting within the grace period resumes
+        hub.subscribe(1)
+        self.assertEqual(hub.since(1, '1'), ([], True))
+        hub.unsubscribe(1)
+
+        hub.grace = 0
+        self.assertFalse(hub.active(1))
+        hub.subscribe(1)
+        self.assertEqual(hub.since(1, '1'), ([], False))
+
+
+class PublishTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        fresh_live_state(self)
+        self.post = make_post(make_author())
+        self.reader = make_user('reader')
+
+    def test_nothing_is_serialized_without_subscribers(self):
+        with mock.patch.object(live, 'CommentSerializer') as serializer:
+            with self.captureOnCommitCallbacks(execute=True):
+                Comment.objects.create(post=self.post, author=self.reader, content='Hi')
+        serializer.assert_not_called()
+        self.assertIsNone(get_hub().latest_id(self.post.pk))
+
+    def test_subscribed_posts_get_events_after_commit(self):
+        get_backend().subscribe(self.post.pk)
+        self.addCleanup(get_backend().unsubscribe, self.post.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            comment = Comment.objects.create(post=self.post, author=self.reader, content='Hi')
+        self.assertIsNone(get_hub().latest_id(self.post.pk))
+        for callback in callbacks:
+            callback()
+        comment_id = comment.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.delete()
+
+        events, _ = get_hub().since(self.post.pk, None)
+        self.assertEqual([event.type for event in events], ['comment.created', 'comment.deleted'])
+        self.assertEqual(events[0].data['content'], 'Hi')
+        self.assertEqual(events[1].data, {'id': comment_id, 'post': self.post.pk, 'parent': None})
+
+
+class PublishFailureTests(BlogTransactionTestCase):
+    def test_broadcast_failures_do_not_fail_the_write(self):
+        fresh_live_state(self)
+        post = make_post(make_author())
+        get_backend().subscribe(post.pk)
+        self.addCleanup(get_backend().unsubscribe, post.pk)
+        url = f'/api/v1/posts/{post.slug}/comments/'
+        with mock.patch.object(LocalBroadcastBackend, 'publish', side_effect=ConnectionError('down')):
+            with self.assertLogs('django.db.backends.base', 'ERROR'):
+                response = client_for(make_user('reader')).post(url, {'content': 'Hi'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Comment.objects.filter(post=post).exists())
+
+
+class CommentStreamTests(BlogTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        fresh_live_state(self)
+        self.post = make_post(make_author())
+        self.reader = make_user('reader')
+        self.url = f'/api/v1/posts/{self.post.slug}/comments/stream/'
+
+    async def next_frame(self, frames):
+        return (await asyncio.wait_for(anext(frames), timeout=5)).decode()
+
+    async def test_streams_comment_events(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        frames = aiter(response.streaming_content)
+        try:
+            self.assertTrue((await self.next_frame(frames)).startswith('retry:'))
+            comment = await sync_to_async(Comment.objects.create)(post=self.post, author=self.reader, content='Hi')
+            frame = await self.next_frame(frames)
+        finally:
+            await frames.aclose()
+        self.assertIn('event: comment.created\n', frame)
+        self.assertIn(f'"id": {comment.pk}', frame)
+
+    async def test_unknown_last_event_id_resets(self):
+        response = await self.async_client.get(self.url, headers={'Last-Event-ID': 'gone'})
+        frames = aiter(response.streaming_content)
+        try:
+            await self.next_frame(frames)
+            frame = await self.next_frame(frames)
+        finally:
+            await frames.aclose()
+        self.assertIn('event: reset\n', frame)
+
+    async def test_only_published_posts_under_asgi(self):
+        draft = await sync_to_async(make_post)(self.post.author, title='Draft', status='draft')
+        response = await self.async_client.get(f'/api/v1/posts/{draft.slug}/comments/stream/')
+        self.assertEqual(response.status_code, 404)
+        response = await sync_to_async(client_for().get)(self.url)
+        self.assertEqual(response.status_code, 501)
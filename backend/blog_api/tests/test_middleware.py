@@ -0,0 +1,24 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.test import override_settings
+
+from .utils import BlogTestCase, make_category
+
+
+class AsyncMiddlewareTests(BlogTestCase):
+    @override_settings(DEBUG=True)
+    def test_asgi_chain_needs_no_sync_adapters(self):
+        # Django logs every middleware it has to wrap for the other mode
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1)
+    async def test_queries_run_in_worker_threads_are_counted(self):
+        await sync_to_async(make_category)()
+        with self.assertLogs('blog_api.timing', 'INFO') as logs:
+            response = await self.async_client.get('/api/v1/categories/')
+        self.assertEqual(response.status_code, 200)
+        [line] = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertGreater(line['sql_count'], 0)
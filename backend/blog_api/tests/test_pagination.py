@@ -0,0 +1,85 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+
+from ..models import Comment, Post
+from ..pagination import KeysetPagination
+from .utils import BlogTestCase, client_for, make_author, make_post, make_user
+
+
+class KeysetPaginationTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        for paginator in (KeysetPagination, PageNumberPagination):
+            patcher = mock.patch.object(paginator, 'page_size', 3)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.author = make_author()
+        now = timezone.now()
+        self.posts = []
+        for i in range(8):
+            post = make_post(self.author, title=f'Post {i}')
+            # Pairs of posts share a timestamp, so ties are broken by id
+            Post.objects.filter(pk=post.pk).update(created_at=now - timedelta(minutes=i // 2))
+            self.posts.append(post)
+        self.newest_first = sorted(
+            Post.objects.values_list('created_at', 'id'), reverse=True
+        )
+
+    def ids(self, page):
+        return [post['id'] for post in page['results']]
+
+    def test_pages_walk_forward_and_back_without_gaps(self):
+        client = client_for()
+        page = client.get('/api/v1/posts/', {'pagination': 'cursor'}).json()
+        self.assertNotIn('count', page)
+        pages = [self.ids(page)]
+        while page['next']:
+            page = client.get(page['next']).json()
+            pages.append(self.ids(page))
+        self.assertEqual(sum(pages, []), [pk for _, pk in self.newest_first])
+
+        backwards = []
+        while page['previous']:
+            page = client.get(page['previous']).json()
+            backwards.append(self.ids(page))
+        self.assertEqual(backwards, pages[-2::-1])
+
+    def test_invalid_cursor(self):
+        response = client_for().get('/api/v1/posts/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_orders_are_rejected(self):
+        for params in ({'ordering': 'title'}, {'search': 'post'}, {'search': 'post', 'ordering': 'title'}):
+            with self.subTest(params):
+                response = client_for().get('/api/v1/posts/', {'pagination': 'cursor', **params})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('pagination', response.json())
+
+    def test_newest_first_ordering_is_allowed(self):
+        response = client_for().get('/api/v1/posts/', {
+            'pagination': 'cursor', 'search': 'post', 'ordering': '-created_at',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response.json()), [pk for _, pk in self.newest_first[:3]])
+
+    def test_comment_replies_and_threads_keep_their_order(self):
+        reader = make_user('reader')
+        post = self.posts[0]
+        url = f'/api/v1/posts/{post.slug}/comments/'
+        root = Comment.objects.create(post=post, author=reader, content='root')
+        for i in range(4):
+            Comment.objects.create(post=post, author=reader, content=f'reply {i}', parent=root)
+
+        replies = client_for().get(f'{url}{root.pk}/replies/', {'pagination': 'cursor'}).json()
+        self.assertIn('count', replies)
+        self.assertEqual([reply['content'] for reply in replies['results']], ['reply 0', 'reply 1', 'reply 2'])
+
+        thread = client_for().get(f'{url}thread/', {'pagination': 'cursor'}).json()
+        self.assertIn('count', thread)
+
+        comments = client_for().get(url, {'pagination': 'cursor'}).json()
+        self.assertNotIn('count', comments)
+        self.assertEqual(comments['results'][0]['content'], 'reply 3')
@@ -0,0 +1,287 @@
+"""
+Endpoint performance regression suite.
+
+Loads a synthetic dataset (see `blog_api.synthetic`) and calls every route
+in `blog_api/urls.py` (except the never-ending SSE comment stream) as an
+anonymous visitor, a reader and an author. For
+each route and role it checks the response status and the maximum number
+of SQL queries per request, and compares p50/p95 wall time against
+`perf_baseline.json`:
+
+    python manage.py test blog_api
+
+Statuses and query budgets (exact ceilings) are always checked. Latencies
+depend on the machine the baseline was recorded on, so they are only
+compared with PERF_CHECK_LATENCY=1, on that kind of machine: they may then
+exceed the baseline by PERF_LATENCY_FACTOR (default 2.0) plus
+PERF_LATENCY_SLACK_MS (default 5) to absorb noise. After an intended
+change, regenerate the baseline and commit it:
+
+    PERF_UPDATE_BASELINE=1 python manage.py test blog_api.tests.test_performance
+
+The response cache is disabled so the numbers describe the uncached path,
+request timing sampling is off, and passwords use a fast hasher so auth
+routes measure the API, not PBKDF2.
+
+The read endpoints' queries must also keep index-backed plans
+(`blog_api.query_plans`).
+"""
+import io
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from PIL import Image
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from .. import popularity
+from ..models import Comment, Post, User
+from ..query_plans import check_plans, plan_lines
+from ..synthetic import SyntheticDataGenerator
+
+BASELINE_PATH = Path(__file__).with_name('perf_baseline.json')
+ROLES = ('anonymous', 'reader', 'author')
+PASSWORD = 'perf-pass-123'
+
+WARMUP = 2
+ITERATIONS = int(os.environ.get('PERF_ITERATIONS', 15))
+LATENCY_FACTOR = float(os.environ.get('PERF_LATENCY_FACTOR', 2.0))
+LATENCY_SLACK_MS = float(os.environ.get('PERF_LATENCY_SLACK_MS', 5))
+UPDATE_BASELINE = bool(os.environ.get('PERF_UPDATE_BASELINE'))
+CHECK_LATENCY = bool(os.environ.get('PERF_CHECK_LATENCY'))
+
+# `path` and `data` are either literals or callables taking (case, user, i)
+Route = namedtuple('Route', 'name method path data roles format', defaults=(None, ROLES, 'json'))
+# Uploaded images land here, not in the real MEDIA_ROOT
+MEDIA_ROOT = tempfile.mkdtemp(prefix='blog-perf-media-')
+
+
+def _resolve(value, case, user, i):
+    return value(case, user, i) if callable(value) else value
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+@override_settings(
+    RESPONSE_CACHE_TIMEOUT=0,
+    REQUEST_TIMING_SAMPLE_RATE=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    # Deterministic query counts: no timed flushes, polls or prunes
+    TOKEN_OUTSTANDING_BATCH_SIZE=1,
+    TOKEN_BLACKLIST_SYNC_INTERVAL=0,
+    TOKEN_PRUNE_INTERVAL=0,
+    VIEW_COUNT_FLUSH_INTERVAL=0,
+    MEDIA_ROOT=MEDIA_ROOT,
+)
+class EndpointPerformanceTests(TestCase):
+    """
+    Query-count and latency budgets for every API route, and index use of
+    the read queries.
+    """
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        SyntheticDataGenerator(seed=11, batch_size=500).generate(users=60, posts=400, comments=2000)
+
+        cls.author = User.objects.filter(is_author=True).order_by('-posts_count', 'id').first()
+        cls.reader = User.objects.filter(is_author=False).order_by('id').first()
+        for user in (cls.author, cls.reader):
+            user.set_password(PASSWORD)
+            user.save()
+
+        published = Post.objects.filter(status='published')
+        cls.post = published.exclude(author=cls.author).order_by('-comments_count', 'id').first()
+        cls.own_post = published.filter(author=cls.author).order_by('id').first()
+        cls.other_author = cls.post.author
+        cls.category = cls.post.category
+        cls.comment = cls.post.comments.order_by('id').first()
+        parent = cls.comment
+        for depth in range(4):
+            replies = [
+                Comment.objects.create(post=cls.post, parent=parent, author=cls.reader, content=f'Reply {depth}.{i}')
+                for i in range(3)
+            ]
+            parent = replies[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        # Reads counted during the run must not be flushed into the real database at exit
+        popularity.get_counter().drain()
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        if UPDATE_BASELINE and cls.results:
+            BASELINE_PATH.write_text(json.dumps(cls.results, indent=2, sort_keys=True) + '\n')
+
+    def user_for(self, role):
+        return {'anonymous': None, 'reader': self.reader, 'author': self.author}[role]
+
+    def client_for(self, user):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    # Per-iteration fixtures, created outside the measured window -------------
+
+    def fresh_post(self, user, i):
+        return Post.objects.create(
+            title=f'Perf fixture {i}', content='Fixture content. ' * 50, status='published',
+            author=self.author, category=self.category,
+        )
+
+    def fresh_comment(self, user, i):
+        return Comment.objects.create(post=self.post, author=user or self.reader, content=f'Fixture {i}')
+
+    def upload(self, user, i):
+        # A new image every time, so each upload is stored and measured
+        file = io.BytesIO()
+        Image.new('RGB', (1200, 800), (i % 256, (user.pk if user else 0) % 256, 0)).save(file, 'PNG')
+        file.name = f'perf-{i}.png'
+        file.seek(0)
+        return {'file': file}
+
+    def refresh_token(self, user, i):
+        return str(RefreshToken.for_user(user or self.reader))
+
+    def routes(self):
+        posts = '/api/v1/posts/'
+        comments = f'{posts}{self.post.slug}/comments/'
+        return [
+            Route('api-root', 'get', '/api/v1/'),
+            Route('post-list', 'get', posts),
+            Route('post-list-page', 'get', f'{posts}?page=3'),
+            Route('post-list-cursor', 'get', f'{posts}?pagination=cursor'),
+            Route('post-list-search', 'get', f'{posts}?search=light'),
+            Route('post-list-filter', 'get', f'{posts}?category__slug={self.category.slug}&ordering=title'),
+            Route('post-list-fields', 'get', f'{posts}?fields=id,title,slug,author'),
+            Route('post-detail', 'get', f'{posts}{self.post.slug}/'),
+            Route('post-by-category', 'get', f'{posts}category/{self.category.slug}/'),
+            Route('post-by-author', 'get', f'{posts}author/{self.other_author.username}/'),
+            Route('post-my-posts', 'get', f'{posts}my-posts/'),
+            Route('post-popular', 'get', f'{posts}popular/'),
+            Route('post-popular-category', 'get', f'{posts}popular/?category={self.category.slug}'),
+            Route('post-related', 'get', f'{posts}{self.post.slug}/related/'),
+            Route('post-export', 'get', f'{posts}export/'),
+            Route('post-create', 'post', posts, lambda case, user, i: {
+                'title': f'Perf post {user and user.pk} {i}', 'content': 'Body. ' * 200,
+                'category_id': case.category.pk, 'status': 'published',
+            }),
+            Route('post-update', 'patch', lambda case, user, i: f'{posts}{case.own_post.slug}/',
+                  lambda case, user, i: {'excerpt': f'Updated excerpt {i}'}),
+            Route('post-delete', 'delete', lambda case, user, i: f'{posts}{case.fresh_post(user, i).slug}/'),
+            Route('feed-home', 'get', '/api/v1/feed/home/'),
+            Route('category-list', 'get', '/api/v1/categories/'),
+            Route('category-detail', 'get', f'/api/v1/categories/{self.category.slug}/'),
+            Route('comment-list', 'get', comments),
+            Route('comment-list-cursor', 'get', f'{comments}?pagination=cursor'),
+            Route('comment-detail', 'get', f'{comments}{self.comment.pk}/'),
+            Route('comment-thread', 'get', f'{comments}thread/?depth=3&replies=5'),
+            Route('comment-replies', 'get', f'{comments}{self.comment.pk}/replies/'),
+            Route('comment-reply', 'post', comments,
+                  lambda case, user, i: {'content': f'Perf reply {i}', 'parent': case.comment.pk}),
+            Route('comment-create', 'post', comments, lambda case, user, i: {'content': f'Perf comment {i}'}),
+            Route('comment-update', 'patch', lambda case, user, i: f'{comments}{case.fresh_comment(user, i).pk}/',
+                  {'content': 'Edited'}),
+            Route('comment-delete', 'delete', lambda case, user, i: f'{comments}{case.fresh_comment(user, i).pk}/'),
+            Route('batch', 'post', '/api/v1/batch/', {'requests': [
+                {'method': 'GET', 'path': f'{posts}{self.post.slug}/'},
+                {'method': 'GET', 'path': f'{posts}{self.post.slug}/related/'},
+                {'method': 'GET', 'path': comments},
+            ]}),
+            Route('image-upload', 'post', '/api/v1/images/', lambda case, user, i: case.upload(user, i),
+                  format='multipart'),
+            Route('auth-register', 'post', '/api/v1/auth/register/', lambda case, user, i: {
+                'username': f'perf_{user and user.pk}_{i}', 'email': f'perf_{i}@example.com',
+                'password': PASSWORD, 'password2': PASSWORD,
+            }, ('anonymous',)),
+            Route('auth-login', 'post', '/api/v1/auth/login/',
+                  lambda case, user, i: {'username': case.author.username, 'password': PASSWORD}, ('anonymous',)),
+            Route('auth-refresh', 'post', '/api/v1/auth/refresh/',
+                  lambda case, user, i: {'refresh': case.refresh_token(user, i)}, ('anonymous',)),
+            Route('auth-logout', 'post', '/api/v1/auth/logout/',
+                  lambda case, user, i: {'refresh': case.refresh_token(user, i)}),
+            Route('auth-profile', 'get', '/api/v1/auth/profile/'),
+            Route('auth-profile-update', 'patch', '/api/v1/auth/profile/', {'first_name': 'Perf'}),
+        ]
+
+    def measure(self, route, role):
+        user = self.user_for(role)
+        client = self.client_for(user)
+        samples, max_queries, statuses = [], 0, set()
+
+        for i in range(WARMUP + ITERATIONS):
+            path = _resolve(route.path, self, user, i)
+            data = _resolve(route.data, self, user, i)
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = getattr(client, route.method)(path, data, format=route.format)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = (time.perf_counter() - start) * 1000
+            statuses.add(response.status_code)
+            max_queries = max(max_queries, len(queries))
+            if i >= WARMUP:
+                samples.append(elapsed)
+
+        self.assertEqual(len(statuses), 1, f'inconsistent statuses {sorted(statuses)}')
+        return {
+            'status': statuses.pop(),
+            'max_queries': max_queries,
+            'p50_ms': round(statistics.median(samples), 2),
+            'p95_ms': round(percentile(samples, 95), 2),
+        }
+
+    def test_endpoint_budgets(self):
+        baseline = {} if UPDATE_BASELINE else json.loads(BASELINE_PATH.read_text())
+
+        for route in self.routes():
+            for role in route.roles:
+                key = f'{route.name}:{role}'
+                with self.subTest(key), transaction.atomic():
+                    result = self.measure(route, role)
+                    self.results[key] = result
+                    # Each case starts from the same dataset
+                    transaction.set_rollback(True)
+                    if UPDATE_BASELINE:
+                        continue
+
+                    self.assertIn(key, baseline, 'no baseline entry; rerun with PERF_UPDATE_BASELINE=1')
+                    budget = baseline[key]
+                    self.assertLess(result['status'], 500)
+                    self.assertEqual(result['status'], budget['status'], 'status changed')
+                    self.assertLessEqual(result['max_queries'], budget['max_queries'], 'query budget exceeded')
+                    if not CHECK_LATENCY:
+                        continue
+                    for metric in ('p50_ms', 'p95_ms'):
+                        limit = budget[metric] * LATENCY_FACTOR + LATENCY_SLACK_MS
+                        self.assertLessEqual(
+                            result[metric], limit,
+                            f'{metric} {result[metric]} over budget {limit:.2f} (baseline {budget[metric]})',
+                        )
+
+    def test_query_plans_use_indexes(self):
+        # Posts, comments and users are all over this size in the synthetic data
+        for result in check_plans(min_rows=50, analyze=True):
+            with self.subTest(result.case.name):
+                self.assertFalse(result.problems, '\n'.join([result.sql] + plan_lines(result.plan)))
+
+    def test_query_plan_checks_leave_the_database_alone(self):
+        popularity.get_counter().drain()
+        with CaptureQueriesContext(connection) as queries:
+            check_plans(min_rows=50)
+        self.assertNotIn('ANALYZE', [query['sql'] for query in queries])
+        self.assertEqual(popularity.get_counter().drain(), {})
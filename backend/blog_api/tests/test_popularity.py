@@ -0,0 +1,57 @@
+import threading
+from unittest import mock
+
+from .. import popularity
+from ..models import Post
+from .utils import BlogTestCase, client_for, make_author, make_post
+
+
+class PopularityTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        author = make_author()
+        self.posts = [make_post(author, title=f'Post {i}') for i in range(3)]
+
+    def test_popular_ranks_by_flushed_views(self):
+        for post, reads in zip(self.posts, (0, 3, 1)):
+            for _ in range(reads):
+                self.assertEqual(client_for().get(f'/api/v1/posts/{post.slug}/').status_code, 200)
+        self.assertEqual(Post.objects.get(pk=self.posts[1].pk).views_count, 0)
+        self.assertEqual(popularity.flush(), 2)
+
+        self.assertEqual(Post.objects.get(pk=self.posts[1].pk).views_count, 3)
+        results = client_for().get('/api/v1/posts/popular/').json()['results']
+        self.assertEqual([post['slug'] for post in results], [self.posts[1].slug, self.posts[2].slug])
+
+    def test_failed_flushes_keep_their_counts(self):
+        popularity.record_view(self.posts[0].slug)
+        with mock.patch.object(popularity, 'flush_views', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                popularity.flush()
+        self.assertEqual(popularity.flush(), 1)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).views_count, 1)
+
+    def test_exit_waits_for_a_running_flush(self):
+        started, release = threading.Event(), threading.Event()
+        written = []
+
+        def slow_flush_views(counts):
+            started.set()
+            release.wait(5)
+            written.append(dict(counts))
+            return len(counts)
+
+        with mock.patch.object(popularity, 'flush_views', slow_flush_views):
+            popularity.record_view('first')
+            running = threading.Thread(target=popularity.flush)
+            running.start()
+            started.wait(5)
+            popularity.record_view('second')
+            exiting = threading.Thread(target=popularity.flush_at_exit)
+            exiting.start()
+            exiting.join(0.1)
+            self.assertTrue(exiting.is_alive())
+            release.set()
+            running.join(5)
+            exiting.join(5)
+        self.assertEqual(written, [{'first': 1}, {'second': 1}])
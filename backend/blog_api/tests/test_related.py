@@ -0,0 +1,99 @@
+import threading
+from unittest import mock
+
+from django.test import override_settings
+
+from .. import related
+from ..models import Post, PostTerm, RelatedPost
+from .utils import BlogTestCase, BlogTransactionTestCase, client_for, make_author, make_post
+
+TEXTS = {
+    'Telescopes for beginners': 'Pick a telescope, find the nebula and track the comet across the night sky.',
+    'Observing a comet': 'A comet and a nebula through a small telescope under a dark night sky.',
+    'Sourdough at home': 'Feed the starter, fold the dough and bake the loaf in a hot oven.',
+    'Baking rye bread': 'Rye dough needs a strong starter and a long bake in the oven.',
+}
+
+
+def neighbours(post):
+    return list(
+        RelatedPost.objects.filter(post=post).order_by('rank').values_list('related__title', flat=True)
+    )
+
+
+class RelatedPostsTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author()
+
+    def make_posts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return {title: make_post(self.author, title=title, content=content) for title, content in TEXTS.items()}
+
+    def test_rebuild_pairs_posts_sharing_terms(self):
+        with mock.patch.object(related, 'schedule'):
+            posts = self.make_posts()
+        self.assertFalse(RelatedPost.objects.exists())
+        self.assertEqual(related.rebuild(), 4)
+
+        self.assertEqual(neighbours(posts['Observing a comet'])[0], 'Telescopes for beginners')
+        self.assertEqual(neighbours(posts['Baking rye bread'])[0], 'Sourdough at home')
+        response = client_for().get(f'/api/v1/posts/{posts["Sourdough at home"].slug}/related/')
+        self.assertEqual(response.json()[0]['title'], 'Baking rye bread')
+
+    def test_saves_update_the_index_after_commit(self):
+        posts = self.make_posts()
+        self.assertEqual(neighbours(posts['Observing a comet'])[0], 'Telescopes for beginners')
+
+        post = posts['Baking rye bread']
+        with self.captureOnCommitCallbacks() as callbacks:
+            post.title = 'Comet watching'
+            post.content = 'The comet and the nebula in a telescope at night.'
+            post.save()
+        self.assertEqual(neighbours(post)[0], 'Sourdough at home')
+        for callback in callbacks:
+            callback()
+        self.assertIn(neighbours(post)[0], ('Observing a comet', 'Telescopes for beginners'))
+        self.assertNotIn('Comet watching', neighbours(posts['Sourdough at home']))
+
+    def test_only_text_changes_are_queued(self):
+        post = make_post(self.author, title='Telescopes', content='A nebula.')
+        with mock.patch.object(related, 'schedule') as schedule:
+            Post.objects.get(pk=post.pk).save(update_fields=['views_count'])
+            post.status = 'draft'
+            post.save()
+        schedule.assert_called_once_with(related.update_post, post.pk, False)
+
+    def test_deleted_posts_leave_every_list(self):
+        posts = self.make_posts()
+        with self.captureOnCommitCallbacks(execute=True):
+            posts['Telescopes for beginners'].delete()
+        self.assertFalse(RelatedPost.objects.filter(related__title='Telescopes for beginners').exists())
+        self.assertEqual(neighbours(posts['Sourdough at home']), ['Baking rye bread'])
+
+    @override_settings(RELATED_MAX_POSTINGS=2)
+    def test_posting_lists_are_capped(self):
+        with mock.patch.object(related, 'schedule'):
+            self.make_posts()
+            make_post(self.author, title='Nebula', content='A nebula.')
+        related.rebuild()
+        # 'nebula' is in three posts, 'comet' in two
+        self.assertFalse(PostTerm.objects.filter(term='nebula', weight__gt=0).exists())
+        self.assertEqual(PostTerm.objects.filter(term='nebula').count(), 3)
+        self.assertEqual(PostTerm.objects.filter(term='comet', weight__gt=0).count(), 2)
+
+
+@override_settings(RELATED_POSTS_IN_BACKGROUND=True)
+class BackgroundUpdateTests(BlogTransactionTestCase):
+    def test_updates_run_in_the_background(self):
+        author = make_author()
+        # Hold the worker until the posts are written; the test database
+        # can't take writes from two threads at once
+        release = threading.Event()
+        related.get_executor().submit(release.wait, 10)
+        posts = [make_post(author, title=title, content=content) for title, content in TEXTS.items()]
+        self.assertFalse(RelatedPost.objects.exists())
+        release.set()
+        # The worker runs tasks in order; this one finishes after the updates
+        related.get_executor().submit(lambda: None).result(timeout=10)
+        self.assertEqual(neighbours(posts[1])[0], 'Telescopes for beginners')
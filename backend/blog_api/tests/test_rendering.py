@@ -0,0 +1,88 @@
+import time
+
+from django.test import SimpleTestCase
+
+from ..rendering import EXCERPT_LENGTH, INLINE_SPAN, render, render_inline
+from .utils import BlogTestCase, client_for, make_author, make_category, make_post
+
+
+class InlineTests(SimpleTestCase):
+    def test_elements(self):
+        html, plain = render_inline('Use `a<b>` with **bold _and em_** and [docs](https://example.com/a_(b))')
+        self.assertEqual(
+            html,
+            'Use <code>a&lt;b&gt;</code> with <strong>bold <em>and em</em></strong> and '
+            '<a href="https://example.com/a_(b)">docs</a>',
+        )
+        self.assertEqual(plain, 'Use a<b> with bold and em and docs')
+
+    def test_text_and_attributes_are_escaped(self):
+        html, _ = render_inline('<script>alert(1)</script> [x](https://e.com/?a="b"&c)')
+        self.assertEqual(
+            html, '&lt;script&gt;alert(1)&lt;/script&gt; <a href="https://e.com/?a=&quot;b&quot;&amp;c">x</a>'
+        )
+
+    def test_unsafe_links_keep_only_their_text(self):
+        self.assertEqual(render_inline('[click](javascript:alert(1))')[0], 'click')
+        self.assertEqual(render_inline('[home](//evil.example)')[0], 'home')
+
+    def test_emphasis_longer_than_the_span_stays_text(self):
+        span = 'a' * INLINE_SPAN
+        self.assertEqual(render_inline(f'*{span}*')[0], f'<em>{span}</em>')
+        self.assertEqual(render_inline(f'*{span}a*')[0], f'*{span}a*')
+        self.assertEqual(render_inline('*a\nb*')[0], '*a\nb*')
+
+    def test_unclosed_delimiters_render_in_linear_time(self):
+        for text in ('*a ' * 30000, '_a ' * 30000, '**a ' * 20000, '[a ' * 30000):
+            started = time.monotonic()
+            render_inline(text)
+            self.assertLess(time.monotonic() - started, 5)
+
+
+class RenderTests(SimpleTestCase):
+    def test_blocks(self):
+        rendered = render('# Title\n\nIntro <b>text</b>.\n\n> quoted\n\n- one\n- two\n\n```\n<code>\n```\n\n---')
+        self.assertEqual(rendered.html, '\n'.join([
+            '<h1 id="title">Title</h1>',
+            '<p>Intro &lt;b&gt;text&lt;/b&gt;.</p>',
+            '<blockquote><p>quoted</p></blockquote>',
+            '<ul><li>one</li><li>two</li></ul>',
+            '<pre><code>&lt;code&gt;</code></pre>',
+            '<hr>',
+        ]))
+
+    def test_table_of_contents_lists_unique_h2_and_h3_ids(self):
+        rendered = render('# Top\n\n## Setup\n\n### Tools\n\n#### Deep\n\n## Setup')
+        self.assertEqual(rendered.toc, [
+            {'level': 2, 'text': 'Setup', 'id': 'setup'},
+            {'level': 3, 'text': 'Tools', 'id': 'tools'},
+            {'level': 2, 'text': 'Setup', 'id': 'setup-2'},
+        ])
+        self.assertIn('<h4 id="deep">Deep</h4>', rendered.html)
+
+    def test_excerpt_is_plain_paragraph_text_cut_at_a_word(self):
+        rendered = render('## Heading\n\nA **bold** start.\n\n' + 'word ' * 100)
+        self.assertTrue(rendered.excerpt.startswith('A bold start. word word'))
+        self.assertTrue(rendered.excerpt.endswith('word...'))
+        self.assertLessEqual(len(rendered.excerpt), EXCERPT_LENGTH + 3)
+        self.assertEqual(render('Short one.').excerpt, 'Short one.')
+
+    def test_reading_time_rounds_words_up_to_minutes(self):
+        self.assertEqual(render('').reading_time, 0)
+        self.assertEqual(render('word').reading_time, 1)
+        rendered = render('word ' * 401)
+        self.assertEqual((rendered.word_count, rendered.reading_time), (401, 3))
+
+
+class PostRenderingTests(BlogTestCase):
+    def test_posts_store_their_rendering(self):
+        post = make_post(make_author(), content='## Part\n\nIt is *here*.')
+        self.assertEqual(post.content_html, '<h2 id="part">Part</h2>\n<p>It is <em>here</em>.</p>')
+        self.assertEqual(post.content_toc, [{'level': 2, 'text': 'Part', 'id': 'part'}])
+        self.assertEqual((post.word_count, post.reading_time, post.excerpt), (4, 1, 'It is here.'))
+
+    def test_content_length_is_limited(self):
+        body = {'title': 'Long', 'content': 'a' * 100001, 'category_id': make_category().pk}
+        response = client_for(make_author()).post('/api/v1/posts/', body, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('content', response.json())
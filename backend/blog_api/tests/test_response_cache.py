@@ -0,0 +1,102 @@
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from ..models import Category
+from ..response_cache import _tag_key, check_shared_cache, get_cache, new_stamp
+from ..views.posts import PostViewSet
+from .utils import BlogTestCase, client_for, make_author, make_category, make_post
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=300)
+class ResponseCacheTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author()
+        self.category = make_category()
+        self.post = make_post(self.author, title='Cached', category=self.category)
+        self.url = f'/api/v1/posts/{self.post.slug}/'
+
+    def test_second_read_is_a_hit(self):
+        first = client_for().get(self.url)
+        second = client_for().get(self.url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_writes_invalidate_on_commit(self):
+        client_for().get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Edited'
+            self.post.save()
+        response = client_for().get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['title'], 'Edited')
+
+    def test_category_rename_reaches_post_lists(self):
+        client_for().get('/api/v1/posts/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.filter(pk=self.category.pk).update(name='Renamed')
+            Category.objects.get(pk=self.category.pk).save()
+        response = client_for().get('/api/v1/posts/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['results'][0]['category']['name'], 'Renamed')
+
+    def test_conditional_requests(self):
+        for response in (client_for().get(self.url), client_for().get(self.url)):
+            with self.subTest(response['X-Cache']):
+                etag = client_for().get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(etag.status_code, 304)
+                self.assertEqual(etag.content, b'')
+                since = client_for().get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(since.status_code, 304)
+        stale = client_for().get(self.url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_responses_vary_by_caller_and_format(self):
+        response = client_for().get(self.url)
+        self.assertLessEqual({'Authorization', 'Accept'}, {value.strip() for value in response['Vary'].split(',')})
+        packed = client_for().get(self.url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(packed['X-Cache'], 'MISS')
+        self.assertEqual(packed['Content-Type'], 'application/msgpack')
+
+    def test_drafts_are_cached_per_author(self):
+        make_post(self.author, title='Draft', status='draft')
+        anonymous = client_for().get('/api/v1/posts/').json()
+        own = client_for(self.author).get('/api/v1/posts/').json()
+        self.assertEqual(anonymous['count'], 1)
+        self.assertEqual(own['count'], 2)
+        self.assertEqual(client_for().get('/api/v1/posts/').json()['count'], 1)
+
+    def test_writes_during_a_read_are_not_cached_over(self):
+        original = PostViewSet.get_cache_tags
+        # A tag known before the view runs, and one learnt from its data
+        for url, tag in ((self.url, f'post:{self.post.slug}'), ('/api/v1/posts/', f'category:{self.category.slug}')):
+            def get_cache_tags(view, data):
+                if data is not None:
+                    # A write committing after the view read the database
+                    get_cache().set(_tag_key(tag), new_stamp(), None)
+                return original(view, data)
+
+            with self.subTest(tag):
+                with mock.patch.object(PostViewSet, 'get_cache_tags', get_cache_tags):
+                    self.assertEqual(client_for().get(url)['X-Cache'], 'MISS')
+                self.assertEqual(client_for().get(url)['X-Cache'], 'MISS')
+                self.assertEqual(client_for().get(url)['X-Cache'], 'HIT')
+
+
+class SharedCacheCheckTests(BlogTestCase):
+    def test_per_process_cache_is_refused(self):
+        with self.settings(RESPONSE_CACHE_TIMEOUT=300), self.assertRaises(ImproperlyConfigured):
+            check_shared_cache()
+        with self.settings(RESPONSE_CACHE_TIMEOUT=0):
+            check_shared_cache()
+
+    def test_shared_cache_is_accepted(self):
+        with tempfile.TemporaryDirectory() as location:
+            shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+            with self.settings(CACHES={'default': shared}, RESPONSE_CACHE_TIMEOUT=300):
+                check_shared_cache()
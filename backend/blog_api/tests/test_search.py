@@ -0,0 +1,60 @@
+from ..models import Post
+from ..search import get_search_backend
+from .utils import BlogTestCase, client_for, make_author, make_post
+
+
+class PostSearchTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author()
+
+    def search(self, query, **params):
+        response = client_for().get('/api/v1/posts/', {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_title_matches_rank_above_content_matches(self):
+        body = make_post(self.author, title='Notes', content='Something about telescopes in passing.')
+        title = make_post(self.author, title='Telescopes', content='A short note.')
+        results = self.search('telescopes')
+        self.assertEqual([post['id'] for post in results], [title.pk, body.pk])
+        self.assertIn('<mark>', results[0]['search_snippet'])
+
+    def test_last_term_matches_as_a_prefix(self):
+        post = make_post(self.author, title='Astronomy for beginners')
+        self.assertEqual([result['id'] for result in self.search('astro')], [post.pk])
+        self.assertEqual([result['id'] for result in self.search('astronomy begin')], [post.pk])
+
+    def test_ordering_parameter_overrides_relevance(self):
+        first = make_post(self.author, title='Zebra telescopes', content='telescopes telescopes')
+        second = make_post(self.author, title='Apple', content='telescopes')
+        results = self.search('telescopes', ordering='title')
+        self.assertEqual([post['id'] for post in results], [second.pk, first.pk])
+
+    def test_index_follows_edits_and_deletes(self):
+        post = make_post(self.author, title='Old title')
+        post.title = 'Comet sighting'
+        post.save()
+        self.assertEqual(self.search('old'), [])
+        self.assertEqual([result['id'] for result in self.search('comet')], [post.pk])
+        post.delete()
+        self.assertEqual(self.search('comet'), [])
+
+    def test_drafts_are_not_found_by_readers(self):
+        make_post(self.author, title='Secret telescope', status='draft')
+        self.assertEqual(self.search('telescope'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        make_post(self.author, title='Telescopes')
+        for query in ('"', 'telescopes OR', 'NEAR(a b)', 'title:x', '*', '-telescopes'):
+            with self.subTest(query):
+                response = client_for().get('/api/v1/posts/', {'search': query})
+                self.assertEqual(response.status_code, 200)
+
+    def test_rebuild_indexes_every_post(self):
+        posts = [make_post(self.author, title=f'Nebula {i}') for i in range(3)]
+        backend = get_search_backend()
+        backend.clear()
+        self.assertEqual(self.search('nebula'), [])
+        self.assertEqual(backend.rebuild(Post.objects.all()), len(posts))
+        self.assertEqual(len(self.search('nebula')), len(posts))
@@ -0,0 +1,95 @@
+import json
+
+import msgpack
+from django.test import override_settings
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from ..models import Post
+from ..serializers.compiled import get_compiled_serializer
+from ..serializers.posts import PostListSerializer, UserSerializer
+from ..renderers import FastJSONRenderer
+from .utils import BlogTestCase, client_for, make_author, make_category, make_post
+
+
+class ViewerMixin:
+    def get_viewer(self, obj):
+        return self.context['viewer']
+
+
+class ViewerUserSerializer(ViewerMixin, UserSerializer):
+    viewer = serializers.SerializerMethodField()
+    projection_fields = {'viewer': ()}
+
+    class Meta(UserSerializer.Meta):
+        fields = ('id', 'viewer')
+
+
+class ViewerPostSerializer(ViewerMixin, PostListSerializer):
+    author = ViewerUserSerializer(read_only=True)
+    viewer = serializers.SerializerMethodField()
+    projection_fields = {'viewer': ()}
+
+    class Meta(PostListSerializer.Meta):
+        fields = ('id', 'author', 'viewer')
+
+
+class SerializationTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author(first_name='Ada')
+        category = make_category()
+        for i in range(3):
+            make_post(self.author, title=f'Post {i} ', category=category, excerpt=f'Excerpt {i}')
+
+    def test_sparse_fieldsets(self):
+        results = client_for().get('/api/v1/posts/', {'fields': 'id,title,author'}).json()['results']
+        self.assertEqual(set(results[0]), {'id', 'title', 'author'})
+        results = client_for().get('/api/v1/posts/', {'exclude': 'author,category'}).json()['results']
+        self.assertFalse({'author', 'category'} & set(results[0]))
+        self.assertIn('title', results[0])
+
+    def test_compiled_list_matches_the_serializer(self):
+        request = APIRequestFactory().get('/api/v1/posts/')
+        request.query_params = request.GET
+        serializer = PostListSerializer(context={'request': request})
+        compiled = get_compiled_serializer(serializer, ('id', 'slug', 'status', 'author', 'created_at'))
+        self.assertIsNotNone(compiled)
+
+        posts = Post.objects.select_related('author', 'category').order_by('pk')
+        rows, annotations = compiled.values(posts)
+        expected = PostListSerializer(posts, many=True, context={'request': request}).data
+        renderer = FastJSONRenderer()
+        self.assertEqual(renderer.render(compiled.serialize(rows, annotations)), renderer.render(expected))
+
+    def test_compiled_methods_see_the_current_context(self):
+        posts = Post.objects.select_related('author').order_by('pk')
+        for viewer in ('first', 'second'):
+            compiled = get_compiled_serializer(ViewerPostSerializer(context={'viewer': viewer}))
+            [data, *_] = compiled.serialize(*compiled.values(posts))
+            self.assertEqual((data['viewer'], data['author']['viewer']), (viewer, viewer))
+
+    def test_compiled_and_uncompiled_responses_match(self):
+        compiled = client_for().get('/api/v1/posts/').content
+        with override_settings(COMPILED_SERIALIZERS=False):
+            self.assertEqual(client_for().get('/api/v1/posts/').content, compiled)
+
+    def test_fast_json_matches_stdlib_json(self):
+        response = client_for().get('/api/v1/posts/')
+        # Line separators are escaped as DRF's JSONRenderer does
+        self.assertIn(b'\\u2028', response.content)
+        self.assertEqual(json.loads(response.content), response.json())
+
+    def test_message_pack_negotiation(self):
+        response = client_for().get('/api/v1/posts/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), client_for().get('/api/v1/posts/').json())
+
+    def test_message_pack_requests(self):
+        category = make_category('Space')
+        body = msgpack.packb({'title': 'Packed', 'content': 'Body', 'category_id': category.pk})
+        response = client_for(self.author).generic(
+            'POST', '/api/v1/posts/', body, content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(Post.objects.filter(title='Packed', category=category).exists())
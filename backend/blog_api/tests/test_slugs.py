@@ -0,0 +1,56 @@
+from django.test import SimpleTestCase
+
+from ..slugs import title_key
+from .utils import BlogTestCase, client_for, make_author, make_category, make_post
+
+
+class TitleKeyTests(SimpleTestCase):
+    def test_compatible_forms_case_and_spacing_compare_equal(self):
+        self.assertEqual(title_key('  Ｓｔｒａße   Guide '), title_key('strasse guide'))
+
+
+class SlugTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = make_author()
+
+    def slugs(self, *titles):
+        return [make_post(self.author, title=title).slug for title in titles]
+
+    def test_repeated_titles_get_the_next_suffix(self):
+        self.assertEqual(self.slugs('Foo', 'Foo', 'Foo'), ['foo', 'foo-2', 'foo-3'])
+
+    def test_titles_ending_in_numbers_are_not_suffixes(self):
+        self.assertEqual(self.slugs('Foo 2024', 'Foo', 'Foo'), ['foo-2024', 'foo', 'foo-2'])
+
+    def test_suffixes_skip_slugs_of_other_titles(self):
+        self.assertEqual(self.slugs('Foo 2', 'Foo', 'Foo', 'Foo'), ['foo-2', 'foo', 'foo-3', 'foo-4'])
+
+    def test_renamed_posts_keep_their_slugs_taken(self):
+        post = make_post(self.author, title='Foo')
+        post.title = 'Bar'
+        post.save()
+        self.assertEqual(self.slugs('Foo', 'Foo'), ['foo-2', 'foo-3'])
+
+
+class TitleValidationTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = client_for(make_author())
+        self.category = make_category()
+
+    def create(self, title):
+        body = {'title': title, 'content': 'Text.', 'category_id': self.category.pk}
+        return self.client.post('/api/v1/posts/', body, format='json')
+
+    def test_duplicates_are_found_by_key(self):
+        self.assertEqual(self.create('Foo  Bar').status_code, 201)
+        response = self.create('ＦＯＯ bar')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already exists', response.json()['title'][0])
+
+    def test_titles_too_long_once_normalized_are_rejected(self):
+        # 12 characters, 216 once normalized
+        response = self.create('ﷺ' * 12)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('once normalized', response.json()['title'][0])
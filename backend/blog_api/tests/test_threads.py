@@ -0,0 +1,80 @@
+from ..models import Comment
+from .utils import BlogTestCase, client_for, make_author, make_post, make_user
+
+
+class CommentThreadTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.reader = make_user('reader')
+        self.post = make_post(make_author())
+        self.url = f'/api/v1/posts/{self.post.slug}/comments/'
+
+    def comment(self, content, parent=None):
+        return Comment.objects.create(post=self.post, author=self.reader, content=content, parent=parent)
+
+    def contents(self, tree):
+        return [(node['content'], self.contents(node['replies'])) for node in tree]
+
+    def test_thread_nests_replies_under_newest_roots_first(self):
+        first = self.comment('first')
+        reply = self.comment('reply', first)
+        self.comment('nested', reply)
+        self.comment('second')
+
+        response = client_for().get(f'{self.url}thread/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.contents(response.json()['results']), [
+            ('second', []),
+            ('first', [('reply', [('nested', [])])]),
+        ])
+
+    def test_depth_and_replies_limits(self):
+        root = self.comment('root')
+        replies = [self.comment(f'reply {i}', root) for i in range(4)]
+        self.comment('nested', replies[0])
+
+        tree = client_for().get(f'{self.url}thread/', {'depth': 1, 'replies': 2}).json()['results']
+        self.assertEqual(self.contents(tree), [('root', [('reply 0', []), ('reply 1', [])])])
+        self.assertEqual(tree[0]['replies_count'], 4)
+        self.assertEqual(tree[0]['replies'][0]['replies_count'], 1)
+
+    def test_replies_are_oldest_first(self):
+        root = self.comment('root')
+        for i in range(3):
+            self.comment(f'reply {i}', root)
+        tree = client_for().get(f'{self.url}{root.pk}/replies/').json()['results']
+        self.assertEqual([node['content'] for node in tree], ['reply 0', 'reply 1', 'reply 2'])
+
+    def test_paths_and_depth(self):
+        root = self.comment('root')
+        reply = self.comment('reply', root)
+        nested = self.comment('nested', reply)
+        self.assertEqual((root.depth, reply.depth, nested.depth), (0, 1, 2))
+        self.assertTrue(nested.path.startswith(reply.path) and reply.path.startswith(root.path))
+        low, high = root.subtree_bounds()
+        self.assertEqual(
+            list(Comment.objects.filter(path__gt=low, path__lt=high).order_by('path')), [reply, nested]
+        )
+
+    def test_reply_validation(self):
+        other_post = make_post(self.post.author, title='Other')
+        foreign = Comment.objects.create(post=other_post, author=self.reader, content='elsewhere')
+        client = client_for(self.reader)
+        response = client.post(self.url, {'content': 'x', 'parent': foreign.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        parent = None
+        with self.settings(COMMENT_MAX_DEPTH=2):
+            for depth in range(2):
+                parent = self.comment(f'level {depth}', parent)
+            response = client.post(self.url, {'content': 'too deep', 'parent': parent.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reply_counts_follow_creates_and_deletes(self):
+        root = self.comment('root')
+        reply = self.comment('reply', root)
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 1)
+        reply.delete()
+        root.refresh_from_db()
+        self.assertEqual(root.replies_count, 0)
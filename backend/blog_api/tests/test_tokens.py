@@ -0,0 +1,47 @@
+import time
+from unittest import mock
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .. import blacklist
+from ..blacklist import OutstandingTokenBuffer
+from ..tokens import RefreshToken
+from .utils import BlogTransactionTestCase, client_for, make_user
+
+
+class RefreshTokenTests(BlogTransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('reader')
+        # Rows wait for a batch that never fills, like on a quiet worker
+        self.buffer = OutstandingTokenBuffer(batch_size=50, flush_interval=0.05)
+        patcher = mock.patch.object(blacklist, '_buffer', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.buffer.flush)
+
+    def test_idle_buffers_flush_on_a_timer(self):
+        token = RefreshToken.for_user(self.user)
+        self.assertFalse(OutstandingToken.objects.exists())
+        deadline = time.monotonic() + 5
+        while not OutstandingToken.objects.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(OutstandingToken.objects.get().jti, token['jti'])
+        self.assertEqual(self.buffer.rows, {})
+
+    def test_logout_writes_a_queued_token_through(self):
+        self.buffer.flush_interval = 60
+        token = RefreshToken.for_user(self.user)
+        response = client_for(self.user).post('/api/v1/auth/logout/', {'refresh': str(token)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token['jti']).exists())
+        response = client_for().post('/api/v1/auth/refresh/', {'refresh': str(token)}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_rotated_tokens_cannot_be_reused(self):
+        token = str(RefreshToken.for_user(self.user))
+        first = client_for().post('/api/v1/auth/refresh/', {'refresh': token}, format='json')
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('refresh', first.json())
+        second = client_for().post('/api/v1/auth/refresh/', {'refresh': token}, format='json')
+        self.assertEqual(second.status_code, 401)
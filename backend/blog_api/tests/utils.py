@@ -0,0 +1,81 @@
+"""
+Fixtures shared by the feature tests.
+
+`BlogTestCase` runs each test against an empty database with the
+process-wide caches (responses, authenticated users) cleared, the response
+cache off, timed background work (view-count flushes, token syncs and
+prunes) off, and a fast password hasher.
+"""
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .. import authentication, popularity
+from ..search import get_search_backend
+from ..models import Category, Post, User
+
+PASSWORD = 'test-pass-123'
+
+TEST_SETTINGS = dict(
+    # Writes only invalidate cached responses on commit; see test_response_cache
+    RESPONSE_CACHE_TIMEOUT=0,
+    REQUEST_TIMING_SAMPLE_RATE=0,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    TOKEN_OUTSTANDING_BATCH_SIZE=1,
+    TOKEN_BLACKLIST_SYNC_INTERVAL=0,
+    TOKEN_PRUNE_INTERVAL=0,
+    VIEW_COUNT_FLUSH_INTERVAL=0,
+    RELATED_POSTS_IN_BACKGROUND=False,
+)
+
+
+def make_user(username, **fields):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', password=PASSWORD, **fields
+    )
+
+
+def make_author(username='author', **fields):
+    return make_user(username, is_author=True, **fields)
+
+
+def make_category(name='Science'):
+    return Category.objects.create(name=name)
+
+
+def make_post(author, title='A post', content='Some content.', **fields):
+    fields.setdefault('status', 'published')
+    return Post.objects.create(author=author, title=title, content=content, **fields)
+
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+def reset_process_state():
+    for alias in caches:
+        caches[alias].clear()
+    authentication.get_local_cache().clear()
+    authentication.get_local_generations().clear()
+    popularity.get_counter().drain()
+
+
+@override_settings(**TEST_SETTINGS)
+class BlogTestCase(TestCase):
+    def setUp(self):
+        reset_process_state()
+        self.addCleanup(reset_process_state)
+
+
+@override_settings(**TEST_SETTINGS)
+class BlogTransactionTestCase(TransactionTestCase):
+    """For behaviour that only happens once a transaction commits."""
+    def setUp(self):
+        reset_process_state()
+        self.addCleanup(reset_process_state)
+        # The search index is not a model table, so flushing leaves it behind
+        self.addCleanup(lambda: get_search_backend().clear())
@@ -0,0 +1,82 @@
+"""
+Threaded comment reads over the materialized `Comment.path`.
+
+A page of comments (top-level comments of a post, or the direct replies
+of one comment) is fetched first; then all of their descendants come
+back in a single query: one `path` range per page item on the
+`(post, path)` index, bounded by `depth` and cut to the first
+`replies` siblings at every level with a ROW_NUMBER() window. Rows arrive
+in path order, so the tree is assembled in one pass.
+
+Only the top level is paginated by the regular paginator. Deeper levels
+carry `replies_count`, and clients page through the rest with
+`/comments/{id}/replies/`.
+"""
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+DEPTH_PARAM = 'depth'
+REPLIES_PARAM = 'replies'
+DEFAULT_DEPTH = 3
+DEFAULT_REPLIES = 5
+MAX_REPLIES = 50
+
+
+def get_max_depth():
+    """Number of comment levels allowed, top-level comments included."""
+    return getattr(settings, 'COMMENT_MAX_DEPTH', 6)
+
+
+def _int_param(request, name, default, low, high):
+    try:
+        value = int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    return max(low, min(value, high))
+
+
+def thread_params(request):
+    """Return `(depth, replies)` from the query string, clamped to the limits."""
+    depth = _int_param(request, DEPTH_PARAM, DEFAULT_DEPTH, 0, get_max_depth())
+    replies = _int_param(request, REPLIES_PARAM, DEFAULT_REPLIES, 1, MAX_REPLIES)
+    return depth, replies
+
+
+def descendants(queryset, post_id, paths, max_depth, replies):
+    """
+    Comments of `post_id` below any of `paths`, at most `max_depth` deep
+    and `replies` per parent, in path order.
+    """
+    within = Q()
+    for path in paths:
+        within |= Q(path__gt=path, path__lt=path + '~')
+    # The window filter only selects ids, so the outer query is free to use
+    # values()/select_related without tripping over the QUALIFY wrapper
+    ranked = queryset.model.objects.filter(within, post_id=post_id, depth__lte=max_depth).annotate(
+        sibling_rank=Window(RowNumber(), partition_by=[F('parent_id')], order_by=[F('path').asc()])
+    ).filter(sibling_rank__lte=replies).values('pk')
+    return queryset.filter(pk__in=ranked).order_by('path')
+
+
+def attach_replies(items, below, key, to_data):
+    """
+    Build nested output: each item becomes `to_data(item)` with a `replies`
+    list. `key(item)` returns `(id, parent_id)`; `below` must be in path
+    order. Rows whose parent was cut by a limit are dropped.
+    """
+    nodes = {}
+    tree = []
+    for item in items:
+        data = nodes[key(item)[0]] = to_data(item)
+        data['replies'] = []
+        tree.append(data)
+    for item in below:
+        pk, parent_id = key(item)
+        parent = nodes.get(parent_id)
+        if parent is None:
+            continue
+        data = nodes[pk] = to_data(item)
+        data['replies'] = []
+        parent['replies'].append(data)
+    return tree
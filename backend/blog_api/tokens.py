@@ -0,0 +1,69 @@
+"""
+Refresh tokens backed by `blog_api.blacklist` instead of per-token queries.
+"""
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import get_buffer, get_filter, schedule_prune
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    RefreshToken whose blacklist check goes through the Bloom filter and
+    whose OutstandingToken rows are written in batches.
+    """
+    def outstanding_row(self, user_id):
+        return {
+            'jti': self.payload[api_settings.JTI_CLAIM],
+            'token': str(self),
+            'user_id': user_id,
+            'created_at': self.current_time,
+            'expires_at': datetime_from_epoch(self.payload['exp']),
+        }
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if get_filter().might_contain(jti) and BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """
+        Blacklist this token, writing its outstanding row first if it is
+        still queued or was never recorded. Raises TokenError when another
+        request blacklisted it first.
+        """
+        jti = self.payload[api_settings.JTI_CLAIM]
+        row = get_buffer().pop(jti)
+        if row is not None:
+            token = OutstandingToken.objects.create(**row)
+        else:
+            token = OutstandingToken.objects.filter(jti=jti).first()
+            if token is None:
+                user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+                if not get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).exists():
+                    user_id = None
+                token, _created = OutstandingToken.objects.get_or_create(jti=jti, defaults=self.outstanding_row(user_id))
+        try:
+            with transaction.atomic():
+                blacklisted = BlacklistedToken.objects.create(token=token)
+        except IntegrityError:
+            raise TokenError(_('Token is blacklisted'))
+        get_filter().add(jti)
+        schedule_prune()
+        return blacklisted
+
+    def outstand(self):
+        get_buffer().add(self.outstanding_row(self.payload.get(api_settings.USER_ID_CLAIM)))
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which inserts the outstanding row itself
+        token = super(tokens.BlacklistMixin, cls).for_user(user)
+        get_buffer().add(token.outstanding_row(user.pk))
+        return token
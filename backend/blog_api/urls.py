@@ -6,11 +6,16 @@ from .views.auth import RegisterView, ProfileView, LogoutView
 from .views.posts import PostViewSet
 from .views.categories import CategoryViewSet
 from .views.comments import CommentViewSet
+from .views.feed import FeedViewSet
+from .views.batch import BatchView
+from .views.images import ImageUploadView
+from .views.live import comment_stream
 
 # Create router for viewsets
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
 router.register(r'categories', CategoryViewSet, basename='category')
+router.register(r'feed', FeedViewSet, basename='feed')
 
 # Nested router for comments under posts
 comments_router = SimpleRouter()
@@ -24,6 +29,15 @@ urlpatterns = [
     path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('auth/profile/', ProfileView.as_view(), name='profile'),
     
+    # Post image uploads (resized derivatives are served under MEDIA_URL)
+    path('images/', ImageUploadView.as_view(), name='image-upload'),
+    
+    # Several API calls in one round-trip
+    path('batch/', BatchView.as_view(), name='batch'),
+    
+    # Live comment stream (SSE, ASGI only); before the router's comment detail route
+    path('posts/<slug:post_slug>/comments/stream/', comment_stream, name='post-comment-stream'),
+    
     # Nested comments under posts
     path('posts/<slug:post_slug>/', include(comments_router.urls)),
     
@@ -1,9 +1,10 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from ..serializers.auth import UserRegistrationSerializer, UserProfileSerializer
+from ..tokens import RefreshToken
+from ..instrumentation import SerializationTimingMixin, serialized
 
 User = get_user_model()
 
@@ -26,7 +27,7 @@ class RegisterView(generics.CreateAPIView):
         refresh = RefreshToken.for_user(user)
         
         return Response({
-            'user': UserProfileSerializer(user).data,
+            'user': serialized(UserProfileSerializer(user)),
             'tokens': {
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -35,7 +36,7 @@ class RegisterView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+class ProfileView(SerializationTimingMixin, generics.RetrieveUpdateAPIView):
     """
     API endpoint for viewing and updating user profile.
     GET/PUT/PATCH /api/v1/auth/profile/
@@ -0,0 +1,29 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..batch import run_batch
+from ..serializers.batch import BatchSerializer
+
+
+class BatchView(APIView):
+    """
+    API endpoint running several API calls in one round-trip (see blog_api.batch).
+    POST /api/v1/batch/
+    {"requests": [{"method": "GET", "path": "/api/v1/categories/"}, ...], "atomic": false}
+
+    Returns {"responses": [{"status", "headers", "body"}, ...]} in request
+    order; atomic batches also say whether their writes were `committed`.
+    Each call is checked against its own endpoint's permissions.
+    """
+    permission_classes = (permissions.AllowAny,)
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        atomic = serializer.validated_data['atomic']
+        responses, committed = run_batch(request, serializer.validated_data['requests'], atomic)
+
+        data = {'responses': responses}
+        if atomic:
+            data['committed'] = committed
+        return Response(data)
@@ -2,14 +2,23 @@ from rest_framework import viewsets
 from rest_framework.permissions import AllowAny
 from ..models import Category
 from ..serializers.categories import CategorySerializer
+from ..response_cache import CachedResponseMixin, items_of
+from ..instrumentation import SerializationTimingMixin
 
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(CachedResponseMixin, SerializationTimingMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Category model (read-only).
+    Served from the tag-invalidated response cache.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
     pagination_class = None  # Disable pagination for categories
+
+    def get_cache_tags(self, data):
+        tags = {'categories'}
+        for item in items_of(data):
+            tags.add(f"category:{item['slug']}")
+        return tags
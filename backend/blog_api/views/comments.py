@@ -1,25 +1,42 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from ..models import Comment, Post
 from ..serializers.comments import CommentSerializer, CommentCreateSerializer
 from ..permissions import IsOwnerOrReadOnly
+from ..pagination import KeysetPaginationMixin
+from ..fieldsets import ProjectionMixin
+from ..serializers.compiled import CompiledListMixin, get_compiled_serializer
+from ..instrumentation import SerializationTimingMixin, serialized, serializing
+from .. import threads
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(KeysetPaginationMixin, ProjectionMixin, CompiledListMixin, SerializationTimingMixin,
+                     viewsets.ModelViewSet):
     """
     ViewSet for Comment model.
     Nested under posts: /api/v1/posts/{post_slug}/comments/
+    Lists accept `?pagination=cursor` for keyset (newest-first) pages.
+    Reads accept `?fields=`/`?exclude=` and only load the columns they render;
+    lists serialize straight from `.values()` rows.
+    `thread/` and `{id}/replies/` return nested replies (see blog_api.threads).
     """
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    # `replies/` is oldest first and `thread/` pages its roots by number
+    keyset_actions = ('list',)
+    projection_actions = ('list', 'retrieve', 'thread', 'replies')
+    projection_required = ('id', 'post', 'parent', 'path', 'depth', 'created_at')
     
     def get_queryset(self):
         post_slug = self.kwargs.get('post_slug')
         if post_slug:
-            return Comment.objects.filter(post__slug=post_slug).select_related('author', 'post')
-        return Comment.objects.select_related('author', 'post').all()
+            queryset = Comment.objects.filter(post__slug=post_slug).select_related('author', 'post')
+        else:
+            queryset = Comment.objects.select_related('author', 'post').all()
+        return self.project(queryset)
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -31,9 +48,60 @@ class CommentViewSet(viewsets.ModelViewSet):
         post = get_object_or_404(Post, slug=post_slug, status='published')
         
         serializer = self.get_serializer(data=request.data)
+        serializer.context['post'] = post
         serializer.is_valid(raise_exception=True)
         comment = serializer.save(author=request.user, post=post)
         
         # Return full comment data
         response_serializer = CommentSerializer(comment)
-        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serialized(response_serializer), status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['get'])
+    def thread(self, request, post_slug=None):
+        """
+        Top-level comments, newest first, with nested replies.
+        GET /api/v1/posts/{post_slug}/comments/thread/?depth=3&replies=5
+        """
+        roots = self.get_queryset().filter(parent__isnull=True).order_by('-created_at', '-id')
+        return self.thread_response(roots)
+    
+    @action(detail=True, methods=['get'])
+    def replies(self, request, post_slug=None, pk=None):
+        """
+        Direct replies of a comment, oldest first, with nested replies.
+        GET /api/v1/posts/{post_slug}/comments/{id}/replies/?depth=3&replies=5
+        """
+        parent = self.get_object()
+        children = self.get_queryset().filter(parent=parent).order_by('path')
+        return self.thread_response(children)
+    
+    def thread_response(self, queryset):
+        depth, replies = threads.thread_params(self.request)
+        serializer = self.get_serializer(many=True)
+        compiled = get_compiled_serializer(serializer.child, self.projection_required)
+        if compiled is not None:
+            rows, annotations = compiled.values(queryset)
+            to_data = lambda row: compiled.to_representation(row, annotations)
+            key = lambda row: (row['id'], row['parent'])
+            attrs = lambda row: (row['post'], row['path'], row['depth'])
+        else:
+            rows = queryset
+            to_data = serializer.child.to_representation
+            key = lambda comment: (comment.pk, comment.parent_id)
+            attrs = lambda comment: (comment.post_id, comment.path, comment.depth)
+        
+        page = self.paginate_queryset(rows)
+        items = list(rows) if page is None else page
+        below = []
+        if items and depth:
+            post_id, _, top_depth = attrs(items[0])
+            below = threads.descendants(
+                self.get_queryset(), post_id, [attrs(item)[1] for item in items], top_depth + depth, replies
+            )
+            below = compiled.values(below)[0] if compiled is not None else below
+        
+        with serializing():
+            tree = threads.attach_replies(items, below, key, to_data)
+        if page is not None:
+            return self.get_paginated_response(tree)
+        return Response(tree)
@@ -0,0 +1,27 @@
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from ..response_cache import CachedResponseMixin
+from .. import feed
+
+
+class FeedViewSet(CachedResponseMixin, viewsets.GenericViewSet):
+    """
+    Precomputed page feeds (see blog_api.feed), one stored snapshot each.
+    Served from the tag-invalidated response cache.
+    """
+    permission_classes = [AllowAny]
+    pagination_class = None
+    cache_actions = ('home',)
+
+    def get_cache_tags(self, data):
+        return {feed.FEED_TAG}
+
+    @action(detail=False, methods=['get'])
+    def home(self, request):
+        """
+        Hero post, latest posts, per-category highlights and categories.
+        GET /api/v1/feed/home/
+        """
+        return Response(feed.get_home())
@@ -0,0 +1,63 @@
+from django.http import FileResponse, Http404
+from django.views.decorators.http import require_GET
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from .. import images
+from ..models import PostImage
+from ..permissions import IsAuthor
+from ..serializers.images import PostImageSerializer
+from ..instrumentation import serialized
+
+# Derivative names are content-addressed
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+class ImageUploadView(generics.CreateAPIView):
+    """
+    API endpoint for uploading post images (multipart `file`).
+    POST /api/v1/images/
+
+    Returns the image's `id` (pass it as a post's `image_id`), the URL of
+    its widest JPEG and the WebP/JPEG `srcset` of its derivatives; 201 for
+    a new image, 200 when the same file was uploaded before.
+    """
+    serializer_class = PostImageSerializer
+    permission_classes = (permissions.IsAuthenticated, IsAuthor)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(uploaded_by=request.user)
+        return Response(
+            serialized(serializer), status=status.HTTP_201_CREATED if serializer.created else status.HTTP_200_OK
+        )
+
+
+@require_GET
+def serve_image(request, shard, digest, name):
+    """
+    A derivative of an uploaded image, made first if it is missing.
+    GET {MEDIA_URL}images/{digest[:2]}/{digest}/{width}.{webp|jpg}
+    """
+    match = images.DERIVATIVE_RE.match(name)
+    if not images.DIGEST_RE.match(digest) or shard != digest[:2] or match is None:
+        raise Http404
+    format_name = images.EXTENSIONS.get(match['extension'])
+    width = int(match['width'])
+    if format_name is None:
+        raise Http404
+
+    path = images.derivative_path(digest, width, format_name)
+    if not path.exists():
+        image = PostImage.objects.filter(pk=digest).only('width').first()
+        if image is None or width not in images.derivative_widths(image.width):
+            raise Http404
+        try:
+            images.make_derivatives(digest, image.width, only=(width, format_name))
+        except FileNotFoundError:
+            # The original is gone too
+            raise Http404
+
+    response = FileResponse(path.open('rb'), content_type=f'image/{format_name}')
+    response['Cache-Control'] = IMMUTABLE
+    return response
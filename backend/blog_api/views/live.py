@@ -0,0 +1,74 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from ..live import format_event, get_backend, get_hub
+from ..models import Post
+
+
+async def event_stream(post_id, last_event_id):
+    """
+    Yield SSE frames for a post: missed events first (or a `reset` when they
+    are no longer in the history), then live ones, with keepalive comments.
+    """
+    hub = get_hub()
+    backend = get_backend()
+    keepalive = getattr(settings, 'LIVE_EVENTS_KEEPALIVE', 15)
+    await sync_to_async(backend.subscribe)(post_id)
+    try:
+        # Fix the starting point before the first yield, so nothing published
+        # while the client reads it is skipped
+        cursor = last_event_id
+        if cursor is None:
+            cursor = hub.latest_id(post_id)
+        yield f'retry: {getattr(settings, "LIVE_EVENTS_RETRY_MS", 3000)}\n\n'
+        async for frame in _frames(hub, post_id, cursor, keepalive):
+            yield frame
+    finally:
+        await sync_to_async(backend.unsubscribe)(post_id)
+
+
+async def _frames(hub, post_id, cursor, keepalive):
+    while True:
+        events, complete = hub.since(post_id, cursor)
+        if not complete:
+            # The client must refetch the comments; continue from the newest event
+            cursor = hub.latest_id(post_id)
+            yield f'id: {cursor or ""}\nevent: reset\ndata: {{}}\n\n'
+            continue
+        for event in events:
+            cursor = event.id
+            yield format_event(event)
+        try:
+            await asyncio.wait_for(hub.wait(post_id, cursor), timeout=keepalive)
+        except asyncio.TimeoutError:
+            yield ': keepalive\n\n'
+
+
+@require_GET
+async def comment_stream(request, post_slug):
+    """
+    Server-Sent Events stream of a published post's comment activity.
+    GET /api/v1/posts/{post_slug}/comments/stream/
+    Resumes after the `Last-Event-ID` header (or `?last_event_id=`).
+    Needs the ASGI application; sync workers would be held open forever.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('Live comments require the ASGI server.', status=501, content_type='text/plain')
+
+    post_id = await Post.objects.filter(slug=post_slug, status='published').values_list('id', flat=True).afirst()
+    if post_id is None:
+        raise Http404('No published post matches the given slug.')
+    # Don't hold this request's database connection open for the whole stream
+    await sync_to_async(connections.close_all)()
+
+    get_backend().start()
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    response = StreamingHttpResponse(event_stream(post_id, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -2,29 +2,56 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import models
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from ..models import Post
 from ..serializers.posts import PostListSerializer, PostDetailSerializer, PostCreateUpdateSerializer
 from ..permissions import IsAuthor, IsOwnerOrReadOnly
+from ..filters import PostSearchFilter
+from ..pagination import KeysetPaginationMixin
+from ..response_cache import CachedResponseMixin, items_of
+from ..fieldsets import ProjectionMixin
+from ..serializers.compiled import CompiledListMixin, get_compiled_serializer
+from ..instrumentation import SerializationTimingMixin
+from ..export import aiter_lines, iter_keyset, iter_ndjson, served_async
+from .. import popularity
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(CachedResponseMixin, KeysetPaginationMixin, ProjectionMixin, CompiledListMixin, SerializationTimingMixin,
+                  viewsets.ModelViewSet):
     """
     ViewSet for Post model.
-    Provides CRUD operations, filtering, and search.
+    Provides CRUD operations, filtering, and full-text search.
+    `?search=` results are relevance-ranked unless `?ordering=` is given.
+    List actions accept `?pagination=cursor` for keyset (newest-first) pages,
+    except when `?ordering=` or `?search=` order them otherwise.
+    Public reads are served from the tag-invalidated response cache.
+    Detail reads are counted (write-behind, see blog_api.popularity) and
+    feed the `popular/` ranking. `related/` serves the precomputed nearest
+    posts by content (blog_api.related).
+    Reads accept `?fields=`/`?exclude=` and only load the columns they render;
+    list actions serialize straight from `.values()` rows.
     """
     queryset = Post.objects.select_related('author', 'category').all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthor, IsOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, PostSearchFilter]
     filterset_fields = ['status', 'category__slug', 'author__username']
     search_fields = ['title', 'content', 'excerpt']
     ordering_fields = ['created_at', 'updated_at', 'title']
     ordering = ['-created_at']
     lookup_field = 'slug'
+    cache_actions = ('list', 'retrieve', 'by_category', 'by_author', 'popular', 'related')
+    list_actions = ('list', 'by_category', 'by_author', 'my_posts', 'popular', 'related')
+    keyset_actions = ('list', 'by_category', 'by_author', 'my_posts')
+    projection_actions = list_actions + ('retrieve', 'export')
+    projection_required = ('id', 'slug', 'status', 'author', 'created_at')
     
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in self.list_actions:
             return PostListSerializer
         elif self.action in ['create', 'update', 'partial_update']:
             return PostCreateUpdateSerializer
@@ -47,6 +74,35 @@ class PostViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
     
+    def get_cache_tags(self, data):
+        if self.action == 'by_category':
+            tags = {f"posts:category:{self.kwargs['category_slug']}"}
+        elif self.action == 'by_author':
+            tags = {f"posts:author:{self.kwargs['username']}"}
+        elif self.action == 'list':
+            tags = {'posts'}
+        elif self.action == 'popular':
+            tags = {'posts', popularity.POPULAR_TAG}
+        elif self.action == 'related':
+            # Any post edit can move a neighbour list
+            tags = {'posts', f"post:{self.kwargs['slug']}"}
+        else:
+            tags = {f"post:{self.kwargs['slug']}"}
+        
+        for item in items_of(data):
+            if item.get('category'):
+                tags.add(f"category:{item['category']['slug']}")
+            if item.get('author'):
+                tags.add(f"author:{item['author']['id']}")
+        return tags
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # Cached and revalidated (304) reads count too
+        if self.action == 'retrieve' and request.method == 'GET' and response.status_code in (200, 304):
+            popularity.record_view(self.kwargs['slug'])
+        return response
+    
     @action(detail=False, methods=['get'], url_path='category/(?P<category_slug>[^/.]+)')
     def by_category(self, request, category_slug=None):
         """
@@ -54,12 +110,7 @@ class PostViewSet(viewsets.ModelViewSet):
         GET /api/v1/posts/category/{slug}/
         """
         posts = self.get_queryset().filter(category__slug=category_slug, status='published')
-        page = self.paginate_queryset(posts)
-        if page is not None:
-            serializer = PostListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = PostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        return self.list_response(posts)
     
     @action(detail=False, methods=['get'], url_path='author/(?P<username>[^/.]+)')
     def by_author(self, request, username=None):
@@ -68,12 +119,39 @@ class PostViewSet(viewsets.ModelViewSet):
         GET /api/v1/posts/author/{username}/
         """
         posts = self.get_queryset().filter(author__username=username, status='published')
-        page = self.paginate_queryset(posts)
-        if page is not None:
-            serializer = PostListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = PostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        return self.list_response(posts)
+    
+    @action(detail=False, methods=['get'])
+    def popular(self, request):
+        """
+        Published posts ranked by time-decayed reads, optionally within a category.
+        GET /api/v1/posts/popular/?category={slug}
+        """
+        return self.list_response(self.popular_queryset())
+    
+    def popular_queryset(self):
+        # A range (rather than IS NOT NULL) lets the planner walk the score index
+        posts = self.get_queryset().filter(status='published', ranking__score__gt=float('-inf'))
+        category_slug = self.request.query_params.get('category')
+        if category_slug:
+            posts = posts.filter(ranking__category__slug=category_slug)
+        return posts.order_by('-ranking__score')
+    
+    @action(detail=True, methods=['get'])
+    def related(self, request, slug=None):
+        """
+        Published posts most similar to this one, closest first (not paginated).
+        GET /api/v1/posts/{slug}/related/
+        """
+        self._paginator = None
+        return self.list_response(self.related_queryset())
+    
+    def related_queryset(self):
+        # One range of the (post, rank) index; a slug with no stored
+        # neighbours (unknown, draft) gets an empty list rather than a 404
+        return self.get_queryset().filter(
+            status='published', neighbour_of__post__slug=self.kwargs['slug']
+        ).order_by('neighbour_of__rank')
     
     @action(detail=False, methods=['get'], url_path='my-posts')
     def my_posts(self, request):
@@ -84,10 +162,37 @@ class PostViewSet(viewsets.ModelViewSet):
         if not request.user.is_authenticated:
             return Response({"detail": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
         
-        posts = Post.objects.filter(author=request.user).select_related('author', 'category').order_by('-created_at')
-        page = self.paginate_queryset(posts)
-        if page is not None:
-            serializer = PostListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = PostListSerializer(posts, many=True)
-        return Response(serializer.data)
+        posts = self.project(
+            Post.objects.filter(author=request.user).select_related('author', 'category').order_by('-created_at')
+        )
+        return self.list_response(posts)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream all published posts as NDJSON, least recently updated first.
+        GET /api/v1/posts/export/?updated_since={ISO 8601 datetime}
+        """
+        posts = Post.objects.filter(status='published').select_related('author', 'category')
+        
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            since = parse_datetime(updated_since)
+            if since is None:
+                raise ValidationError({'updated_since': 'Enter a valid ISO 8601 datetime.'})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            posts = posts.filter(updated_at__gte=since)
+        
+        serializer = self.get_serializer(many=True)
+        compiled = get_compiled_serializer(serializer.child, ('id', 'updated_at'))
+        if compiled is not None:
+            # Search annotations can't apply: the export isn't filtered
+            rows, _ = compiled.values(posts)
+            lines = iter_ndjson(iter_keyset(rows), compiled.to_representation)
+        else:
+            lines = iter_ndjson(iter_keyset(self.project(posts)), serializer.child.to_representation)
+        
+        if served_async(request):
+            lines = aiter_lines(lines)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
@@ -54,8 +54,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog_api.instrumentation.RequestTimingMiddleware',  # Server-Timing + timing log (sampled)
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Whitenoise for static files
+    'blog_api.middleware.AsyncWhiteNoiseMiddleware',  # Whitenoise for static files (ASGI-native)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'django.middleware.common.CommonMiddleware',
@@ -138,9 +139,32 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Whitenoise configuration
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
-# Media files
-MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
+# Media files. MEDIA_URL may be absolute: a CDN, or the API's own origin
+# when the frontend is served from another one.
+MEDIA_URL = config('MEDIA_URL', default='/media/')
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Cache
+# Local memory by default, which every worker process keeps to itself; point
+# CACHE_BACKEND/CACHE_LOCATION at Redis, Memcached or e.g.
+# django.core.cache.backends.filebased.FileBasedCache and a directory to
+# share entries between workers.
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='blog-api'),
+    }
+}
+
+# Seconds to keep rendered read-only API responses (0 disables the cache).
+# Writes invalidate them in the cache, which only a shared backend carries
+# to the other workers: off by default on local memory, and refused there
+# at startup (see blog_api.response_cache.check_shared_cache).
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = config(
+    'RESPONSE_CACHE_TIMEOUT', default=0 if CACHE_BACKEND.endswith('.LocMemCache') else 300, cast=int
+)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/6.0/ref/settings/#default-auto-field
@@ -151,11 +175,22 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'blog_api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'blog_api.renderers.FastJSONRenderer',
+        'blog_api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'blog_api.parsers.FastJSONParser',
+        'blog_api.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 18,
 }
@@ -167,8 +202,26 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_OBTAIN_SERIALIZER': 'blog_api.serializers.auth.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'blog_api.serializers.auth.TokenRefreshSerializer',
 }
 
+# Refresh-token blacklist (blog_api.blacklist): Bloom filter sizing, how often
+# each worker pulls other workers' blacklistings (0 turns polling off)
+TOKEN_BLACKLIST_FILTER_CAPACITY = config('TOKEN_BLACKLIST_FILTER_CAPACITY', default=100000, cast=int)
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = config('TOKEN_BLACKLIST_FILTER_ERROR_RATE', default=0.001, cast=float)
+TOKEN_BLACKLIST_SYNC_INTERVAL = config('TOKEN_BLACKLIST_SYNC_INTERVAL', default=5, cast=float)
+
+# New refresh tokens' OutstandingToken rows are inserted in batches of this
+# size, or after this many seconds (1 writes each one immediately)
+TOKEN_OUTSTANDING_BATCH_SIZE = config('TOKEN_OUTSTANDING_BATCH_SIZE', default=50, cast=int)
+TOKEN_OUTSTANDING_FLUSH_INTERVAL = config('TOKEN_OUTSTANDING_FLUSH_INTERVAL', default=5, cast=float)
+
+# Seconds between background prunes of expired tokens (0 leaves it to
+# `manage.py prune_tokens`), and rows deleted per statement
+TOKEN_PRUNE_INTERVAL = config('TOKEN_PRUNE_INTERVAL', default=3600, cast=float)
+TOKEN_PRUNE_CHUNK_SIZE = config('TOKEN_PRUNE_CHUNK_SIZE', default=1000, cast=int)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -179,3 +232,81 @@ CORS_ALLOW_CREDENTIALS = True
 
 # Custom User Model
 AUTH_USER_MODEL = 'blog_api.User'
+
+# Full-text search backend for posts (dotted path). Empty picks one from the
+# database vendor: SQLite FTS5 in development, tsvector/GIN on PostgreSQL.
+BLOG_SEARCH_BACKEND = config('BLOG_SEARCH_BACKEND', default='')
+
+# Comment nesting levels allowed (top-level included); paths fit 25 levels
+COMMENT_MAX_DEPTH = config('COMMENT_MAX_DEPTH', default=6, cast=int)
+
+# Post reads are counted in memory and flushed every this many seconds
+# (blog_api.popularity; 0 leaves them for the flush at exit). Popularity
+# rankings halve a read's weight every POPULAR_HALF_LIFE_HOURS.
+VIEW_COUNT_FLUSH_INTERVAL = config('VIEW_COUNT_FLUSH_INTERVAL', default=10, cast=float)
+POPULAR_HALF_LIFE_HOURS = config('POPULAR_HALF_LIFE_HOURS', default=72, cast=float)
+
+# Neighbours kept per post in the related-posts index (blog_api.related);
+# run rebuild_related_posts after changing it
+RELATED_POSTS_COUNT = config('RELATED_POSTS_COUNT', default=5, cast=int)
+# Terms used by more posts than this get no weight, which caps posting lists
+RELATED_MAX_POSTINGS = config('RELATED_MAX_POSTINGS', default=1000, cast=int)
+# Apply saved posts to the index from a background thread after commit
+RELATED_POSTS_IN_BACKGROUND = config('RELATED_POSTS_IN_BACKGROUND', default=True, cast=bool)
+
+# Home feed snapshot (blog_api.feed): latest posts, and newest posts shown
+# per category
+FEED_LATEST_COUNT = config('FEED_LATEST_COUNT', default=12, cast=int)
+FEED_HIGHLIGHT_COUNT = config('FEED_HIGHLIGHT_COUNT', default=3, cast=int)
+
+# /api/v1/batch/ (blog_api.batch): calls allowed per batch, and threads
+# serving a batch's consecutive GETs concurrently (1 runs them in order)
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+BATCH_MAX_WORKERS = config('BATCH_MAX_WORKERS', default=4, cast=int)
+
+# Uploaded post images (blog_api.images): largest upload in bytes and in
+# pixels (what decoding it takes in memory), widths of the resized
+# derivatives, their WebP/JPEG quality, and threads making them after an
+# upload. Derivatives of new widths are made when first requested.
+IMAGE_MAX_UPLOAD_SIZE = config('IMAGE_MAX_UPLOAD_SIZE', default=10 * 1024 * 1024, cast=int)
+IMAGE_MAX_PIXELS = config('IMAGE_MAX_PIXELS', default=40_000_000, cast=int)
+IMAGE_WIDTHS = tuple(int(width) for width in config('IMAGE_WIDTHS', default='400,800,1200,1920').split(','))
+IMAGE_QUALITY = config('IMAGE_QUALITY', default=80, cast=int)
+IMAGE_WORKERS = config('IMAGE_WORKERS', default=2, cast=int)
+
+# Authenticated user lookups: per-process LRU (seconds-long TTL) with an
+# optional shared cache alias as a second tier
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=2048, cast=int)
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=30, cast=int)
+AUTH_USER_CACHE_ALIAS = config('AUTH_USER_CACHE_ALIAS', default='')
+AUTH_USER_CACHE_SHARED_TTL = config('AUTH_USER_CACHE_SHARED_TTL', default=300, cast=int)
+
+# Live comment events (SSE). Use blog_api.live.RedisBroadcastBackend with
+# LIVE_EVENTS_REDIS_URL when running more than one worker process.
+LIVE_EVENTS_BACKEND = config('LIVE_EVENTS_BACKEND', default='blog_api.live.LocalBroadcastBackend')
+LIVE_EVENTS_REDIS_URL = config('LIVE_EVENTS_REDIS_URL', default='')
+LIVE_EVENTS_HISTORY = config('LIVE_EVENTS_HISTORY', default=200, cast=int)  # events kept per post for resume
+LIVE_EVENTS_KEEPALIVE = config('LIVE_EVENTS_KEEPALIVE', default=15, cast=int)  # seconds
+# Seconds a post keeps publishing events after its last stream closes
+LIVE_EVENTS_RESUME_GRACE = config('LIVE_EVENTS_RESUME_GRACE', default=30, cast=int)
+
+# Serialize hot list endpoints straight from .values() rows (same JSON output)
+COMPILED_SERIALIZERS = config('COMPILED_SERIALIZERS', default=True, cast=bool)
+
+# Fraction of requests (0-1) that get Server-Timing headers and a timing log line
+REQUEST_TIMING_SAMPLE_RATE = config('REQUEST_TIMING_SAMPLE_RATE', default=1.0 if DEBUG else 0.01, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'blog_api.timing': {
+            'handlers': ['console'],
+            'level': config('REQUEST_TIMING_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
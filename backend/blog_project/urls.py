@@ -14,10 +14,19 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from urllib.parse import urlsplit
+
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
+from blog_api.views.images import serve_image
+
+# Image derivatives are made when first requested; a front server may serve
+# the ones on disk and pass misses through
+media_prefix = urlsplit(settings.MEDIA_URL).path.lstrip('/')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/', include('blog_api.urls')),
+    path(f'{media_prefix}images/<str:shard>/<str:digest>/<str:name>', serve_image, name='image-derivative'),
 ]
@@ -1,6 +1,7 @@
 "use client"
 
 import Link from "next/link"
+import { PostPicture, type ImageSrcset } from "./post-picture"
 
 interface ArticleCardProps {
   title: string
@@ -9,17 +10,21 @@ interface ArticleCardProps {
   date: string
   category: string
   image: string
+  imageSrcset?: ImageSrcset
   slug: string
 }
 
-export function ArticleCard({ title, excerpt, author, date, category, image, slug }: ArticleCardProps) {
+export function ArticleCard({ title, excerpt, author, date, category, image, imageSrcset, slug }: ArticleCardProps) {
   return (
     <article className="space-y-4">
       {/* Image - Clickable */}
       <Link href={`/article/${slug}`} className="block">
         <div className="aspect-[4/3] overflow-hidden rounded-2xl bg-muted group">
-          <img
+          <PostPicture
             src={image || "/placeholder.svg"}
+            srcset={imageSrcset}
+            // One, two or three cards per row
+            sizes="(min-width: 1280px) 400px, (min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
             alt={title}
             className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-105"
           />
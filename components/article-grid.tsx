@@ -1,5 +1,6 @@
 import Link from "next/link"
 import { ArticleCard } from "./article-card"
+import type { ImageSrcset } from "./post-picture"
 import { Button } from "@/components/ui/button"
 
 interface Article {
@@ -9,6 +10,7 @@ interface Article {
     date: string
     category: string
     image: string
+    imageSrcset?: ImageSrcset
     slug: string
 }
 
@@ -1,4 +1,5 @@
 import Link from "next/link"
+import { PostPicture, type ImageSrcset } from "./post-picture"
 
 interface FeaturedArticle {
     title: string
@@ -7,6 +8,7 @@ interface FeaturedArticle {
     date: string
     category: string
     image: string
+    imageSrcset?: ImageSrcset
     slug: string
     readTime?: string
     sponsored?: boolean
@@ -40,8 +42,11 @@ export function HeroSection({ featuredArticles }: HeroSectionProps) {
                             <article className="h-full flex flex-col">
                                 {/* Image */}
                                 <div className="relative overflow-hidden rounded-2xl bg-muted" style={{ height: "400px" }}>
-                                    <img
+                                    <PostPicture
                                         src={leftArticle.image || "/placeholder.svg"}
+                                        srcset={leftArticle.imageSrcset}
+                                        sizes="(min-width: 1024px) 25vw, 100vw"
+                                        eager
                                         alt={leftArticle.title}
                                         className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-105"
                                     />
@@ -98,8 +103,11 @@ export function HeroSection({ featuredArticles }: HeroSectionProps) {
                             <article className="h-full flex flex-col">
                                 {/* Image */}
                                 <div className="relative overflow-hidden rounded-2xl bg-muted" style={{ height: "400px" }}>
-                                    <img
+                                    <PostPicture
                                         src={centerArticle.image || "/placeholder.svg"}
+                                        srcset={centerArticle.imageSrcset}
+                                        sizes="(min-width: 1024px) 50vw, 100vw"
+                                        eager
                                         alt={centerArticle.title}
                                         className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-105"
                                     />
@@ -156,8 +164,11 @@ export function HeroSection({ featuredArticles }: HeroSectionProps) {
                             <article className="h-full flex flex-col">
                                 {/* Image */}
                                 <div className="relative overflow-hidden rounded-2xl bg-muted" style={{ height: "400px" }}>
-                                    <img
+                                    <PostPicture
                                         src={rightArticle.image || "/placeholder.svg"}
+                                        srcset={rightArticle.imageSrcset}
+                                        sizes="(min-width: 1024px) 25vw, 100vw"
+                                        eager
                                         alt={rightArticle.title}
                                         className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-105"
                                     />
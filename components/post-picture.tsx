@@ -0,0 +1,33 @@
+// An uploaded post image's resized derivatives, as the API lists them
+export type ImageSrcset = { webp: string; jpeg: string } | null
+
+interface PostPictureProps {
+  src: string
+  srcset?: ImageSrcset
+  // Rendered width of the image at each breakpoint, for picking a derivative
+  sizes: string
+  alt: string
+  className?: string
+  eager?: boolean
+}
+
+export function PostPicture({ src, srcset, sizes, alt, className, eager = false }: PostPictureProps) {
+  const loading = eager ? "eager" : "lazy"
+  if (!srcset) {
+    return <img src={src} alt={alt} className={className} loading={loading} decoding="async" />
+  }
+  return (
+    <picture>
+      <source type="image/webp" srcSet={srcset.webp} sizes={sizes} />
+      <img
+        src={src}
+        srcSet={srcset.jpeg}
+        sizes={sizes}
+        alt={alt}
+        className={className}
+        loading={loading}
+        decoding="async"
+      />
+    </picture>
+  )
+}
@@ -0,0 +1,33 @@
+// Batch API service
+// Connected to Django REST API
+
+import { apiClient } from "./client"
+
+interface BatchRequest {
+    method: "GET" | "POST" | "PUT" | "PATCH" | "DELETE"
+    // Relative to the API root, like the other services' endpoints
+    path: string
+    body?: any
+}
+
+interface BatchResponse {
+    status: number
+    headers: Record<string, string>
+    body: any
+}
+
+interface BatchResult {
+    responses: BatchResponse[]
+    committed?: boolean
+}
+
+export const batchApi = {
+    // Run several API calls in one round-trip; responses come back in request order.
+    // With atomic, the writes all commit or none do.
+    async send(requests: BatchRequest[], atomic: boolean = false): Promise<BatchResult> {
+        return apiClient.post<BatchResult>("/batch/", {
+            requests: requests.map(request => ({ ...request, path: `/api/v1${request.path}` })),
+            atomic,
+        })
+    },
+}
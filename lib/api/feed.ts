@@ -0,0 +1,54 @@
+// Feed API service
+// Connected to Django REST API
+
+import { apiClient } from "./client"
+
+interface Author {
+    id: number
+    username: string
+    email: string
+    is_author: boolean
+    display_name: string
+}
+
+interface Category {
+    id: number
+    name: string
+    slug: string
+    created_at: string
+    posts_count: number
+}
+
+interface Post {
+    id: number
+    title: string
+    slug: string
+    excerpt: string
+    reading_time: number
+    status: "draft" | "published"
+    category: Omit<Category, "posts_count">
+    author: Author
+    image: string | null
+    image_srcset: { webp: string; jpeg: string } | null
+    created_at: string
+    updated_at: string
+}
+
+interface CategoryHighlight {
+    category: string
+    posts: Post[]
+}
+
+interface HomeFeed {
+    hero: Post | null
+    latest: Post[]
+    highlights: CategoryHighlight[]
+    categories: Category[]
+}
+
+export const feedApi = {
+    // Get the hero post, latest posts, category highlights and categories in one request
+    async getHomeFeed(): Promise<HomeFeed> {
+        return apiClient.get<HomeFeed>("/feed/home/")
+    },
+}
@@ -8,6 +8,7 @@ interface Author {
     username: string
     email: string
     is_author: boolean
+    display_name?: string
 }
 
 interface Category {
@@ -21,11 +22,17 @@ interface Post {
     title: string
     slug: string
     content: string
+    // Rendered from content on save
+    content_html?: string
+    content_toc?: { level: number; text: string; id: string }[]
+    word_count?: number
+    reading_time: number
     excerpt: string
     status: "draft" | "published"
     category: Category
     author: Author
     image: string | null
+    image_srcset: { webp: string; jpeg: string } | null
     created_at: string
     updated_at: string
     comments_count?: number
@@ -44,6 +51,7 @@ interface CreatePostData {
     excerpt?: string
     category_id: number
     image?: string
+    image_id?: string | null
     status: "draft" | "published"
 }
 
@@ -58,6 +66,17 @@ export const postsApi = {
         return apiClient.get<Post>(`/posts/${slug}/`)
     },
 
+    // Get posts related to a post by content (precomputed, closest first)
+    async getRelatedPosts(slug: string): Promise<Post[]> {
+        return apiClient.get<Post[]>(`/posts/${slug}/related/`)
+    },
+
+    // Get published posts ranked by recent (time-decayed) reads, optionally within a category
+    async getPopularPosts(categorySlug?: string, page: number = 1): Promise<PostListResponse> {
+        const category = categorySlug ? `&category=${encodeURIComponent(categorySlug)}` : ""
+        return apiClient.get<PostListResponse>(`/posts/popular/?page=${page}${category}`)
+    },
+
     // Get posts by category
     async getPostsByCategory(categorySlug: string, page: number = 1): Promise<PostListResponse> {
         return apiClient.get<PostListResponse>(`/posts/category/${categorySlug}/?page=${page}`)